@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""Scripted performance benchmarks for the game's hot paths (see __main__.py)."""
@@ -0,0 +1,62 @@
+# benchmarks/__main__.py
+"""Run the hot-path benchmarks or compare two result files.
+
+    python -m benchmarks run [-k zombies] [--ticks N] [--out results.json]
+    python -m benchmarks compare baseline.json results.json [--threshold 0.10]
+"""
+import argparse
+import sys
+
+from benchmarks import harness
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmark scenarios")
+    run_parser.add_argument("-k", dest="patterns", action="append",
+                            help="only run scenarios whose name contains this text (repeatable)")
+    run_parser.add_argument("--ticks", type=int, default=None,
+                            help="override the measured tick count of every scenario")
+    run_parser.add_argument("--out", default=None, help="write results as JSON to this file")
+    run_parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+
+    compare_parser = commands.add_parser("compare", help="fail if results regress against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="allowed slowdown as a fraction (default 0.10 = 10%%)")
+    compare_parser.add_argument("--metric", default="median_ms",
+                                choices=["median_ms", "p95_ms", "p99_ms", "mean_ms"])
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        from benchmarks import scenarios  # noqa: F401  (registers the scenarios)
+        if args.list:
+            for name in harness.SCENARIOS:
+                print(name)
+            return 0
+        results = harness.run_all(args.patterns, args.ticks)
+        if args.out:
+            harness.save_results(results, args.out)
+            print(f"Results written to {args.out}")
+        failed = [name for name, result in results["results"].items() if "errors" in result]
+        if failed:
+            print(f"{len(failed)} scenario(s) hit errors the game caught: {', '.join(failed)}")
+            return 1
+        return 0
+
+    baseline = harness.load_results(args.baseline)
+    current = harness.load_results(args.current)
+    regressions = harness.compare(baseline, current, args.threshold, args.metric)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
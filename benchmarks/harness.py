@@ -0,0 +1,182 @@
+# benchmarks/harness.py
+import contextlib
+import io
+import json
+import platform
+import re
+import time
+
+import pygame
+
+SCENARIOS = {}
+
+# Printed lines that mean the game caught an exception (its handlers print and
+# carry on) rather than reporting a gameplay event
+ERROR_LINE = re.compile(r"error|exception|traceback|warning", re.IGNORECASE)
+
+
+def scenario(name, ticks=120, warmup=10):
+    """Register a benchmark scenario.
+
+    The decorated function receives a Recorder and the tick count and must call
+    recorder.tick() once per simulated tick, timing each subsystem with
+    recorder.measure(name).
+    """
+    def register(func):
+        SCENARIOS[name] = {"func": func, "ticks": ticks, "warmup": warmup}
+        return func
+    return register
+
+
+class _Measurement:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter_ns() - self.start
+        self.recorder.current[self.name] = self.recorder.current.get(self.name, 0) + elapsed
+        return False
+
+
+class Recorder:
+    """Collects per-subsystem nanosecond timings for every tick of a scenario"""
+    def __init__(self, warmup=0):
+        self.warmup = warmup
+        self.samples = {}  # subsystem -> [ns per tick]
+        self.current = {}
+        self.tick_count = 0
+        self.info = {}  # Free-form scenario facts (entity counts, sizes)
+
+    def measure(self, name):
+        return _Measurement(self, name)
+
+    def tick(self):
+        """Close the current tick; warm-up ticks are discarded"""
+        if self.tick_count >= self.warmup:
+            total = sum(self.current.values())
+            for name, elapsed in self.current.items():
+                self.samples.setdefault(name, []).append(elapsed)
+            self.samples.setdefault("tick", []).append(total)
+        self.current = {}
+        self.tick_count += 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples_ns):
+    values = sorted(samples_ns)
+    to_ms = 1e-6
+    return {
+        "median_ms": percentile(values, 50) * to_ms,
+        "p95_ms": percentile(values, 95) * to_ms,
+        "p99_ms": percentile(values, 99) * to_ms,
+        "mean_ms": sum(values) / len(values) * to_ms if values else 0.0,
+        "samples": len(values),
+    }
+
+
+def run_scenario(name, ticks=None):
+    """Run one scenario and summarize its timings.
+
+    The game prints gameplay events, which are kept out of the report, but also
+    the exceptions its handlers catch; those lines are kept under "errors" so a
+    scenario that only runs because errors were swallowed does not pass silently.
+    """
+    entry = SCENARIOS[name]
+    ticks = ticks or entry["ticks"]
+    recorder = Recorder(warmup=entry["warmup"])
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        entry["func"](recorder, ticks + entry["warmup"])
+
+    result = {name: summarize(samples) for name, samples in recorder.samples.items()}
+    total_s = sum(recorder.samples.get("tick", [])) / 1e9
+    measured = len(recorder.samples.get("tick", []))
+    result["ticks_per_second"] = measured / total_s if total_s > 0 else 0.0
+    if recorder.info:
+        result["info"] = recorder.info
+    errors = [line for line in output.getvalue().splitlines() if ERROR_LINE.search(line)]
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+def run_all(names=None, ticks=None, log=print):
+    results = {}
+    for name in SCENARIOS:
+        if names and not any(pattern in name for pattern in names):
+            continue
+        log(f"running {name} ...")
+        results[name] = run_scenario(name, ticks)
+        log(format_result(name, results[name]))
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def format_result(name, result):
+    lines = [f"  {name}: {result['ticks_per_second']:.1f} ticks/s"]
+    errors = result.get("errors", [])
+    if errors:
+        lines.append(f"    ERRORS: {len(errors)} caught by the game, first: {errors[0]}")
+    for subsystem, stats in result.items():
+        if not isinstance(stats, dict) or "median_ms" not in stats:
+            continue
+        lines.append(f"    {subsystem:<24} median {stats['median_ms']:8.3f} ms"
+                     f"   p95 {stats['p95_ms']:8.3f} ms   p99 {stats['p99_ms']:8.3f} ms")
+    return "\n".join(lines)
+
+
+def save_results(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.10, metric="median_ms", log=print):
+    """Compare two result files; returns the list of regressions past the threshold"""
+    regressions = []
+    for name, base_result in baseline["results"].items():
+        cur_result = current["results"].get(name)
+        if cur_result is None:
+            log(f"  {name}: missing from current results")
+            continue
+        for subsystem, base_stats in base_result.items():
+            if not isinstance(base_stats, dict) or metric not in base_stats:
+                continue
+            cur_stats = cur_result.get(subsystem)
+            if cur_stats is None:
+                continue
+            base_value = base_stats[metric]
+            cur_value = cur_stats[metric]
+            change = (cur_value - base_value) / base_value if base_value > 0 else 0.0
+            status = "REGRESSION" if change > threshold else "ok"
+            log(f"  {name:<28} {subsystem:<24} {base_value:9.3f} -> {cur_value:9.3f} ms "
+                f"({change:+7.1%}) {status}")
+            if change > threshold:
+                regressions.append((name, subsystem, base_value, cur_value, change))
+    return regressions
@@ -0,0 +1,465 @@
+# benchmarks/scenarios.py
+import math
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from benchmarks.harness import scenario
+from bullet import Bullet
+from flow_field import FlowField
+from config import *
+from main import Game
+from map import GameMap
+from pathfinder import HierarchicalPathfinder
+from weapon import Grenade
+from zombie import Zombie
+
+BENCH_SEED = 1234
+
+
+def make_game(seed=BENCH_SEED, display=False, world="fixed"):
+    """Headless game in the playing state with an unkillable player at the map centre"""
+    game = Game(headless=True, seed=seed, world=world)
+    game.reset_game()
+    game.game_state = "playing"
+    if display:
+        game.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+
+    # Put the player on the passable tile nearest the centre of the map (a chunked
+    # map keeps its start area clear instead)
+    if game.game_map.size is not None:
+        centre = game.game_map.size // 2
+        for radius in range(0, centre, game.game_map.tile_size):
+            if not game.game_map.check_collision(centre + radius, centre, PLAYER_RADIUS):
+                game.player.rect.center = (centre + radius, centre)
+                break
+    game.player.health = game.player.max_health = 10 ** 9
+    return game
+
+
+def spawn_horde(game, count, min_distance=80, max_distance=900):
+    """Place zombies on passable tiles in a ring around the player"""
+    rng = game.rng.stream("benchmark")
+    player_x, player_y = game.player.rect.center
+    types = ["regular", "fast", "tank"]
+    game.wave_manager.prepare_horde(count)
+    zombies = game.wave_manager.zombies
+    while len(zombies) < count:
+        angle = rng.uniform(0, 2 * math.pi)
+        distance = rng.uniform(min_distance, max_distance)
+        x = player_x + math.cos(angle) * distance
+        y = player_y + math.sin(angle) * distance
+        if game.game_map.is_passable(x, y):
+            game.wave_manager.add_zombie(Zombie(x, y, types[len(zombies) % 3], game.rng.gameplay))
+    # Keep the wave manager from spawning or advancing waves mid-benchmark
+    game.wave_manager.spawned_count = game.wave_manager.zombies_per_wave = count
+    return zombies
+
+
+def keep_horde(game, count):
+    """Replace zombies killed during the tick so the load stays constant"""
+    if len(game.wave_manager.zombies) < count:
+        spawn_horde(game, count)
+
+
+def fire_bullets(game, count):
+    """Top up the bullet list with shots fanned out from the player"""
+    rng = game.rng.stream("benchmark")
+    player_x, player_y = game.player.rect.center
+    while len(game.bullets) < count:
+        game.bullets.append(Bullet(player_x, player_y, rng.uniform(0, 2 * math.pi)))
+
+
+def _zombie_chase(count):
+    def run(recorder, ticks):
+        game = make_game()
+        spawn_horde(game, count)
+        recorder.info["zombies"] = count
+        for _ in range(ticks):
+            with recorder.measure("update_zombies"):
+                game.update_zombies()
+            keep_horde(game, count)
+            recorder.tick()
+    return run
+
+for _count, _ticks in ((1000, 120), (5000, 40), (10000, 20)):
+    scenario(f"zombies_chase_{_count}", ticks=_ticks, warmup=3)(_zombie_chase(_count))
+
+
+def count_overlaps(game):
+    """Pairs of zombies whose bodies overlap by more than a quarter radius"""
+    spatial_hash = game.wave_manager.spatial_hash
+    overlaps = 0
+    for zombie in game.wave_manager.zombies:
+        for other in spatial_hash.query_circle(zombie.x, zombie.y, zombie.radius * 0.75):
+            if other is not zombie:
+                overlaps += 1
+    return overlaps // 2
+
+
+def _zombie_crowd(count, arrays=True):
+    def run(recorder, ticks):
+        # The whole horde starts packed close around the player, the worst case for
+        # separation: the store's density-grid push, or with arrays off the Zombie
+        # objects' neighbour push through the spatial hash
+        game = make_game()
+        game.wave_manager.use_arrays = arrays
+        spawn_horde(game, count, min_distance=60, max_distance=60 + count // 4)
+        recorder.info.update(zombies=count, overlaps_at_start=count_overlaps(game))
+        for _ in range(ticks):
+            with recorder.measure("update_zombies"):
+                game.update_zombies()
+            keep_horde(game, count)
+            recorder.tick()
+        recorder.info["overlaps_at_end"] = count_overlaps(game)
+    return run
+
+for _count in (1000, 2000):
+    scenario(f"zombies_crowd_{_count}", ticks=120, warmup=3)(_zombie_crowd(_count))
+    scenario(f"zombies_crowd_objects_{_count}", ticks=120, warmup=3)(_zombie_crowd(_count, arrays=False))
+
+
+@scenario("bullets_through_horde_500", ticks=120)
+def bullets_through_horde(recorder, ticks):
+    game = make_game()
+    spawn_horde(game, 200, max_distance=500)
+    recorder.info.update(bullets=500, zombies=200)
+    for _ in range(ticks):
+        fire_bullets(game, 500)
+        keep_horde(game, 200)
+        with recorder.measure("update_bullets"):
+            game.update_bullets()
+        recorder.tick()
+
+
+@scenario("grenade_blasts", ticks=120)
+def grenade_blasts(recorder, ticks):
+    game = make_game()
+    zombies = spawn_horde(game, 300, max_distance=500)
+    rng = game.rng.stream("benchmark")
+    recorder.info.update(grenades_per_tick=5, zombies=300)
+    for _ in range(ticks):
+        # Five grenades per tick, each detonating on this tick's update
+        for _ in range(5):
+            target = zombies[rng.randrange(len(zombies))]
+            grenade = Grenade(target.x, target.y, (target.x + 1, target.y), 500)
+            grenade.lifetime = 1
+            game.bullets.append(grenade)
+        with recorder.measure("update_bullets"):
+            game.update_bullets()
+        with recorder.measure("update_zombies"):
+            game.update_zombies()
+        keep_horde(game, 300)
+        recorder.tick()
+
+
+def _particles(count):
+    def run(recorder, ticks):
+        game = make_game(display=True)
+        system = game.particle_system
+        rng = game.rng.stream("benchmark")
+        camera_x = game.player.rect.centerx - WIDTH // 2
+        camera_y = game.player.rect.centery - HEIGHT // 2
+        recorder.info["particles"] = count
+        emitters = (system.add_explosion, system.add_blood_effect, system.add_impact, system.add_sparkle)
+        for tick in range(ticks):
+            with recorder.measure("particles_emit"):
+                while len(system) < count:
+                    x = game.player.rect.centerx + rng.uniform(-300, 300)
+                    y = game.player.rect.centery + rng.uniform(-250, 250)
+                    emitters[len(system) % len(emitters)](x, y, count=20)
+            with recorder.measure("particles_update"):
+                system.update()
+            with recorder.measure("particles_draw"):
+                system.draw(game.screen, camera_x, camera_y)
+            recorder.tick()
+    return run
+
+for _count, _ticks in ((500, 240), (10000, 60)):
+    scenario(f"particles_{_count}", ticks=_ticks)(_particles(_count))
+
+
+def _draw_game(zombie_count):
+    def run(recorder, ticks):
+        game = make_game(display=True)
+        spawn_horde(game, zombie_count, max_distance=450)
+        fire_bullets(game, 100)
+        player_x, player_y = game.player.rect.center
+        for i in range(5):
+            # Grenades from the launcher in flight alongside the bullets
+            game.bullets.append(Grenade(player_x, player_y, (player_x + 100, player_y + i * 40 - 80), 100))
+        for i in range(30):
+            game.particle_system.add_explosion(game.player.rect.centerx + i * 5, game.player.rect.centery)
+        recorder.info.update(zombies=zombie_count, bullets=100, grenades=5)
+        for _ in range(ticks):
+            with recorder.measure("draw_game"):
+                game.draw_game()
+            recorder.tick()
+    return run
+
+for _count in (50, 200, 1000):
+    scenario(f"draw_game_{_count}", ticks=60, warmup=5)(_draw_game(_count))
+
+
+def _draw_world(culled):
+    def run(recorder, ticks):
+        # A big horde spread over most of the map with bullets, grenades in flight,
+        # pickups, damage numbers and explosions all over it, so only a small part of
+        # each world draw pass is on screen; the passes draw everything or cull
+        # through the game's viewport
+        game = make_game(display=True)
+        spawn_horde(game, 3000, min_distance=0, max_distance=1000)
+        rng = random.Random(BENCH_SEED)
+        player_x, player_y = game.player.rect.center
+        def anywhere():
+            return player_x + rng.uniform(-1000, 1000), player_y + rng.uniform(-1000, 1000)
+        for _ in range(200):
+            x, y = anywhere()
+            game.particle_system.add_explosion(x, y)
+            game.effects.add("death_burst", *anywhere())
+            pickup = {"x": x, "y": y, "radius": 10, "color": COLORS["green"], "type": "health", "pulse": 0.0}
+            game.pickups.append(pickup)
+            game.pickup_hash.insert(pickup, x, y, pickup["radius"])
+            game.damage_indicators.append([*anywhere(), "25", 60, 0, 0, COLORS["white"]])
+            game.bullets.append(Bullet(*anywhere(), rng.uniform(0, 2 * math.pi)))
+            x, y = anywhere()
+            game.bullets.append(Grenade(x, y, (x + 1, y), 100))
+        viewport = game.viewport if culled else None
+        camera_x = player_x - WIDTH // 2
+        camera_y = player_y - HEIGHT // 2
+        game.viewport.move(camera_x, camera_y)
+        for _ in range(ticks):
+            with recorder.measure("draw_bullets"):
+                game.draw_bullets(game.screen, camera_x, camera_y, 0.0, viewport)
+            with recorder.measure("draw_zombies"):
+                game.wave_manager.draw_zombies(game.screen, camera_x, camera_y, 1.0, viewport)
+            with recorder.measure("draw_particles"):
+                game.particle_system.draw(game.screen, camera_x, camera_y, viewport)
+                game.effects.draw(game.screen, camera_x, camera_y, viewport)
+            with recorder.measure("draw_pickups"):
+                game.draw_pickups(game.screen, camera_x, camera_y, viewport)
+            with recorder.measure("draw_damage_indicators"):
+                game.draw_damage_indicators(game.screen, camera_x, camera_y, viewport)
+            recorder.tick()
+        recorder.info.update({f"drawn_{name}": drawn for name, drawn in game.viewport.drawn.items()})
+        recorder.info.update({f"culled_{name}": culled for name, culled in game.viewport.culled.items()})
+    return run
+
+for _culled in (False, True):
+    scenario(f"draw_world_spread_{'culled' if _culled else 'all'}", ticks=60, warmup=5)(_draw_world(_culled))
+
+
+@scenario("draw_text", ticks=300, warmup=5)
+def draw_text(recorder, ticks):
+    # HUD, floating damage numbers and the main menu, the text-heavy draw passes
+    game = make_game(display=True)
+    rng = random.Random(BENCH_SEED)
+    camera_x = game.player.rect.centerx - WIDTH // 2
+    camera_y = game.player.rect.centery - HEIGHT // 2
+    for _ in range(ticks):
+        while len(game.damage_indicators) < 30:
+            game.damage_indicators.append([game.player.rect.centerx + rng.uniform(-300, 300),
+                                           game.player.rect.centery + rng.uniform(-200, 200),
+                                           str(rng.choice((10, 15, 20, 25, 50))), 60, 0, 0, COLORS["white"]])
+        game.update_damage_indicators()
+        with recorder.measure("draw_hud"):
+            game.menu.draw_hud(game.screen, game.player, game.wave_manager.current_wave)
+        with recorder.measure("draw_damage_indicators"):
+            game.draw_damage_indicators(game.screen, camera_x, camera_y)
+        with recorder.measure("draw_main_menu"):
+            game.menu.draw_main_menu(game.screen)
+        recorder.tick()
+    recorder.info.update(text_hits=game.menu.text.hits, text_misses=game.menu.text.misses)
+
+
+def _draw_zombies(zombie_count):
+    def run(recorder, ticks):
+        # A horde packed on screen, half of it damaged and a tenth flashing from a hit
+        game = make_game(display=True)
+        spawn_horde(game, zombie_count, min_distance=0, max_distance=320)
+        for i, zombie in enumerate(game.wave_manager.zombies):
+            if i % 2:
+                zombie.health = zombie.max_health // 2
+            if i % 10 == 0:
+                zombie.hit_flash = 3
+        camera_x = game.player.rect.centerx - WIDTH // 2
+        camera_y = game.player.rect.centery - HEIGHT // 2
+        for tick in range(ticks):
+            for zombie in game.wave_manager.zombies:
+                zombie.animation_frame = (zombie.animation_frame + 1) % 30
+                if game.wave_manager.store is None:
+                    zombie.size_pulse = 2 * math.sin(zombie.animation_frame / 5)  # Store views derive it
+            with recorder.measure("draw_zombies"):
+                game.wave_manager.draw_zombies(game.screen, camera_x, camera_y)
+            recorder.tick()
+        recorder.info.update(zombies=len(game.wave_manager.zombies),
+                             sprites=len(Zombie.sprite_cache.sprites))
+    return run
+
+for _count in (500, 3000):
+    scenario(f"draw_zombies_{_count}", ticks=60, warmup=5)(_draw_zombies(_count))
+
+
+def _present(screen_name, mode):
+    def run(recorder, ticks):
+        # A static screen presented the old way (the whole window every frame),
+        # with the rects the screen reports redrawing ("rects"), or with the
+        # presenter's pixel comparison ("dirty"); frames are paced at FPS so that
+        # the screen's animations move as they do in the game
+        game = make_game(display=True)
+        game.game_state = screen_name
+        pushed = 0
+        for _ in range(ticks):
+            game.clock.tick(FPS)
+            if screen_name == "menu":
+                redrawn = game.menu.draw_main_menu(game.screen)
+            else:
+                redrawn = game.menu.draw_game_over(game.screen, game.player.score)
+            with recorder.measure("present"):
+                if mode == "flip":
+                    pygame.display.flip()
+                else:
+                    game.presenter.present(game.screen, static=True, rects=redrawn if mode == "rects" else None)
+            pushed += WIDTH * HEIGHT if mode == "flip" else game.presenter.dirty_area
+            recorder.tick()
+        recorder.info["pushed_fraction"] = round(pushed / (ticks * WIDTH * HEIGHT), 3)
+    return run
+
+for _screen_name in ("menu", "game_over"):
+    for _mode in ("flip", "rects", "dirty"):
+        scenario(f"present_{_screen_name}_{_mode}", ticks=120, warmup=5)(_present(_screen_name, _mode))
+
+
+def _map_draw(tile_size):
+    def run(recorder, ticks):
+        # The camera pans in a circle; each tick draws the map through the per-tile
+        # path and through the chunk render cache
+        game = make_game(display=True)
+        game_map = GameMap(tile_size=tile_size, rng=random.Random(BENCH_SEED))
+        recorder.info.update(tile_size=tile_size, render_chunk_px=game_map.render_cache.chunk_size)
+        centre = game_map.size // 2
+        for tick in range(ticks):
+            angle = tick * 0.05
+            camera_x = centre + math.cos(angle) * 400 - WIDTH // 2
+            camera_y = centre + math.sin(angle) * 400 - HEIGHT // 2
+            with recorder.measure("draw_tiles"):
+                game_map.draw_tiles(game.screen, camera_x, camera_y)
+            with recorder.measure("draw_cached"):
+                game_map.render_cache.draw(game.screen, camera_x, camera_y)
+            recorder.tick()
+        recorder.info["chunk_bakes"] = game_map.render_cache.bakes
+    return run
+
+for _size in (64, 32, 16):
+    scenario(f"map_draw_{_size}", ticks=240, warmup=5)(_map_draw(_size))
+
+
+@scenario("simulation_bot", ticks=600, warmup=60)
+def simulation_bot(recorder, ticks):
+    from simulation import SimpleBot
+    game = make_game()
+    game.input_source = SimpleBot()
+    game.player.health = game.player.max_health = 10 ** 9
+    for _ in range(ticks):
+        with recorder.measure("update_game"):
+            game.update_game()
+        recorder.tick()
+
+
+def _map_generation(grid_size):
+    def run(recorder, ticks):
+        # One whole map per tick; the seed varies so no two ticks build the same terrain
+        recorder.info.update(tiles=grid_size * grid_size, size_px=grid_size * TILE_SIZE)
+        for tick in range(ticks):
+            with recorder.measure("generate_map"):
+                GameMap(size=grid_size * TILE_SIZE, rng=random.Random(BENCH_SEED + tick))
+            recorder.tick()
+    return run
+
+for _size, _ticks in ((32, 40), (256, 20), (1024, 5), (2048, 3)):
+    scenario(f"mapgen_{_size}", ticks=_ticks, warmup=1)(_map_generation(_size))
+
+
+@scenario("chunked_stream", ticks=600, warmup=10)
+def chunked_stream(recorder, ticks):
+    # The player sprints diagonally across an unbounded map, far past the chunk
+    # budget, with a horde drawn along; frame times should stay flat as chunks
+    # are generated ahead and evicted behind
+    game = make_game(display=True, world="chunked")
+    game_map = game.game_map
+    if game_map.size is not None:
+        recorder.info["skipped"] = "chunked world needs NumPy"
+        return
+    spawn_horde(game, 200, max_distance=500)
+    for _ in range(ticks):
+        game.player.rect.x += 24
+        game.player.rect.y += 16
+        with recorder.measure("stream"):
+            game_map.stream(*game.player.rect.center)
+        with recorder.measure("update_zombies"):
+            game.update_zombies()
+        with recorder.measure("draw_map"):
+            game_map.draw(game.screen, game.player.rect.centerx - WIDTH // 2, game.player.rect.centery - HEIGHT // 2)
+        recorder.tick()
+    recorder.info.update(chunks_loaded=len(game_map.chunks), chunk_budget=game_map.max_chunks)
+
+
+def _flow_field_walk(incremental):
+    def run(recorder, ticks):
+        # The player walks a loop across a large map, waiting wherever the ground
+        # is blocked; an incremental field patches around each new tile and
+        # rebuilds in slices, a full one rebuilds at once
+        game_map = GameMap(size=256 * TILE_SIZE, rng=random.Random(BENCH_SEED))
+        field = FlowField(incremental=incremental)
+        centre = game_map.size // 2
+        x = y = centre
+        for tick in range(ticks):
+            angle = tick * 0.01
+            next_x = centre + math.cos(angle) * 2000
+            next_y = centre + math.sin(angle) * 2000
+            if game_map.is_passable(next_x, next_y):
+                x, y = next_x, next_y
+            with recorder.measure("flow_update"):
+                field.update(game_map, x, y)
+            recorder.tick()
+        recorder.info.update(builds=field.builds, patches=field.patches)
+    return run
+
+
+for _incremental, _name in ((True, "flow_field_walk"), (False, "flow_field_walk_full")):
+    scenario(_name, ticks=600, warmup=10)(_flow_field_walk(_incremental))
+
+
+@scenario("hpa_queries", ticks=300, warmup=10)
+def hpa_queries(recorder, ticks):
+    # Twenty zombies a tick ask for a route from random tiles of a large map to
+    # one of a few destinations, so most queries reuse a cached entrance sequence
+    game_map = GameMap(size=256 * TILE_SIZE, rng=random.Random(BENCH_SEED))
+    pathfinder = HierarchicalPathfinder(game_map)
+    started = time.perf_counter()
+    pathfinder.precompute()
+    recorder.info["precompute_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    rng = random.Random(BENCH_SEED)
+
+    def random_position():
+        while True:
+            x = rng.uniform(0, game_map.size)
+            y = rng.uniform(0, game_map.size)
+            if game_map.is_passable(x, y):
+                return x, y
+
+    goals = [random_position() for _ in range(4)]
+    found = 0
+    for _ in range(ticks):
+        queries = [(random_position(), rng.choice(goals)) for _ in range(20)]
+        with recorder.measure("find_path"):
+            for (start_x, start_y), (goal_x, goal_y) in queries:
+                found += pathfinder.find_path(start_x, start_y, goal_x, goal_y) is not None
+        recorder.tick()
+    recorder.info.update(clusters=len(pathfinder.clusters), found=found,
+                         cache_hits=pathfinder.hits, cache_misses=pathfinder.misses)
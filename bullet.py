@@ -4,22 +4,39 @@ import math
 from config import *
 
 class Bullet:
+    TRAIL_LENGTH = 8  # Ticks of travel the trail reaches back
+
     def __init__(self, x, y, angle):
-        self.rect = pygame.Rect(x, y, 8, 8)
+        self.x, self.y = float(x), float(y)  # Centre, kept in floats so slow angles don't drift
+        self.radius = 4
+        self.rect = pygame.Rect(0, 0, self.radius * 2, self.radius * 2)
+        self.rect.center = (round(self.x), round(self.y))
         self.color = COLORS["white"]
         self.speed = BULLET_SPEED
         self.angle = angle  # Store the angle as an attribute
         self.vx = math.cos(self.angle) * self.speed
         self.vy = math.sin(self.angle) * self.speed
+        # Position at the start of the last tick; collisions sweep from here to (x, y)
+        self.prev_x, self.prev_y = self.x, self.y
+        self.travelled = 0
 
     def update(self):
-        self.rect.x += self.vx
-        self.rect.y += self.vy
+        self.prev_x, self.prev_y = self.x, self.y
+        self.x += self.vx
+        self.y += self.vy
+        self.travelled += self.speed
+        self.rect.center = (round(self.x), round(self.y))
 
-    def is_off_screen(self):
-        """Check if bullet is outside map boundaries"""
-        return not (0 <= self.rect.x <= MAP_SIZE and 0 <= self.rect.y <= MAP_SIZE)
+    def is_off_screen(self, map_size=None):
+        """Check if bullet is out of range or, on a fixed-size map, outside its boundaries"""
+        if self.travelled > BULLET_MAX_RANGE:
+            return True
+        return map_size is not None and not (0 <= self.x <= map_size and 0 <= self.y <= map_size)
         
+    def get_draw_radius(self):
+        """Distance from the centre that the bullet and its trail can cover"""
+        return self.radius + self.speed * self.TRAIL_LENGTH
+
     def draw(self, screen, camera_x, camera_y):
         """Draw bullet with trail effect"""
         # Draw bullet body
@@ -35,7 +52,7 @@ class Bullet:
         )
         
         # Add bullet trail
-        trail_length = 8
+        trail_length = self.TRAIL_LENGTH
         trail_x = int(self.rect.centerx - self.vx * trail_length - camera_x)
         trail_y = int(self.rect.centery - self.vy * trail_length - camera_y)
         
@@ -0,0 +1,47 @@
+# camera.py
+from config import *
+
+
+class Viewport:
+    """The part of the world the camera shows, used to cull world-space draw passes.
+
+    move() places it at the frame's camera position; visible() and mask() test
+    points (with a radius) against the screen rect grown by margin, which
+    covers sprites drawn around their centre, health bars and the per-entity
+    interpolation shift. rect() gives the same box in world space for queries
+    through a spatial index. Each pass reports with record(); drawn and culled
+    hold the last frame's counts by pass name, for the profiler and benchmarks.
+    """
+    def __init__(self, width=WIDTH, height=HEIGHT, margin=CULL_MARGIN):
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.left = self.top = 0.0
+        self.drawn = {}  # Pass name -> entities drawn in the last frame
+        self.culled = {}  # Pass name -> entities skipped in the last frame
+
+    def move(self, camera_x, camera_y):
+        self.left = camera_x
+        self.top = camera_y
+
+    def rect(self):
+        """(left, top, right, bottom) of the culling box in world space"""
+        margin = self.margin
+        return (self.left - margin, self.top - margin,
+                self.left + self.width + margin, self.top + self.height + margin)
+
+    def visible(self, x, y, radius=0):
+        """Whether something of the given radius centred on world (x, y) can show on screen"""
+        reach = self.margin + radius
+        return (self.left - reach <= x <= self.left + self.width + reach
+                and self.top - reach <= y <= self.top + self.height + reach)
+
+    def mask(self, xs, ys, radius=0):
+        """visible() over NumPy coordinate arrays, as a boolean array"""
+        reach = self.margin + radius
+        return ((xs >= self.left - reach) & (xs <= self.left + self.width + reach)
+                & (ys >= self.top - reach) & (ys <= self.top + self.height + reach))
+
+    def record(self, name, drawn, total):
+        self.drawn[name] = drawn
+        self.culled[name] = total - drawn
@@ -0,0 +1,246 @@
+# chunked_map.py
+import random
+from collections import OrderedDict
+
+from config import *
+from decals import DecalLayer
+from map import GameMap, clear_start, np
+from map_render import MapRenderCache
+
+# SplitMix64 constants for hashing tile coordinates into noise
+_MIX_X = 0x9E3779B97F4A7C15
+_MIX_Y = 0xC2B2AE3D27D4EB4F
+_MIX_SALT = 0x632BE59BD9B4E019
+_MASK64 = (1 << 64) - 1
+
+
+def hash_uniform(seed, salt, xs, ys):
+    """Uniform floats in [0, 1) that depend only on (seed, salt, x, y), for integer arrays xs, ys"""
+    with np.errstate(over='ignore'):
+        h = (xs.astype(np.uint64) * np.uint64(_MIX_X)) ^ (ys.astype(np.uint64) * np.uint64(_MIX_Y))
+        h ^= np.uint64((seed ^ (salt * _MIX_SALT)) & _MASK64)
+        h ^= h >> np.uint64(30)
+        h *= np.uint64(0xBF58476D1CE4E5B9)
+        h ^= h >> np.uint64(27)
+        h *= np.uint64(0x94D049BB133111EB)
+        h ^= h >> np.uint64(31)
+    return (h >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def chunk_terrain(seed, origin_x, origin_y, size, settings=MAPGEN_SETTINGS, tile_size=TILE_SIZE):
+    """Tile types of the size x size block whose top-left tile is (origin_x, origin_y).
+
+    The same value noise as generate_terrain, but lattice values are hashed from
+    world coordinates instead of drawn in sequence, so neighbouring chunks line
+    up and a chunk comes out identical whenever it is regenerated.
+    """
+    tiles_x = np.arange(origin_x, origin_x + size)
+    tiles_y = np.arange(origin_y, origin_y + size)
+    total = np.zeros((size, size))
+    amplitude = 1.0
+    period = float(settings["feature_tiles"])
+    for octave in range(settings["octaves"]):
+        u = tiles_x / period
+        v = tiles_y / period
+        index_x = np.floor(u).astype(np.int64)
+        index_y = np.floor(v).astype(np.int64)
+        weight_x = u - index_x
+        weight_y = v - index_y
+        weight_x = weight_x * weight_x * (3 - 2 * weight_x)
+        weight_y = weight_y * weight_y * (3 - 2 * weight_y)
+        # Lattice points covering the chunk, hashed from their world lattice coordinates
+        lattice_x = np.arange(index_x[0], index_x[-1] + 2)
+        lattice_y = np.arange(index_y[0], index_y[-1] + 2)
+        lattice = hash_uniform(seed, octave, lattice_x[None, :], lattice_y[:, None])
+        local_x = index_x - lattice_x[0]
+        local_y = index_y - lattice_y[0]
+        rows = lattice[:, local_x] * (1 - weight_x) + lattice[:, local_x + 1] * weight_x
+        total += amplitude * (rows[local_y] * (1 - weight_y)[:, None] + rows[local_y + 1] * weight_y[:, None])
+        amplitude *= settings["persistence"]
+        period /= 2
+    persistence = settings["persistence"]
+    height = total * ((1 - persistence) / (1 - persistence ** settings["octaves"]))
+
+    tiles = np.zeros((size, size), dtype=np.uint8)
+    tiles[height < settings["water_level"]] = 2  # Water
+    tiles[height > settings["road_level"]] = 3  # Road
+    scatter = hash_uniform(seed, 1000, tiles_x[None, :], tiles_y[:, None])
+    tiles[(tiles == 0) & (scatter < settings["wall_density"])] = 1  # Random walls
+
+    clear_start(tiles, tiles_x, tiles_y, tile_size)  # Keep the player's starting area open
+    return tiles
+
+
+class MapChunk:
+    """Tile types and collision bytes of one chunk, row-major"""
+    __slots__ = ("tiles", "solid", "solid_view")
+
+    def __init__(self, tiles, solid_lookup):
+        self.tiles = tiles
+        self.solid_view = solid_lookup[tiles].ravel()
+        self.solid = self.solid_view.tobytes()
+
+
+class ChunkedGameMap(GameMap):
+    """Unbounded map generated chunk by chunk from the seed as the player approaches.
+
+    Only the chunks within stream_radius of the player are pinned; past max_chunks
+    the least recently streamed ones are dropped and, being pure functions of the
+    seed and their coordinates, regenerated identically when revisited. Tile
+    edits are kept aside and reapplied on regeneration.
+    """
+    def __init__(self, tile_size=TILE_SIZE, chunk_tiles=CHUNK_TILES, max_chunks=CHUNK_CACHE_SIZE,
+                 stream_radius=CHUNK_STREAM_RADIUS, assets=None, rng=None):
+        self.size = None  # Unbounded
+        self.tile_size = tile_size
+        self.chunk_tiles = chunk_tiles
+        self.chunk_size = chunk_tiles * tile_size
+        self.max_chunks = max(max_chunks, (2 * stream_radius + 1) ** 2)
+        self.stream_radius = stream_radius
+        self.assets = assets
+        self.rng = rng if rng is not None else random
+        self.tile_changes = []  # (grid_x, grid_y) of every set_tile
+        self.seed = self.rng.getrandbits(64)
+        self.load_tile_definitions()
+        self.solid_types = bytes(not self.tile_defs[t]["passable"] for t in range(max(self.tile_defs) + 1))
+        self.solid_lookup = np.frombuffer(self.solid_types, dtype=np.uint8)
+        self.chunks = OrderedDict()  # (chunk_x, chunk_y) -> MapChunk, least recently streamed first
+        self.edits = {}  # (grid_x, grid_y) -> tile type set through set_tile
+        self.stream_center = None
+        self.last_key = self.last_chunk = None  # One-entry cache for runs of point queries
+        self.render_cache = MapRenderCache(self)
+        self.decals = DecalLayer()  # Blood and scorch marks, drawn over the tiles
+        self.stream(WIDTH // 2, HEIGHT // 2)
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    def chunk(self, chunk_x, chunk_y):
+        """A chunk, generated (evicting the least recently used past max_chunks) if it is not loaded"""
+        key = (chunk_x, chunk_y)
+        if key == self.last_key:
+            return self.last_chunk
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            n = self.chunk_tiles
+            tiles = chunk_terrain(self.seed, chunk_x * n, chunk_y * n, n, tile_size=self.tile_size)
+            for (grid_x, grid_y), tile_type in self.edits.items():
+                if grid_x // n == chunk_x and grid_y // n == chunk_y:
+                    tiles[grid_y - chunk_y * n, grid_x - chunk_x * n] = tile_type
+            chunk = self.chunks[key] = MapChunk(tiles, self.solid_lookup)
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        self.last_key = key
+        self.last_chunk = chunk
+        return chunk
+
+    def stream(self, x, y):
+        """Load the chunks around (x, y), mark them recently used and evict past the budget"""
+        center = (int(x // self.chunk_size), int(y // self.chunk_size))
+        if center == self.stream_center:
+            return
+        self.stream_center = center
+        radius = self.stream_radius
+        for chunk_y in range(center[1] - radius, center[1] + radius + 1):
+            for chunk_x in range(center[0] - radius, center[0] + radius + 1):
+                # Generating may evict the oldest chunk; the ones already pinned here were
+                # just moved to the end and max_chunks covers the whole window, so it is never one of them
+                self.chunk(chunk_x, chunk_y)
+                self.chunks.move_to_end((chunk_x, chunk_y))
+
+    def generate_map(self):
+        raise TypeError("ChunkedGameMap generates chunks on demand")
+
+    def set_tile(self, grid_x, grid_y, tile_type):
+        """Change one tile; the edit survives its chunk being evicted"""
+        self.edits[(grid_x, grid_y)] = tile_type
+        n = self.chunk_tiles
+        key = (grid_x // n, grid_y // n)
+        if key in self.chunks:
+            tiles = self.chunks[key].tiles
+            tiles[grid_y - key[1] * n, grid_x - key[0] * n] = tile_type
+            self.chunks[key] = MapChunk(tiles, self.solid_lookup)
+            self.last_key = self.last_chunk = None
+        self.render_cache.invalidate(grid_x, grid_y)
+        self.tile_changes.append((grid_x, grid_y))
+
+    def tile_type(self, grid_x, grid_y):
+        n = self.chunk_tiles
+        chunk_x, local_x = divmod(grid_x, n)
+        chunk_y, local_y = divmod(grid_y, n)
+        return int(self.chunk(chunk_x, chunk_y).tiles[local_y, local_x])
+
+    def tile_at(self, x, y):
+        """Tile type at world coordinates (never None: the map has no edge)"""
+        return self.tile_type(int(x // self.tile_size), int(y // self.tile_size))
+
+    def is_solid_tile(self, grid_x, grid_y):
+        n = self.chunk_tiles
+        chunk_x, local_x = divmod(grid_x, n)
+        chunk_y, local_y = divmod(grid_y, n)
+        return self.chunk(chunk_x, chunk_y).solid[local_y * n + local_x] == 1
+
+    def is_passable(self, x, y):
+        return not self.is_solid_tile(int(x // self.tile_size), int(y // self.tile_size))
+
+    def check_collision(self, x, y, radius=PLAYER_RADIUS):
+        size = self.tile_size
+        grid_x = int(x // size)
+        grid_y = int(y // size)
+        radius_sq = radius * radius
+        for j in range(grid_y - 1, grid_y + 2):
+            for i in range(grid_x - 1, grid_x + 2):
+                if self.is_solid_tile(i, j):
+                    dx = x - max(i * size, min(x, i * size + size))
+                    dy = y - max(j * size, min(y, j * size + size))
+                    if dx * dx + dy * dy < radius_sq:
+                        return True
+        return False
+
+    def solid_tiles(self, tile_x, tile_y):
+        """Collision bytes of arrays of tile coordinates, generating chunks as needed"""
+        n = self.chunk_tiles
+        tile_x = tile_x.astype(np.int64)
+        tile_y = tile_y.astype(np.int64)
+        chunk_x = tile_x // n
+        chunk_y = tile_y // n
+        local = (tile_y - chunk_y * n) * n + (tile_x - chunk_x * n)
+        keys = (chunk_x << 32) + chunk_y
+        if len(keys) == 0 or (keys == keys[0]).all():
+            if len(keys) == 0:
+                return np.zeros(0, dtype=np.uint8)
+            return self.chunk(int(chunk_x[0]), int(chunk_y[0])).solid_view[local]
+        # Stack the solid bytes of every chunk touched and index them all at once
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        stack = np.concatenate([self.chunk(int(chunk_x[i]), int(chunk_y[i])).solid_view for i in first])
+        return stack[inverse.ravel() * (n * n) + local]
+
+    def solid_window(self, left, top, width, height):
+        tile_x = np.tile(np.arange(left, left + width), height)
+        tile_y = np.repeat(np.arange(top, top + height), width)
+        return self.solid_tiles(tile_x, tile_y).tobytes()
+
+    def are_passable(self, xs, ys):
+        scale = 1.0 / self.tile_size
+        return self.solid_tiles(np.floor(xs * scale), np.floor(ys * scale)) == 0
+
+    def blocking_tiles(self, tile_x, tile_y):
+        return self.solid_tiles(tile_x, tile_y) == 1
+
+    def clamp_position(self, x, y, margin=0):
+        return x, y
+
+    def draw_tiles(self, screen, camera_x, camera_y):
+        size = self.tile_size
+        for y in range(int(camera_y // size), int((camera_y + HEIGHT) // size) + 1):
+            for x in range(int(camera_x // size), int((camera_x + WIDTH) // size) + 1):
+                screen.blit(self.get_tile_texture(self.tile_type(x, y)),
+                            (x * size - camera_x, y * size - camera_y))
+
+
+def create_game_map(world=WORLD_MODE, rng=None):
+    """The fixed-size GameMap, or the streamed ChunkedGameMap when world is "chunked" and NumPy is available"""
+    if world == "chunked" and ChunkedGameMap.available():
+        return ChunkedGameMap(rng=rng)
+    return GameMap(rng=rng)
@@ -14,9 +14,33 @@ PLAYER_HEALTH = 100
 ZOMBIE_SPEED = 2
 ZOMBIE_RADIUS = 12
 ZOMBIE_HEALTH = 100
+ZOMBIE_SEPARATION_DISTANCE = 36  # Centre distance below which zombies push each other apart
+ZOMBIE_SEPARATION_STRENGTH = 0.25  # Fraction of each overlap resolved per tick
+ZOMBIE_SEPARATION_MAX_PUSH = 3  # Pixels per tick a zombie can be pushed by its neighbours
+ZOMBIE_SEPARATION_INTERVAL = 3  # Ticks between neighbour queries; must divide 30 (animation cycle)
+ZOMBIE_SEPARATION_NEIGHBOURS = 3  # Neighbours taken per grid cell, bounding the cost in dense crowds
+# Flow field (flow_field.py): zombies follow a shared distance map around obstacles
+FLOW_FIELD_RADIUS = 32  # Tiles around the player the field covers
+FLOW_FIELD_BUILD_CELLS = 1000  # Cells per tick given to the background rebuild (about 1 ms)
+FLOW_FIELD_REPAIR_COST = 16  # Reach of the exact search spliced in when the player changes tile (2 per tile)
+# Hierarchical pathfinder (pathfinder.py): own routes for zombies with their own destination
+HPA_CLUSTER_TILES = 16  # Cluster edge in tiles
+HPA_WIDE_ENTRANCE = 6  # Border openings at least this wide get an entrance at each end
+HPA_PATH_CACHE_SIZE = 256  # Routes kept by (start cluster, goal cluster)
+HPA_CLUSTER_CACHE_SIZE = 4096  # Clusters kept on an unbounded map
+HPA_SEARCH_NODES = 20000  # Entrances expanded before a query gives up
+# Array zombie store (zombie_store.py, needs NumPy): crowd push from a density grid.
+# Smaller hordes stay Zombie objects, where NumPy's per-call cost outweighs the
+# vectorized step (the two cost the same at about 20 zombies, measured headless)
+USE_ZOMBIE_ARRAYS = True
+ZOMBIE_ARRAYS_MIN_HORDE = 24
+ZOMBIE_DENSITY_CELL_SIZE = 16
+ZOMBIE_DENSITY_PUSH = 2.0  # Pixels per tick per unit of density gradient
+ZOMBIE_DENSITY_MAX_CELLS = 1 << 20  # Skip the push when the horde is spread wider than this
 
 # Bullet settings
 BULLET_SPEED = 15
+BULLET_MAX_RANGE = 3000  # Pixels travelled before a shot is dropped; past the fixed map's diagonal
 
 # Weapon settings
 RELOAD_TIME = 2000  # 2 seconds
@@ -69,6 +93,28 @@ MAP_HEIGHT = 100
 VIEW_RADIUS_TILES = 8
 MAP_SIZE = 2048
 
+# Procedural map generation (map.generate_terrain): noise levels pick water and road
+MAPGEN_SETTINGS = {
+    "octaves": 4,
+    "feature_tiles": 12,  # Size of the coarsest terrain features, in tiles
+    "persistence": 0.5,  # Amplitude kept by each finer octave
+    "water_level": 0.36,
+    "road_level": 0.6,
+    "wall_density": 0.08,
+    "edge_padding": 3,
+}
+START_CLEARING = 3  # Tiles around the player start kept free of walls and water
+
+# World mode: "fixed" is one MAP_SIZE map generated up front, "chunked" streams an
+# unbounded map in chunks around the player (chunked_map.py, needs NumPy)
+WORLD_MODE = "fixed"
+CHUNK_TILES = 16  # Chunk edge in tiles
+CHUNK_CACHE_SIZE = 256  # Chunks kept loaded before the least recently used are evicted
+CHUNK_STREAM_RADIUS = 2  # Chunks around the player's that stay loaded
+
+# Broadphase grid for collision queries; a few zombie diameters per cell
+SPATIAL_HASH_CELL_SIZE = 32
+
 # Spawn settings
 SPAWN_DISTANCE = 600
 SPAWN_INTERVAL = 3000  # 3 seconds
@@ -123,3 +169,37 @@ PARTICLE_SETTINGS = {
     "max_size": 5,
     "min_size": 2,
 }
+USE_PARTICLE_ARRAYS = True  # NumPy particle engine (particle_collision.ParticleArraySystem)
+MAX_PARTICLES = 10000  # Pool size of the NumPy engine; the object fallback keeps 500
+
+# Map tiles pre-rendered into chunk surfaces (map_render.py); ~1 MB per 512px chunk
+RENDER_CHUNK_TILES = 8
+RENDER_CHUNK_CACHE_SIZE = 24
+# Rendered strings kept by the text cache (text_cache.py) before the least recently used are dropped
+TEXT_CACHE_SIZE = 256
+# Static screens that report no redrawn rects are compared with the last frame in blocks of this many pixels (presenter.py)
+PRESENT_BLOCK_SIZE = 32
+# World draw passes skip anything further than this many pixels outside the screen (camera.py)
+CULL_MARGIN = 64
+
+# Decals: blood and scorch marks baked into world-space chunks (decals.py)
+DECAL_CHUNK_SIZE = 256
+DECAL_MAX_CHUNKS = 48  # About 12 MB of RGBA; past this the least recently stamped chunk fades out
+DECAL_FADE_FRAMES = 120
+DECAL_STAMPS_PER_TICK = 24  # Bounds the cost of a tick where hundreds of bullets connect
+DECAL_DROPLETS = 3  # Blood particles still thrown where a blood decal keeps the mark
+DECAL_DROPLET_LIFETIME = 8  # Ticks those droplets last
+
+# Profiler Settings
+PROFILER_SETTINGS = {
+    "history": 240,  # Frames kept in the ring buffer
+    "graph_width": 240,
+    "graph_height": 80,
+    "position": (10, 150),
+}
+
+# Frame timing: the simulation always steps at FPS ticks per second, rendering runs
+# as fast as MAX_FPS allows (0 = uncapped) and interpolates between ticks
+MAX_FPS = 144
+MAX_SIM_STEPS_PER_FRAME = 5  # Beyond this the game slows down instead of spiralling
+MAX_FRAME_TIME = 0.25  # Seconds; longer stalls (window drag, breakpoints) are dropped
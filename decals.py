@@ -0,0 +1,122 @@
+# decals.py
+import math
+import random
+from collections import OrderedDict
+
+import pygame
+from config import *
+
+
+class DecalLayer:
+    """Blood and scorch marks baked into world-space chunk surfaces beneath the entities.
+
+    A decal is stamped once into every chunk it overlaps, so drawing costs one
+    blit per visible chunk however much gore has piled up. At most max_chunks
+    chunks are kept: past that the least recently stamped one fades out and is
+    freed.
+    """
+    def __init__(self, chunk_size=DECAL_CHUNK_SIZE, max_chunks=DECAL_MAX_CHUNKS, fade_frames=DECAL_FADE_FRAMES,
+                 stamps_per_tick=DECAL_STAMPS_PER_TICK):
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.fade_frames = fade_frames
+        self.stamps_per_tick = stamps_per_tick
+        self.stamps_left = stamps_per_tick  # Refilled by update; extra decals in a busy tick are dropped
+        self.chunks = OrderedDict()  # (chunk_x, chunk_y) -> Surface, least recently stamped first
+        self.fading = {}  # (chunk_x, chunk_y) -> frames left before the chunk is freed
+        self.blood_stamps = None  # Rendered on first use (needs pygame initialised)
+        self.scorch_stamps = {}  # radius -> scorch Surface
+        # Stamp choice is cosmetic and kept off the game's seeded streams
+        self.rng = random.Random(0)
+
+    def clear(self):
+        self.chunks.clear()
+        self.fading.clear()
+
+    def load_blood_stamps(self, variants=4, size=40):
+        """A few irregular splatters made of overlapping dark red blobs"""
+        rng = random.Random(1)
+        self.blood_stamps = []
+        for _ in range(variants):
+            stamp = pygame.Surface((size, size), pygame.SRCALPHA)
+            for _ in range(rng.randint(5, 9)):
+                radius = rng.randint(2, 7)
+                offset = rng.uniform(0, size / 2 - radius - 1)
+                angle = rng.uniform(0, 2 * math.pi)
+                center = (int(size / 2 + math.cos(angle) * offset), int(size / 2 + math.sin(angle) * offset))
+                pygame.draw.circle(stamp, (*COLORS['dark_red'], rng.randint(120, 190)), center, radius)
+            self.blood_stamps.append(stamp)
+
+    def scorch_stamp(self, radius):
+        """Soft dark disc of the given radius, darkest at the centre"""
+        radius = max(4, int(radius))
+        stamp = self.scorch_stamps.get(radius)
+        if stamp is None:
+            stamp = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            for ring in range(8):
+                ring_radius = radius * (8 - ring) // 8
+                pygame.draw.circle(stamp, (20, 15, 10, 25), (radius, radius), ring_radius)
+            self.scorch_stamps[radius] = stamp
+        return stamp
+
+    def chunk(self, key):
+        """Surface of a chunk, created (and the oldest chunk evicted) as needed"""
+        surface = self.chunks.get(key)
+        if surface is None:
+            surface = self.chunks[key] = pygame.Surface((self.chunk_size, self.chunk_size), pygame.SRCALPHA)
+            if len(self.chunks) - len(self.fading) > self.max_chunks:
+                for oldest in self.chunks:
+                    if oldest not in self.fading:
+                        self.fading[oldest] = self.fade_frames
+                        break
+        else:
+            self.chunks.move_to_end(key)
+            if self.fading.pop(key, None) is not None:
+                surface.set_alpha(None)  # Stamped again: keep it after all
+        return surface
+
+    def stamp(self, sprite, x, y):
+        """Bake a sprite centred on world position (x, y) into the chunks it overlaps"""
+        if self.stamps_left <= 0:
+            return
+        self.stamps_left -= 1
+        width, height = sprite.get_size()
+        left = int(x) - width // 2
+        top = int(y) - height // 2
+        size = self.chunk_size
+        for chunk_y in range(top // size, (top + height - 1) // size + 1):
+            for chunk_x in range(left // size, (left + width - 1) // size + 1):
+                self.chunk((chunk_x, chunk_y)).blit(sprite, (left - chunk_x * size, top - chunk_y * size))
+
+    def add_blood(self, x, y):
+        """Blood splatter where a zombie was hit or died"""
+        if self.blood_stamps is None:
+            self.load_blood_stamps()
+        self.stamp(self.blood_stamps[self.rng.randrange(len(self.blood_stamps))], x, y)
+
+    def add_scorch(self, x, y, radius):
+        """Scorch mark left by an explosion"""
+        self.stamp(self.scorch_stamp(radius), x, y)
+
+    def update(self):
+        """Refill the stamp budget and advance the fade-out of evicted chunks"""
+        self.stamps_left = self.stamps_per_tick
+        for key in list(self.fading):
+            frames = self.fading[key] - 1
+            if frames <= 0:
+                del self.fading[key]
+                del self.chunks[key]
+            else:
+                self.fading[key] = frames
+                self.chunks[key].set_alpha(255 * frames // self.fade_frames)
+
+    def draw(self, screen, camera_x, camera_y):
+        """One blit per visible chunk that has decals"""
+        if not self.chunks:
+            return
+        size = self.chunk_size
+        for chunk_y in range(int(camera_y // size), int((camera_y + HEIGHT) // size) + 1):
+            for chunk_x in range(int(camera_x // size), int((camera_x + WIDTH) // size) + 1):
+                surface = self.chunks.get((chunk_x, chunk_y))
+                if surface is not None:
+                    screen.blit(surface, (chunk_x * size - camera_x, chunk_y * size - camera_y))
@@ -0,0 +1,101 @@
+# flipbook.py
+import math
+import pygame
+from config import *
+
+
+def burst_frames(radius, count, core_color, edge_color):
+    """Fireball that swells, then thins into a fading ring"""
+    frames = []
+    for i in range(count):
+        t = (i + 1) / count
+        fade = int(255 * (1 - t) ** 0.7)
+        outer = max(2, int(radius * (0.3 + 0.7 * math.sqrt(t))))
+        inner = int(outer * 0.7 * (1 - t))
+        frame = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(frame, (*edge_color, fade), (radius, radius), outer)
+        if inner > 0:
+            pygame.draw.circle(frame, (*core_color, min(255, fade + 40)), (radius, radius), inner)
+        frames.append(frame)
+    return frames
+
+
+def flash_frames(radius, count, core_color, edge_color):
+    """Eight-pointed star that shrinks over a few frames"""
+    frames = []
+    for i in range(count):
+        size = radius * (count - i) / count
+        frame = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        points = []
+        for j in range(8):
+            point_radius = size if j % 2 == 0 else size * 0.4
+            angle = j * math.pi / 4 + i * 0.3
+            points.append((radius + point_radius * math.cos(angle), radius + point_radius * math.sin(angle)))
+        pygame.draw.polygon(frame, (*edge_color, 220), points)
+        pygame.draw.circle(frame, (*core_color, 255), (radius, radius), max(1, int(size * 0.3)))
+        frames.append(frame)
+    return frames
+
+
+# name -> how its frames are built and how long each one is shown (in ticks)
+FLIPBOOKS = {
+    "muzzle_flash": {"build": flash_frames, "radius": 10, "frames": 3, "frame_ticks": 1,
+                     "colors": (COLORS['white'], COLORS['yellow'])},
+    "death_burst": {"build": burst_frames, "radius": 20, "frames": 8, "frame_ticks": 2,
+                    "colors": (COLORS['orange'], COLORS['red'])},
+    "grenade_explosion": {"build": burst_frames, "radius": 50, "frames": 12, "frame_ticks": 2,
+                          "colors": (COLORS['yellow'], COLORS['orange'])},
+}
+
+_frames = None
+
+
+def flipbook_frames():
+    """Frames of every flipbook, rendered on first draw (needs pygame initialised)"""
+    global _frames
+    if _frames is None:
+        _frames = {}
+        for name, book in FLIPBOOKS.items():
+            _frames[name] = book["build"](book["radius"], book["frames"], *book["colors"])
+    return _frames
+
+
+class FlipbookEffects:
+    """Running flipbook effects, each one sprite stepping through pre-baked frames.
+
+    Instances only hold the flipbook name, position and age, so the list is cheap
+    to update and pickles into replay snapshots.
+    """
+    def __init__(self):
+        self.instances = []  # [name, x, y, age in ticks]
+
+    def __len__(self):
+        return len(self.instances)
+
+    def add(self, name, x, y):
+        self.instances.append([name, x, y, 0])
+
+    def update(self):
+        for instance in self.instances:
+            instance[3] += 1
+        self.instances = [instance for instance in self.instances
+                          if instance[3] < FLIPBOOKS[instance[0]]["frames"] * FLIPBOOKS[instance[0]]["frame_ticks"]]
+
+    def draw(self, screen, camera_x=0, camera_y=0, viewport=None):
+        """Blit the current frame of each effect; with a viewport, only those it can see"""
+        if viewport is not None:
+            viewport.record("effects", 0, len(self.instances))
+        if not self.instances:
+            return
+        frames = flipbook_frames()
+        blits = []
+        for name, x, y, age in self.instances:
+            book = FLIPBOOKS[name]
+            radius = book["radius"]
+            if viewport is not None and not viewport.visible(x, y, radius):
+                continue
+            blits.append((frames[name][age // book["frame_ticks"]],
+                          (int(x - radius - camera_x), int(y - radius - camera_y))))
+        screen.blits(blits, False)
+        if viewport is not None:
+            viewport.record("effects", len(blits), len(self.instances))
@@ -0,0 +1,442 @@
+# flow_field.py
+import math
+
+from config import *
+
+try:
+    import numpy as np
+except ImportError:  # Only sample_many (for the zombie store) needs NumPy
+    np = None
+
+UNREACHED = 1 << 30
+
+# Step costs: 2 along an axis, 3 diagonally (close to 1 : sqrt(2))
+STRAIGHT_COST = 2
+DIAGONAL_COST = 3
+
+# Neighbour steps as (dx, dy), straight ones first so they win ties
+NEIGHBOURS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1))
+# Unit direction of each step, plus a zero vector for "no step"
+_DIRECTIONS = tuple((x / math.hypot(x, y), y / math.hypot(x, y)) for x, y in NEIGHBOURS) + ((0.0, 0.0),)
+_DIRECTION_X = np.array([x for x, _ in _DIRECTIONS]) if np is not None else None
+_DIRECTION_Y = np.array([y for _, y in _DIRECTIONS]) if np is not None else None
+# bytes.translate table turning solid flags (0/1) into open flags
+_OPEN_FROM_SOLID = bytes([1, 0]) + bytes(254)
+
+
+class _Unreached(dict):
+    """Sparse distances for a bounded search; cells never reached read as UNREACHED"""
+    def __missing__(self, cell):
+        return UNREACHED
+
+
+class FieldSearch:
+    """Dijkstra over a padded window of tiles that can stop after a budget of cells and resume.
+
+    distance holds the current value of every cell (a list, or an _Unreached
+    dict for small searches); the search only ever lowers it, starting from the
+    seed cells and going no further than limit. Diagonal steps need both sides
+    open, so paths never cut across wall corners.
+    """
+    def __init__(self, open_cells, stride, distance, seeds, limit=UNREACHED, touched=None):
+        self.open_cells = open_cells
+        self.stride = stride
+        self.distance = distance
+        self.limit = limit
+        self.touched = touched  # If a list, every lowered cell is appended to it
+        self.buckets = {}  # distance -> cells queued at it
+        for cell in seeds:
+            self.buckets.setdefault(distance[cell], []).append(cell)
+        self.current = min(self.buckets) if self.buckets else 0
+        self.pending = len(seeds)
+
+    def run(self, budget=None):
+        """Settle up to budget cells (all of them if None); True once the search is finished"""
+        distance = self.distance
+        open_cells = self.open_cells
+        buckets = self.buckets
+        stride = self.stride
+        limit = self.limit
+        touched = self.touched
+        straight = (-1, 1, -stride, stride)
+        diagonal = ((-stride - 1, -stride, -1), (-stride + 1, -stride, 1),
+                    (stride - 1, stride, -1), (stride + 1, stride, 1))
+        current = self.current
+        pending = self.pending
+        settled = 0
+        while pending:
+            bucket = buckets.pop(current, None)
+            if bucket is None:
+                current = min(buckets)
+                continue
+            # Every cell settled at current queues its neighbours at one of two distances
+            straight_step = current + STRAIGHT_COST
+            diagonal_step = current + DIAGONAL_COST
+            straight_bucket = buckets.setdefault(straight_step, []) if straight_step <= limit else None
+            diagonal_bucket = buckets.setdefault(diagonal_step, []) if diagonal_step <= limit else None
+            for i, cell in enumerate(bucket):
+                if budget is not None and settled >= budget:
+                    buckets[current] = bucket[i:]  # Nothing else queues at current meanwhile
+                    self.current, self.pending = current, pending
+                    return False
+                pending -= 1
+                if distance[cell] != current:
+                    continue  # Reached more cheaply since it was queued
+                settled += 1
+                if straight_bucket is not None:
+                    for offset in straight:
+                        neighbour = cell + offset
+                        if open_cells[neighbour] and straight_step < distance[neighbour]:
+                            distance[neighbour] = straight_step
+                            straight_bucket.append(neighbour)
+                            pending += 1
+                            if touched is not None:
+                                touched.append(neighbour)
+                if diagonal_bucket is not None:
+                    for offset, side_a, side_b in diagonal:
+                        neighbour = cell + offset
+                        if (open_cells[neighbour] and diagonal_step < distance[neighbour]
+                                and open_cells[cell + side_a] and open_cells[cell + side_b]):
+                            distance[neighbour] = diagonal_step
+                            diagonal_bucket.append(neighbour)
+                            pending += 1
+                            if touched is not None:
+                                touched.append(neighbour)
+            current += 1
+        self.current, self.pending = current, 0
+        buckets.clear()
+        return True
+
+
+class FlowField:
+    """Distance-to-the-player map shared by the whole horde.
+
+    The field covers the tiles within radius tiles of the player (the whole map
+    when it is smaller), and each zombie heads for the neighbouring tile with
+    the lowest value, so routing around water and walls costs every zombie a
+    few lookups.
+
+    Upkeep is incremental. When the player steps into a new tile, an exact
+    search out to repair_cost around it is spliced into the old field, then a
+    full rebuild for that tile runs in the background, build_cells cells per
+    tick, and replaces the field when done (patched again if the player has
+    moved on meanwhile). A tile changed through set_tile is repaired in place:
+    only the cells whose route ran through it are searched again.
+
+    Budgets count cells rather than milliseconds so that runs and replays stay
+    deterministic.
+    """
+    def __init__(self, radius=FLOW_FIELD_RADIUS, build_cells=FLOW_FIELD_BUILD_CELLS,
+                 repair_cost=FLOW_FIELD_REPAIR_COST, incremental=True):
+        self.radius = radius
+        self.build_cells = build_cells
+        self.repair_cost = repair_cost
+        self.incremental = incremental  # False rebuilds the whole field on every tile change
+        self.target_tile = None  # Player tile the field leads to
+        self.target_cell = None
+        self.map_version = 0  # Entries of game_map.tile_changes already applied
+        self.left = self.top = 0  # Grid coordinates of the window's top-left tile
+        self.width = self.height = 0
+        self.stride = 2  # Row length of the padded window
+        self.open_cells = bytearray()  # Per padded-window cell, 1 where zombies can walk
+        self.distance = []  # Per padded-window cell, UNREACHED for walls and cut-off ground
+        self.build = None  # FieldSearch of the background rebuild, if one is running
+        self.build_window = None  # (target tile, left, top, width, height) of that rebuild
+        self.builds = self.patches = self.repairs = 0  # Counters for benchmarks and the profiler
+        self.mirror()
+
+    def __getstate__(self):
+        # The NumPy copies are rebuilt from the lists on load
+        state = self.__dict__.copy()
+        del state["distance_array"], state["open_array"], state["choice_array"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.mirror()
+
+    def update(self, game_map, target_x, target_y):
+        """Bring the field up to date with the map and the player's tile, within this tick's budget"""
+        tile_size = game_map.tile_size
+        target_tile = (int(target_x // tile_size), int(target_y // tile_size))
+        if self.target_tile is None:
+            self.rebuild(game_map, target_tile)
+            return
+        changes = game_map.tile_changes[self.map_version:]
+        if changes:
+            self.map_version = len(game_map.tile_changes)
+            for grid_x, grid_y in changes:
+                self.repair_tile(game_map, grid_x, grid_y)
+            if self.build is not None:
+                self.start_build(game_map, self.build_window[0])  # It read the tiles before the change
+        if target_tile != self.target_tile:
+            if not self.incremental or not self.patch(target_tile):
+                self.rebuild(game_map, target_tile)
+                return
+            if self.build is None:
+                self.start_build(game_map, target_tile)
+        if self.build is not None and self.build.run(self.build_cells):
+            # A running build is not restarted when the player moves on, or it
+            # would never finish at a run; the current tile is patched in after
+            target_tile = self.target_tile
+            self.finish_build()
+            if target_tile != self.target_tile:
+                if not self.patch(target_tile):
+                    self.rebuild(game_map, target_tile)
+                    return
+                self.start_build(game_map, target_tile)
+
+    def place_window(self, game_map, target_tile):
+        """(left, top, width, height) of the square of tiles around a target, kept inside a fixed-size map"""
+        tile_x, tile_y = target_tile
+        side = 2 * self.radius + 1
+        if game_map.size is None:
+            return tile_x - self.radius, tile_y - self.radius, side, side
+        side = min(side, game_map.grid_size)
+        return (max(0, min(game_map.grid_size - side, tile_x - self.radius)),
+                max(0, min(game_map.grid_size - side, tile_y - self.radius)), side, side)
+
+    def start_build(self, game_map, target_tile):
+        """Begin a background rebuild towards target_tile, dropping any older one"""
+        left, top, width, height = self.place_window(game_map, target_tile)
+        stride = width + 2
+        # One-cell solid border so neighbour lookups never leave the window
+        open_cells = bytearray(stride * (height + 2))
+        window = game_map.solid_window(left, top, width, height).translate(_OPEN_FROM_SOLID)
+        for row in range(height):
+            start = (row + 1) * stride + 1
+            open_cells[start:start + width] = window[row * width:(row + 1) * width]
+        distance = [UNREACHED] * len(open_cells)
+        seeds = []
+        tile_x, tile_y = target_tile
+        if left <= tile_x < left + width and top <= tile_y < top + height:
+            target = (tile_y - top + 1) * stride + tile_x - left + 1
+            distance[target] = 0
+            seeds.append(target)
+        self.build = FieldSearch(open_cells, stride, distance, seeds)
+        self.build_window = (target_tile, left, top, width, height)
+
+    def finish_build(self):
+        """Swap the finished background rebuild in as the field"""
+        build = self.build
+        self.target_tile, self.left, self.top, self.width, self.height = self.build_window
+        self.stride = build.stride
+        self.open_cells = build.open_cells
+        self.distance = build.distance
+        self.target_cell = self.cell_of(*self.target_tile)
+        self.build = self.build_window = None
+        self.builds += 1
+        self.mirror()
+
+    def rebuild(self, game_map, target_tile):
+        """Build the whole field for target_tile right away"""
+        self.start_build(game_map, target_tile)
+        self.build.run()
+        self.finish_build()
+        self.map_version = len(game_map.tile_changes)
+
+    def cell_of(self, grid_x, grid_y):
+        """Padded-window cell of a tile, or None outside the window"""
+        column = grid_x - self.left
+        row = grid_y - self.top
+        if 0 <= column < self.width and 0 <= row < self.height:
+            return (row + 1) * self.stride + column + 1
+        return None
+
+    def patch(self, target_tile):
+        """Point the field at a nearby target tile by splicing in a bounded exact search.
+
+        Distances from the new target out to repair_cost replace the old values,
+        shifted down so that none of them rises. Every other cell keeps a lower
+        neighbour along its old route, which now leads into the patched area, so
+        no zombie is left in a dead end. False when the old target is beyond the
+        search (a jump rather than a step) and the field must be rebuilt.
+        """
+        cell = self.cell_of(*target_tile)
+        if cell is None or not self.open_cells[cell] or self.target_cell is None:
+            return False
+        local = _Unreached({cell: 0})
+        FieldSearch(self.open_cells, self.stride, local, [cell], limit=self.repair_cost).run()
+        if self.target_cell not in local:
+            return False
+        distance = self.distance
+        shift = max(value - distance[c] for c, value in local.items())
+        for c, value in local.items():
+            distance[c] = value - shift
+        self.target_tile = target_tile
+        self.target_cell = cell
+        self.patches += 1
+        self.refresh(list(local))
+        return True
+
+    def repair_tile(self, game_map, grid_x, grid_y):
+        """Update the field after one tile's passability may have changed"""
+        cell = self.cell_of(grid_x, grid_y)
+        if cell is None:
+            return
+        is_open = 0 if game_map.is_solid_tile(grid_x, grid_y) else 1
+        if self.open_cells[cell] == is_open:
+            return
+        self.open_cells[cell] = is_open
+        distance = self.distance
+        stride = self.stride
+        touched = [cell]
+        if is_open:
+            # Search on from the opened tile and its neighbours, whose diagonals may now be free
+            distance[cell] = self.best_from_neighbours(cell, ())
+            seeds = [c for c in [cell] + [cell + x + y * stride for x, y in NEIGHBOURS] if distance[c] < UNREACHED]
+        else:
+            # Collect the cells whose value no longer follows from a neighbour outside
+            # the collected set, then search back into them from their edge
+            distance[cell] = UNREACHED
+            raised = {cell}
+            queue = [cell + x + y * stride for x, y in NEIGHBOURS]
+            while queue:
+                current = queue.pop()
+                if (current in raised or current == self.target_cell or distance[current] >= UNREACHED
+                        or self.is_supported(current, raised)):
+                    continue
+                raised.add(current)
+                queue.extend(current + x + y * stride for x, y in NEIGHBOURS)
+            for current in raised:
+                distance[current] = UNREACHED
+            seeds = []
+            for current in raised:
+                distance[current] = self.best_from_neighbours(current, raised)
+                if distance[current] < UNREACHED:
+                    seeds.append(current)
+            touched.extend(raised)
+        FieldSearch(self.open_cells, stride, distance, seeds, touched=touched).run()
+        self.repairs += 1
+        self.refresh(touched)
+
+    def legal_steps(self, cell):
+        """(neighbour, cost) of every step out of an open cell"""
+        open_cells = self.open_cells
+        stride = self.stride
+        for step_x, step_y in NEIGHBOURS:
+            neighbour = cell + step_y * stride + step_x
+            if not open_cells[neighbour]:
+                continue
+            if not (step_x and step_y):
+                yield neighbour, STRAIGHT_COST
+            elif open_cells[cell + step_x] and open_cells[cell + step_y * stride]:
+                yield neighbour, DIAGONAL_COST
+
+    def is_supported(self, cell, excluded):
+        """Whether a step from some neighbour outside excluded accounts for the cell's value.
+
+        Every reached cell but the target is supported, which is what keeps the
+        field free of dead ends even after patches shift parts of it.
+        """
+        here = self.distance[cell]
+        return any(self.distance[n] + cost <= here for n, cost in self.legal_steps(cell) if n not in excluded)
+
+    def best_from_neighbours(self, cell, excluded):
+        """Lowest value one step away from a reached neighbour outside excluded"""
+        if not self.open_cells[cell]:
+            return UNREACHED
+        return min((self.distance[n] + cost for n, cost in self.legal_steps(cell)
+                    if n not in excluded and self.distance[n] < UNREACHED), default=UNREACHED)
+
+    def mirror(self):
+        """Rebuild the NumPy copies that sample_many reads"""
+        if np is None:
+            self.distance_array = self.open_array = self.choice_array = None
+            return
+        self.distance_array = np.array(self.distance, dtype=np.int64)
+        self.open_array = np.frombuffer(self.open_cells, dtype=np.uint8)  # Shares memory with open_cells
+        self.choice_array = np.full(len(self.distance), -1, dtype=np.int8)
+        if self.width:
+            rows = np.arange(1, self.height + 1)[:, None] * self.stride
+            cells = (rows + np.arange(1, self.width + 1)).ravel()
+            self.choice_array[cells] = self.steepest(cells)
+
+    def refresh(self, cells):
+        """Update the NumPy copies after the values of some cells changed"""
+        if np is None:
+            return
+        cells = np.unique(np.asarray(cells, dtype=np.intp))
+        self.distance_array[cells] = [self.distance[c] for c in cells.tolist()]
+        # A cell's choice depends on its neighbours' values, so redo those too
+        offsets = np.array([0] + [x + y * self.stride for x, y in NEIGHBOURS])
+        around = np.unique((cells[:, None] + offsets).ravel())
+        row, column = np.divmod(around, self.stride)
+        around = around[(row >= 1) & (row <= self.height) & (column >= 1) & (column <= self.width)]
+        self.choice_array[around] = self.steepest(around)
+
+    def steepest(self, cells):
+        """For an array of window cells, the index into NEIGHBOURS that sample would pick, or -1"""
+        stride = self.stride
+        distance = self.distance_array
+        open_cells = self.open_array
+        here = distance[cells]
+        best = here.copy()
+        choice = np.full(len(cells), -1, dtype=np.int8)
+        for i, (step_x, step_y) in enumerate(NEIGHBOURS):
+            neighbour = distance[cells + step_y * stride + step_x]
+            better = neighbour < best
+            if step_x and step_y:
+                better &= (open_cells[cells + step_x] & open_cells[cells + step_y * stride]).astype(bool)
+            best[better] = neighbour[better]
+            choice[better] = i
+        choice[here >= UNREACHED] = -1
+        if self.target_cell is not None:
+            # Next to the player zombies steer straight at them
+            row, column = np.divmod(cells, stride)
+            target_row, target_column = divmod(self.target_cell, stride)
+            choice[(np.abs(row - target_row) <= 1) & (np.abs(column - target_column) <= 1)] = -1
+        return choice
+
+    def reachable(self, x, y, tile_size=TILE_SIZE):
+        """False only for positions inside the field that have no route to the player"""
+        cell = self.cell_of(int(x // tile_size), int(y // tile_size))
+        return cell is None or self.distance[cell] < UNREACHED
+
+    def sample(self, x, y, tile_size=TILE_SIZE):
+        """Unit direction down the field at world position (x, y).
+
+        None when the field has no useful advice there: outside the window, on
+        ground the player cannot be reached from, or already next to the player,
+        where steering straight at them is best.
+        """
+        grid_x = int(x // tile_size)
+        grid_y = int(y // tile_size)
+        cell = self.cell_of(grid_x, grid_y)
+        if cell is None:
+            return None
+        distance = self.distance
+        here = distance[cell]
+        if here >= UNREACHED:
+            return None
+        if abs(grid_x - self.target_tile[0]) <= 1 and abs(grid_y - self.target_tile[1]) <= 1:
+            return None
+        # Steepest descent over the eight neighbours; diagonals need both sides open
+        open_cells = self.open_cells
+        stride = self.stride
+        best = here
+        choice = None
+        for i, (step_x, step_y) in enumerate(NEIGHBOURS):
+            if step_x and step_y and not (open_cells[cell + step_x] and open_cells[cell + step_y * stride]):
+                continue
+            neighbour = distance[cell + step_y * stride + step_x]
+            if neighbour < best:
+                best = neighbour
+                choice = i
+        return None if choice is None else _DIRECTIONS[choice]
+
+    def sample_many(self, xs, ys, tile_size=TILE_SIZE):
+        """Vectorized sample: direction arrays and a mask of the positions that have one"""
+        scale = 1.0 / tile_size
+        grid_x = np.floor(xs * scale)
+        grid_y = np.floor(ys * scale)
+        # Positions outside the window land on its border, which has no choice (-1)
+        np.clip(grid_x, self.left - 1, self.left + self.width, out=grid_x)
+        np.clip(grid_y, self.top - 1, self.top + self.height, out=grid_y)
+        grid_y -= self.top - 1
+        grid_y *= self.stride
+        grid_y += grid_x
+        grid_y -= self.left - 1
+        choice = self.choice_array.take(grid_y.astype(np.intp))
+        # -1 picks the trailing zero vector
+        return _DIRECTION_X.take(choice), _DIRECTION_Y.take(choice), choice >= 0
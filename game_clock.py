@@ -0,0 +1,31 @@
+# game_clock.py
+import pygame
+from config import FPS
+
+class GameClock:
+    """Simulation clock advanced by a fixed step every game tick"""
+    def __init__(self, step_ms=1000 / FPS):
+        self.step_ms = step_ms
+        self.tick_count = 0
+
+    def advance(self, ticks=1):
+        """Move simulation time forward by whole ticks"""
+        self.tick_count += ticks
+
+    def reset(self):
+        self.tick_count = 0
+
+    def get_ticks(self):
+        """Elapsed simulation time in milliseconds"""
+        return int(self.tick_count * self.step_ms)
+
+
+def get_ticks(clock=None):
+    """Simulation milliseconds of a game's clock, or wall-clock milliseconds without one.
+
+    Gameplay timers (fire rate, reload, invulnerability) read the clock of the
+    game that owns them, so several games in one process keep their own time.
+    """
+    if clock is None:
+        return pygame.time.get_ticks()
+    return clock.get_ticks()
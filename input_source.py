@@ -0,0 +1,95 @@
+# input_source.py
+import pygame
+from config import *
+
+class InputFrame:
+    """Player input consumed by a single simulation tick"""
+    __slots__ = ("dx", "dy", "aim_x", "aim_y", "shoot", "weapon_switch", "reload", "use_item")
+
+    def __init__(self, dx=0, dy=0, aim_x=0.0, aim_y=0.0, shoot=False,
+                 weapon_switch=None, reload=False, use_item=None):
+        self.dx = dx  # -1, 0 or 1
+        self.dy = dy
+        self.aim_x = aim_x  # Aim point in world coordinates
+        self.aim_y = aim_y
+        self.shoot = shoot
+        self.weapon_switch = weapon_switch  # Weapon index or None
+        self.reload = reload
+        self.use_item = use_item  # Inventory index or None
+
+    def __repr__(self):
+        return (f"InputFrame(dx={self.dx}, dy={self.dy}, aim=({self.aim_x:.1f}, {self.aim_y:.1f}), "
+                f"shoot={self.shoot}, weapon_switch={self.weapon_switch}, "
+                f"reload={self.reload}, use_item={self.use_item})")
+
+
+class KeyboardMouseInput:
+    """Builds input frames from the live keyboard and mouse state"""
+    def __init__(self):
+        self.pending_weapon_switch = None
+        self.pending_reload = False
+        self.pending_item = None
+
+    def queue_weapon_switch(self, index):
+        self.pending_weapon_switch = index
+
+    def queue_reload(self):
+        self.pending_reload = True
+
+    def queue_item_use(self, index):
+        self.pending_item = index
+
+    def poll(self, game):
+        """Read the keyboard/mouse and return this tick's InputFrame"""
+        keys = pygame.key.get_pressed()
+        dx, dy = 0, 0
+        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+            dx -= 1
+        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+            dx += 1
+        if keys[pygame.K_w] or keys[pygame.K_UP]:
+            dy -= 1
+        if keys[pygame.K_s] or keys[pygame.K_DOWN]:
+            dy += 1
+
+        aim_x, aim_y = game.get_world_mouse_position()
+        frame = InputFrame(
+            dx, dy, aim_x, aim_y,
+            shoot=pygame.mouse.get_pressed()[0],
+            weapon_switch=self.pending_weapon_switch,
+            reload=self.pending_reload,
+            use_item=self.pending_item
+        )
+
+        # Event-driven actions apply to exactly one tick
+        self.pending_weapon_switch = None
+        self.pending_reload = False
+        self.pending_item = None
+        return frame
+
+
+class ScriptedInput:
+    """Input source driven by a callback, for headless runs, bots and tests"""
+    def __init__(self, script=None):
+        # script(game, tick) -> InputFrame or None
+        self.script = script
+        self.tick = 0
+
+    def queue_weapon_switch(self, index):
+        pass
+
+    def queue_reload(self):
+        pass
+
+    def queue_item_use(self, index):
+        pass
+
+    def poll(self, game):
+        frame = None
+        if self.script is not None:
+            frame = self.script(game, self.tick)
+        self.tick += 1
+        if frame is None:
+            # Idle: stand still and aim at the player's own position
+            frame = InputFrame(aim_x=game.player.rect.centerx, aim_y=game.player.rect.centery)
+        return frame
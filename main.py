@@ -2,44 +2,92 @@ from logging import DEBUG
 import pygame
 import sys
 from config import *
-from map import GameMap
+from chunked_map import create_game_map
 from player import Player
 from zombie import Zombie
 from bullet import Bullet
 from wave_manager import WaveManager
 from menu import Menu
-from particle_collision import ParticleSystem
+from particle_collision import create_particle_system
+from flipbook import FlipbookEffects
 from sound_manager import SoundManager
 from weapon import *
+from game_clock import GameClock
+from input_source import InputFrame, KeyboardMouseInput, ScriptedInput
+from rng import RandomStreams
+from profiler import FrameProfiler
+from presenter import FramePresenter
+from camera import Viewport
+from spatial_hash import SpatialHash
+import argparse
+import hashlib
 import math
+import os
 import random
+import struct
+import time
 import traceback
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, input_source=None, seed=None, world=WORLD_MODE):
+        # Headless runs simulate without a window, audio or mouse/keyboard polling
+        self.headless = headless
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
         # Initialize core systems
         pygame.init()
-        pygame.mixer.init()
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("Zombie Survival RPG")
+        if headless:
+            self.screen = None
+        else:
+            pygame.mixer.init()
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption("Zombie Survival RPG")
         self.clock = pygame.time.Clock()
+        self.presenter = FramePresenter()  # One present per frame, dirty rects on static screens
+        self.presented_scene = None  # Screen shown by the last present; another one is presented whole
+        self.viewport = Viewport()  # Culls world draw passes to what the camera shows
+        self.game_clock = GameClock()
+        # Real time not yet simulated, for the fixed-timestep loop
+        self.accumulator = 0.0
+        self.last_frame_time = time.perf_counter()
         self.running = True
         self.game_state = "menu"
 
+        # Input comes from an injectable source so bots and scripts can drive the game
+        self.input_source = input_source or KeyboardMouseInput()
+        self.input_frame = InputFrame()
+
+        # Per-stage frame timings (F3 shows the overlay, F4 dumps JSON/CSV)
+        self.profiler = FrameProfiler(enabled=not headless)
+        self.profile_dump_path = None  # Dump the profiler here on quit
+
+        # Seeded random streams: same seed and inputs replay the same game
+        self.rng = RandomStreams(seed)
+
         # Game systems initialization
-        self.game_map = GameMap()
+        self.world = world  # "fixed" or "chunked", see WORLD_MODE
+        self.game_map = create_game_map(world, self.rng.map)
         
-        self.player = Player(self.game_map)
-        self.wave_manager = WaveManager()
+        self.player = Player(self.game_map, self.rng.gameplay, self.game_clock)
+        self.wave_manager = WaveManager(self.rng.gameplay)
         self.menu = Menu()
-        self.particle_system = ParticleSystem()
+        self.particle_system = create_particle_system(self.rng.cosmetic)
+        self.effects = FlipbookEffects()  # Explosions and muzzle flashes
         self.sound_manager = SoundManager()
         
         # Initialize collections
         self.bullets = []
+        self.pickups = []
+        self.pickup_hash = SpatialHash()  # Broadphase index of self.pickups
 
         # Audio setup
-        self.initialize_audio()
+        if headless:
+            self.sound_manager.sound_enabled = False
+            self.sound_manager.music_enabled = False
+        else:
+            self.initialize_audio()
 
     def initialize_audio(self):
         """Load and configure game audio"""
@@ -54,6 +102,14 @@ class Game:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.quit_game()
+            elif event.type == pygame.WINDOWEXPOSED:
+                self.presenter.invalidate()  # The window lost its contents; present the next frame whole
+
+            # Profiler hotkeys work in every state
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.profiler.toggle_overlay()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                self.profiler.dump()
 
             # State-specific input handling
             if self.game_state == "menu":
@@ -177,21 +233,21 @@ class Game:
     def handle_game_input(self, event):
         """Process in-game inputs."""
         if event.type == pygame.KEYDOWN:
-            # Weapon management
+            # Weapon management is queued on the input source and applied on the next tick
             if event.key == pygame.K_1:
-                self.safe_weapon_switch(0)
+                self.input_source.queue_weapon_switch(0)
             elif event.key == pygame.K_2:
-                self.safe_weapon_switch(1)
+                self.input_source.queue_weapon_switch(1)
             elif event.key == pygame.K_3:
-                self.safe_weapon_switch(2)
+                self.input_source.queue_weapon_switch(2)
             elif event.key == pygame.K_4:
-                self.safe_weapon_switch(3)
+                self.input_source.queue_weapon_switch(3)
             elif event.key == pygame.K_5:
-                self.safe_weapon_switch(4)
+                self.input_source.queue_weapon_switch(4)
             elif event.key == pygame.K_6:
-                self.safe_weapon_switch(5)
+                self.input_source.queue_weapon_switch(5)
             elif event.key == pygame.K_r:
-                self.initiate_reload()
+                self.input_source.queue_reload()
             elif event.key == pygame.K_ESCAPE:
                 # Toggle pause
                 self.menu.paused = True
@@ -215,12 +271,12 @@ class Game:
             if event.key == pygame.K_TAB:
                 # Hide weapon wheel and apply selection
                 if self.menu.show_weapon_wheel:
-                    self.safe_weapon_switch(self.menu.selected_weapon_index)
+                    self.input_source.queue_weapon_switch(self.menu.selected_weapon_index)
                     self.menu.show_weapon_wheel = False
             elif event.key == pygame.K_q:
                 # Hide items wheel and use selected item
                 if self.menu.show_items_wheel:
-                    self.use_selected_item()
+                    self.input_source.queue_item_use(self.menu.selected_item_index)
                     self.menu.show_items_wheel = False
         
         # Handle wheel input if showing
@@ -253,8 +309,10 @@ class Game:
                 self.player.ammo[weapon_name] = self.player.current_weapon.max_ammo
             self.sound_manager.play_sound("weapon_switch")
 
-    def use_selected_item(self):
+    def use_selected_item(self, index=None):
         """Use the currently selected item from player's inventory"""
+        if index is not None:
+            self.menu.selected_item_index = index
         if hasattr(self.player, 'inventory') and self.player.inventory:
             try:
                 if 0 <= self.menu.selected_item_index < len(self.player.inventory):
@@ -297,10 +355,9 @@ class Game:
             # Get player position
             center_x, center_y = self.player.rect.centerx, self.player.rect.centery
             
-            # Get mouse position for throw direction
-            mouse_pos = pygame.mouse.get_pos()
-            world_mouse_x = mouse_pos[0] + (self.player.rect.centerx - WIDTH // 2)
-            world_mouse_y = mouse_pos[1] + (self.player.rect.centery - HEIGHT // 2)
+            # Get aim position for throw direction
+            world_mouse_x = self.input_frame.aim_x
+            world_mouse_y = self.input_frame.aim_y
             
             # Calculate throw direction
             dx = world_mouse_x - center_x
@@ -313,12 +370,14 @@ class Game:
             grenade_x = center_x + dx * throw_distance
             grenade_y = center_y + dy * throw_distance
             
-            # Create explosion particles
+            # Explosion effect
             explosion_radius = 150
-            self.particle_system.add_explosion(grenade_x, grenade_y, explosion_radius)
+            self.effects.add("grenade_explosion", grenade_x, grenade_y)
+            self.game_map.decals.add_scorch(grenade_x, grenade_y, explosion_radius // 2)
             
             # Damage zombies in radius
-            for zombie in self.wave_manager.zombies[:]:  # Use a copy to allow removal
+            spatial_hash = self.wave_manager.spatial_hash
+            for zombie in spatial_hash.query_circle(grenade_x, grenade_y, explosion_radius):
                 distance = math.hypot(zombie.x - grenade_x, zombie.y - grenade_y)
                 if distance < explosion_radius:
                     # Calculate damage based on distance (more damage closer to center)
@@ -334,6 +393,7 @@ class Game:
                     knockback_dy = (zombie.y - grenade_y) / distance * knockback_strength
                     zombie.x += knockback_dx
                     zombie.y += knockback_dy
+                    spatial_hash.move(zombie, zombie.x, zombie.y)
                     
                     # Add damage indicator
                     self.add_damage_indicator(zombie.x, zombie.y, actual_damage)
@@ -341,7 +401,7 @@ class Game:
                     # Check if zombie died
                     if zombie.health <= 0 and zombie in self.wave_manager.zombies:
                         self.player.score += zombie.score_value
-                        self.wave_manager.zombies.remove(zombie)
+                        self.wave_manager.remove_zombie(zombie)
         except Exception as e:
             print(f"Error throwing grenade: {e}")
 
@@ -352,46 +412,56 @@ class Game:
             self.sound_manager.play_sound("reload")
 
     def update_game(self):
-        """Main game update loop"""
-        # Get player input
-        keys = pygame.key.get_pressed()
-        mouse_press = pygame.mouse.get_pressed()
-        
-        # Movement directions
-        dx, dy = 0, 0
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
-            dx -= 1
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-            dx += 1
-        if keys[pygame.K_w] or keys[pygame.K_UP]:
-            dy -= 1
-        if keys[pygame.K_s] or keys[pygame.K_DOWN]:
-            dy += 1
-        
-        # Weapon switching via scroll wheel is handled in event processing
-        weapon_switch = None
-        
-        # Get shoot input (left mouse button)
-        shoot = mouse_press[0]
-        
-        # Update player
-        self.player.update(
-            dx, dy, self.game_map,
-            pygame.mouse.get_pos()[0], pygame.mouse.get_pos()[1],
-            weapon_switch, shoot
-        )
+        """Main game update loop, one simulation tick"""
+        profiler = self.profiler
+
+        # Get player input for this tick
+        with profiler.section("input"):
+            frame = self.input_source.poll(self)
+            self.input_frame = frame
+            self.apply_input_actions(frame)
+        shoot = frame.shoot
         
-        # Handle shooting
-        if shoot and hasattr(self.player, 'reloading') and not self.player.reloading:
-            self.handle_shooting()
+        # Update player (weapon switches were applied above)
+        with profiler.section("update_player"):
+            self.player.update(
+                frame.dx, frame.dy, self.game_map,
+                frame.aim_x, frame.aim_y,
+                0, shoot
+            )
+            # Generate the map around the player as they move (no-op on a fixed map)
+            self.game_map.stream(*self.player.rect.center)
+            
+            # Handle shooting
+            if shoot and hasattr(self.player, 'reloading') and not self.player.reloading:
+                self.handle_shooting()
 
         # Update game systems
-        self.update_wave_manager()
-        self.update_zombies()
-        self.update_bullets()
-        self.update_pickups()
-        self.update_damage_indicators()
-        self.particle_system.update()
+        with profiler.section("update_wave_manager"):
+            self.update_wave_manager()
+        with profiler.section("update_zombies"):
+            self.update_zombies()
+        with profiler.section("update_bullets"):
+            self.update_bullets()
+        with profiler.section("update_pickups"):
+            self.update_pickups()
+        with profiler.section("update_damage_indicators"):
+            self.update_damage_indicators()
+        with profiler.section("update_particles"):
+            self.particle_system.update()
+            self.effects.update()
+            self.game_map.decals.update()
+
+        self.game_clock.advance()
+
+    def apply_input_actions(self, frame):
+        """Apply the one-shot actions (weapon switch, reload, item use) of an input frame"""
+        if frame.weapon_switch is not None:
+            self.safe_weapon_switch(frame.weapon_switch)
+        if frame.reload:
+            self.initiate_reload()
+        if frame.use_item is not None:
+            self.use_selected_item(frame.use_item)
 
     def get_world_mouse_position(self):
         """Convert screen mouse position to world coordinates"""
@@ -409,24 +479,20 @@ class Game:
         """Handle bullet firing mechanics"""
         weapon = self.player.current_weapon
         if self.player.ammo.get(weapon.name, 0) > 0:
-            if weapon.fire(self.player.rect.center, self.get_world_mouse_position(), self.bullets):
+            aim = (self.input_frame.aim_x, self.input_frame.aim_y)
+            if weapon.fire(self.player.rect.center, aim, self.bullets):
                 self.player.ammo[weapon.name] -= 1
                 self.sound_manager.play_sound("shoot")
                 
                 # Add muzzle flash effect
                 angle = math.atan2(
-                    self.get_world_mouse_position()[1] - self.player.rect.centery,
-                    self.get_world_mouse_position()[0] - self.player.rect.centerx
+                    aim[1] - self.player.rect.centery,
+                    aim[0] - self.player.rect.centerx
                 )
                 muzzle_x = self.player.rect.centerx + math.cos(angle) * (self.player.radius + 5)
                 muzzle_y = self.player.rect.centery + math.sin(angle) * (self.player.radius + 5)
                 
-                self.particle_system.add_explosion(
-                    muzzle_x, 
-                    muzzle_y, 
-                    COLORS['yellow'], 
-                    8
-                )
+                self.effects.add("muzzle_flash", muzzle_x, muzzle_y)
                 
                 # Make crosshair pulse when shooting
                 if hasattr(self.menu, 'pulse_crosshair'):
@@ -441,60 +507,67 @@ class Game:
 
     def update_zombies(self):
         """Update all zombies in the game"""
-        for zombie in self.wave_manager.zombies[:]:
-            try:
-                zombie.move_towards(
+        wave_manager = self.wave_manager
+        spatial_hash = wave_manager.spatial_hash
+        player_x, player_y = self.player.rect.center
+        flow_field = wave_manager.flow_field
+        flow_field.update(self.game_map, player_x, player_y)
+        if wave_manager.store is not None:
+            # One vectorized step moves the whole horde
+            store = wave_manager.store
+            store.step(player_x, player_y, self.game_map, flow_field)
+            dead = store.dead()
+        else:
+            dead = []
+            for zombie in wave_manager.zombies[:]:
+                try:
+                    zombie.move_towards(player_x, player_y, self.game_map, spatial_hash, flow_field)
+                    if zombie.health <= 0:
+                        dead.append(zombie)
+                except Exception as e:
+                    print(f"Zombie update error: {e}")
+                    wave_manager.remove_zombie(zombie)
+
+        for zombie in dead:
+            x, y = zombie.x, zombie.y
+            wave_manager.remove_zombie(zombie)
+            self.player.score += 100
+            
+            # The blood decal keeps the mark; a few droplets and the burst show the kill
+            self.particle_system.add_blood_effect(x, y, DECAL_DROPLETS, DECAL_DROPLET_LIFETIME)
+            self.effects.add("death_burst", x, y)
+            self.game_map.decals.add_blood(x, y)
+            self.sound_manager.play_sound("zombie_death")
+            self.try_spawn_pickup((x, y))
+
+        # Player contact, only against zombies near the player
+        if wave_manager.store is not None:
+            touching = wave_manager.store.touching(player_x, player_y, self.player.radius)
+        else:
+            touching = spatial_hash.query_circle(player_x, player_y, self.player.radius)
+        for zombie in touching:
+            # Knockback from an earlier contact may already have pushed the player clear
+            distance = math.hypot(zombie.x - self.player.rect.centerx, zombie.y - self.player.rect.centery)
+            if distance < zombie.radius + self.player.radius:
+                self.player.take_damage(1)
+                self.sound_manager.play_sound("player_hurt")
+                self.player.apply_knockback(zombie.x, zombie.y)
+                
+                # Add blood particle effect for player
+                self.particle_system.add_blood_effect(
                     self.player.rect.centerx,
                     self.player.rect.centery,
-                    self.game_map
+                    count=10
                 )
-
-                # Circle collision check
-                distance = math.hypot(zombie.x - self.player.rect.centerx, zombie.y - self.player.rect.centery)
-                if distance < zombie.radius + self.player.radius:
-                    self.player.take_damage(1)
-                    self.sound_manager.play_sound("player_hurt")
-                    self.player.apply_knockback(zombie.x, zombie.y)
-                    
-                    # Add blood particle effect for player
-                    self.particle_system.add_blood_effect(
-                        self.player.rect.centerx,
-                        self.player.rect.centery,
-                        count=10
-                    )
-                    
-                    # Add damage indicator
-                    self.add_damage_indicator(self.player.rect.centerx, self.player.rect.centery, 1, is_player=True)
-                    
-                    # Do NOT remove the zombie here!
-
-                if zombie.health <= 0:
-                    self.wave_manager.zombies.remove(zombie)
-                    self.player.score += 100
-                    
-                    # Add blood splatter and explosion effects
-                    self.particle_system.add_blood_effect(
-                        zombie.x,
-                        zombie.y,
-                        count=15
-                    )
-                    self.particle_system.add_explosion(
-                        zombie.x,
-                        zombie.y,
-                        COLORS['red'],
-                        15
-                    )
-                    self.sound_manager.play_sound("zombie_death")
-                    self.try_spawn_pickup((zombie.x, zombie.y))
-            except Exception as e:
-                print(f"Zombie update error: {e}")
-                if zombie in self.wave_manager.zombies:
-                    self.wave_manager.zombies.remove(zombie)
+                
+                # Add damage indicator
+                self.add_damage_indicator(self.player.rect.centerx, self.player.rect.centery, 1, is_player=True)
 
     def try_spawn_pickup(self, position):
         """Attempt to spawn a pickup at the given position"""
-        if random.random() < 0.2:  # Increased to 20% chance for better testing
-            pickup_type = random.choice(["health", "ammo"])
+        rng = self.rng.gameplay
+        if rng.random() < 0.2:  # Increased to 20% chance for better testing
+            pickup_type = rng.choice(["health", "ammo"])
             
             # Initialize pickups list if it doesn't exist
             if not hasattr(self, 'pickups'):
@@ -513,6 +586,7 @@ class Game:
             }
             
             self.pickups.append(pickup)
+            self.pickup_hash.insert(pickup, pickup["x"], pickup["y"], pickup["radius"])
             print(f"Spawned {pickup_type} pickup at {position}")
             
             # Add sparkle effect to show pickup appearance
@@ -537,45 +611,77 @@ class Game:
             # Decrease lifetime
             pickup['lifetime'] -= 1
             if pickup['lifetime'] <= 0:
-                self.pickups.remove(pickup)
-                continue
+                self.remove_pickup(pickup)
                 
-            # Check for player collision
-            distance = math.hypot(
-                pickup['x'] - self.player.rect.centerx,
-                pickup['y'] - self.player.rect.centery
+        # Check for player collision
+        for pickup in self.pickup_hash.query_circle(self.player.rect.centerx, self.player.rect.centery, self.player.radius):
+            # Apply pickup effect
+            if pickup['type'] == 'health':
+                self.player.health = min(self.player.max_health, self.player.health + pickup['value'])
+                self.sound_manager.play_sound("pickup")
+                print(f"Player picked up health, new health: {self.player.health}")
+            elif pickup['type'] == 'ammo':
+                weapon_name = self.player.current_weapon.name
+                self.player.ammo[weapon_name] += pickup['value']
+                self.sound_manager.play_sound("pickup")
+                print(f"Player picked up ammo for {weapon_name}, new ammo: {self.player.ammo[weapon_name]}")
+            
+            # Add pickup effect
+            self.particle_system.add_sparkle(
+                pickup['x'],
+                pickup['y'],
+                pickup['color'],
+                20
             )
             
-            if distance < pickup['radius'] + self.player.radius:
-                # Apply pickup effect
-                if pickup['type'] == 'health':
-                    self.player.health = min(self.player.max_health, self.player.health + pickup['value'])
-                    self.sound_manager.play_sound("pickup")
-                    print(f"Player picked up health, new health: {self.player.health}")
-                elif pickup['type'] == 'ammo':
-                    weapon_name = self.player.current_weapon.name
-                    self.player.ammo[weapon_name] += pickup['value']
-                    self.sound_manager.play_sound("pickup")
-                    print(f"Player picked up ammo for {weapon_name}, new ammo: {self.player.ammo[weapon_name]}")
-                
-                # Add pickup effect
-                self.particle_system.add_sparkle(
-                    pickup['x'],
-                    pickup['y'],
-                    pickup['color'],
-                    20
-                )
-                
-                # Remove the pickup
-                self.pickups.remove(pickup)
+            # Remove the pickup
+            self.remove_pickup(pickup)
+
+    def remove_pickup(self, pickup):
+        """Remove a pickup from the list and the pickup hash"""
+        # Match by identity: two pickups dropped on the same spot compare equal
+        for index, other in enumerate(self.pickups):
+            if other is pickup:
+                del self.pickups[index]
+                break
+        self.pickup_hash.remove(pickup)
+
+    def rebuild_pickup_hash(self):
+        """Re-index the pickups after the list was replaced (snapshot restore)"""
+        self.pickup_hash = SpatialHash()
+        for pickup in self.pickups:
+            self.pickup_hash.insert(pickup, pickup["x"], pickup["y"], pickup["radius"])
                 
-    def draw_pickups(self, screen, camera_x, camera_y):
-        """Draw all pickups with visual effects"""
+    def draw_bullets(self, screen, camera_x, camera_y, lag=0.0, viewport=None):
+        """Draw bullets and grenades; with a viewport, only those it can see.
+
+        lag blends each one back towards its previous position by shifting the
+        camera per projectile.
+        """
+        drawn = 0
+        for bullet in self.bullets:
+            x, y = (bullet.x, bullet.y) if hasattr(bullet, 'x') else bullet.rect.topleft
+            if viewport is not None and not viewport.visible(x, y, bullet.get_draw_radius()):
+                continue
+            drawn += 1
+            bullet.draw(screen,
+                        camera_x + (x - bullet.prev_x) * lag,
+                        camera_y + (y - bullet.prev_y) * lag)
+        if viewport is not None:
+            viewport.record("bullets", drawn, len(self.bullets))
+
+    def draw_pickups(self, screen, camera_x, camera_y, viewport=None):
+        """Draw pickups with visual effects; with a viewport, only those it can see"""
         if not hasattr(self, 'pickups'):
             self.pickups = []
             return
             
-        for pickup in self.pickups:
+        pickups = self.pickups
+        if viewport is not None:
+            # Pickups never move, so the broadphase index finds the visible ones
+            pickups = self.pickup_hash.query_rect(*viewport.rect())
+            viewport.record("pickups", len(pickups), len(self.pickups))
+        for pickup in pickups:
             # Calculate pulsing size
             pulse_mod = 1 + 0.2 * math.sin(pickup['pulse'])
             size = int(pickup['radius'] * pulse_mod)
@@ -624,6 +730,7 @@ class Game:
 
     def update_bullets(self):
         """Update all bullets and handle collisions"""
+        spatial_hash = self.wave_manager.spatial_hash
         for bullet in self.bullets[:]:
             try:
                 # Check if the bullet is valid
@@ -638,15 +745,9 @@ class Game:
                     self.bullets.remove(bullet)
                     continue
                     
-                # Debug logging
-                bullet_type = type(bullet).__name__
-                has_explode = hasattr(bullet, 'explode')
-                print(f"Bullet type: {bullet_type}, has explode: {has_explode}")
-                
                 # Check if this is a Grenade (which needs the game parameter)
-                if has_explode:
+                if hasattr(bullet, 'explode'):
                     try:
-                        print(f"Calling update with game instance for grenade")
                         # Directly handle the case where lifetime is None
                         if hasattr(bullet, 'lifetime') and bullet.lifetime is None:
                             print("Warning: Grenade has None lifetime, fixing...")
@@ -658,6 +759,8 @@ class Game:
                         traceback.print_exc()
                         self.bullets.remove(bullet)
                         continue
+                    if bullet not in self.bullets:
+                        continue  # Exploded during its update
                 else:
                     try:
                         bullet.update()
@@ -669,65 +772,49 @@ class Game:
                         continue
                 
                 # Remove bullets that are off-screen
-                if hasattr(bullet, 'is_off_screen') and bullet.is_off_screen():
+                if hasattr(bullet, 'is_off_screen') and bullet.is_off_screen(self.game_map.size):
                     self.bullets.remove(bullet)
                     continue
                     
-                # Check for collision with map obstacles - with safety checks
-                if hasattr(bullet, 'rect') and bullet.rect is not None and hasattr(bullet.rect, 'centerx') and hasattr(bullet.rect, 'centery'):
-                    if self.game_map.check_collision(bullet.rect.centerx, bullet.rect.centery, 4):
-                        self.particle_system.add_explosion(
-                            bullet.rect.centerx,
-                            bullet.rect.centery,
-                            COLORS["white"],
-                            5
-                        )
-                        self.bullets.remove(bullet)
-                        continue
-                else:
-                    print(f"Warning: Bullet has invalid rect structure, removing")
-                    self.bullets.remove(bullet)
-                    continue
-                    
-                # Check for collision with zombies
-                for zombie in self.wave_manager.zombies[:]:
+                # Sweep the bullet over the path it travelled this tick, so fast shots
+                # cannot skip through thin walls or small zombies
+                start_x, start_y = bullet.prev_x, bullet.prev_y
+                end_x, end_y = bullet.x, bullet.y
+                wall_t = self.game_map.raycast(start_x, start_y, end_x, end_y)
+                hits = spatial_hash.query_segment(start_x, start_y, end_x, end_y, bullet.radius)
+                stopped = False
+                for t, zombie in hits:
+                    if wall_t is not None and t > wall_t:
+                        break  # The wall is closer
                     try:
-                        # Make sure zombie has required attributes
-                        if not hasattr(zombie, 'x') or not hasattr(zombie, 'y') or not hasattr(zombie, 'radius'):
-                            print("Warning: Zombie missing required attributes")
-                            continue
-                            
-                        if not hasattr(bullet, 'rect') or not hasattr(bullet.rect, 'centerx') or not hasattr(bullet.rect, 'centery'):
-                            print("Warning: Bullet missing required position attributes")
-                            continue
-                            
-                        distance = math.hypot(
-                            zombie.x - bullet.rect.centerx,
-                            zombie.y - bullet.rect.centery
-                        )
+                        # Handle bullet hit
+                        damage = getattr(bullet, 'damage', 1)  # Use damage attribute if available, else default to 1
+                        zombie.take_damage(damage)
+                        
+                        # Blood decal at the hit position, with a few short-lived droplets
+                        self.particle_system.add_blood_effect(zombie.x, zombie.y, DECAL_DROPLETS, DECAL_DROPLET_LIFETIME)
+                        self.game_map.decals.add_blood(zombie.x, zombie.y)
+                        
+                        # Add damage indicator 
+                        self.add_damage_indicator(zombie.x, zombie.y, damage)
                         
-                        # Ensure all values needed for comparison are not None
-                        if zombie.radius is not None and hasattr(bullet.rect, 'width'):
-                            radius_sum = zombie.radius + (bullet.rect.width // 2)
-                            if distance < radius_sum:
-                                # Handle bullet hit
-                                if hasattr(zombie, 'take_damage'):
-                                    damage = getattr(bullet, 'damage', 1)  # Use damage attribute if available, else default to 1
-                                    zombie.take_damage(damage)
-                                    
-                                    # Add blood effect at hit position
-                                    self.particle_system.add_blood_effect(zombie.x, zombie.y)
-                                    
-                                    # Add damage indicator 
-                                    self.add_damage_indicator(zombie.x, zombie.y, damage)
-                                    
-                                    # Remove the bullet if it's not a special penetrating type
-                                    if not hasattr(bullet, 'penetrating') or not bullet.penetrating:
-                                        if bullet in self.bullets:  # Safety check
-                                            self.bullets.remove(bullet)
-                                            break
+                        # Remove the bullet if it's not a special penetrating type
+                        if not getattr(bullet, 'penetrating', False):
+                            self.bullets.remove(bullet)
+                            stopped = True
+                            break
                     except Exception as e:
                         print(f"Zombie bullet collision error: {e}")
+                
+                # Check for collision with map obstacles
+                if not stopped and wall_t is not None:
+                    self.particle_system.add_explosion(
+                        start_x + (end_x - start_x) * wall_t,
+                        start_y + (end_y - start_y) * wall_t,
+                        COLORS["white"],
+                        5
+                    )
+                    self.bullets.remove(bullet)
             except Exception as e:
                 print(f"Bullet update error: {e}")
                 # Remove problematic bullets to prevent continuous errors
@@ -746,7 +833,7 @@ class Game:
             if is_critical:
                 damage_str = f"CRIT {damage}!"
             
-            offset_x = random.randint(-20, 20)
+            offset_x = self.rng.cosmetic.randint(-20, 20)
             self.damage_indicators.append([x, y, damage_str, 60, offset_x, 0, color])
         except Exception as e:
             print(f"Damage indicator error: {e}")
@@ -763,23 +850,29 @@ class Game:
             if indicator[3] <= 0:
                 self.damage_indicators.remove(indicator)
 
-    def draw_damage_indicators(self, screen, camera_x, camera_y):
-        """Draw all floating damage numbers with error handling"""
+    def draw_damage_indicators(self, screen, camera_x, camera_y, viewport=None):
+        """Draw floating damage numbers with error handling; with a viewport, only those it can see"""
         if not hasattr(self, 'damage_indicators'):
             self.damage_indicators = []
             return
         
         try:
-            # Cache the font to avoid creating it multiple times
+            # Numbers are rendered once per text and colour by the menu's text cache
             if not hasattr(self, 'damage_font') or self.damage_font is None:
-                self.damage_font = pygame.font.Font(None, 20)
+                self.damage_font = self.menu.text.font(20)
             if not hasattr(self, 'damage_font_large') or self.damage_font_large is None:
-                self.damage_font_large = pygame.font.Font(None, 25)
+                self.damage_font_large = self.menu.text.font(25)
                 
+            drawn = 0
             for indicator in self.damage_indicators[:]:
                 try:
                     x, y, text, lifetime, offset_x, offset_y, color = indicator
                     
+                    # Skip numbers off screen before rendering; the radius leaves room for the text
+                    if viewport is not None and not viewport.visible(x + offset_x, y + offset_y, 64):
+                        continue
+                    drawn += 1
+                    
                     # Fade out based on lifetime
                     alpha = min(255, int(lifetime * 4.25))
                     
@@ -787,109 +880,150 @@ class Game:
                     font = self.damage_font_large if "CRIT" in text else self.damage_font
                     
                     # Create damage text
-                    text_surf = font.render(text, True, color)
-                    
-                    # Create surface with transparency
-                    text_surf.set_alpha(alpha)
+                    text_surf = self.menu.text.render(font, text, color)
                     
                     # Calculate position with offsets
                     pos_x = int(x - camera_x + offset_x)
                     pos_y = int(y - camera_y + offset_y)
                     
-                    # Draw text
+                    # Draw text faded; the surface is shared, so its alpha is restored after
+                    text_surf.set_alpha(alpha)
                     screen.blit(text_surf, (pos_x - text_surf.get_width() // 2, pos_y - text_surf.get_height() // 2))
+                    text_surf.set_alpha(255)
                 except Exception as e:
                     print(f"Error drawing damage indicator: {e}")
                     if indicator in self.damage_indicators:
                         self.damage_indicators.remove(indicator)
+            if viewport is not None:
+                viewport.record("damage_indicators", drawn, len(self.damage_indicators))
         except Exception as e:
             print(f"Error in draw_damage_indicators: {e}")
             self.damage_indicators = []  # Reset if there's a critical error
 
-    def draw_game(self):
-        """Main game rendering function"""
+    def draw_game(self, alpha=1.0):
+        """Main game rendering function.
+
+        alpha is how far the render time lies between the previous and the current
+        simulation tick (0..1); moving entities are drawn at the blended position.
+        Returns the rects redrawn over a paused game, or None when the whole frame
+        may have changed or the changes are unknown.
+        """
+        profiler = self.profiler
+        lag = 1.0 - alpha
+        redrawn = None
         try:
             # Clear the screen
             self.screen.fill(COLORS["black"])
             
-            # Calculate camera position
-            camera_x = self.player.rect.centerx - WIDTH // 2
-            camera_y = self.player.rect.centery - HEIGHT // 2
+            # Calculate camera position from the interpolated player position
+            player_x, player_y = self.player.rect.center
+            prev_x, prev_y = self.player.prev_center
+            camera_x = player_x - (player_x - prev_x) * lag - WIDTH // 2
+            camera_y = player_y - (player_y - prev_y) * lag - HEIGHT // 2
+            viewport = self.viewport
+            viewport.move(camera_x, camera_y)
             
             # Draw map
-            self.game_map.draw(self.screen, camera_x, camera_y)
+            with profiler.section("draw_map"):
+                self.game_map.draw(self.screen, camera_x, camera_y)
             
-            # Draw bullets
-            for bullet in self.bullets:
-                bullet.draw(self.screen, camera_x, camera_y)
+            # Draw bullets (interpolated by shifting the camera per bullet)
+            with profiler.section("draw_bullets"):
+                self.draw_bullets(self.screen, camera_x, camera_y, lag, viewport)
             
             # Draw zombies
-            self.wave_manager.draw_zombies(self.screen, camera_x, camera_y)
+            with profiler.section("draw_zombies"):
+                self.wave_manager.draw_zombies(self.screen, camera_x, camera_y, alpha, viewport)
             
             # Draw player
-            self.player.draw(self.screen, camera_x, camera_y)
+            with profiler.section("draw_player"):
+                self.player.draw(self.screen,
+                                 camera_x + (player_x - prev_x) * lag,
+                                 camera_y + (player_y - prev_y) * lag)
             
             # Draw damage indicators
-            self.draw_damage_indicators(self.screen, camera_x, camera_y)
+            with profiler.section("draw_damage_indicators"):
+                self.draw_damage_indicators(self.screen, camera_x, camera_y, viewport)
             
             # Draw particles
-            self.particle_system.draw(self.screen, camera_x, camera_y)
+            with profiler.section("draw_particles"):
+                self.particle_system.draw(self.screen, camera_x, camera_y, viewport)
+                self.effects.draw(self.screen, camera_x, camera_y, viewport)
             
             # Draw HUD
-            self.menu.draw_hud(self.screen, self.player, self.wave_manager.current_wave)
-            self.menu.draw_crosshair(self.screen, pygame.mouse.get_pos())
+            with profiler.section("draw_hud"):
+                self.menu.draw_hud(self.screen, self.player, self.wave_manager.current_wave)
+                self.menu.draw_crosshair(self.screen, pygame.mouse.get_pos())
             
             # Minimap
-            self.menu.draw_enhanced_minimap(self.screen, self.player, self.game_map, self.wave_manager.zombies)
+            with profiler.section("draw_minimap"):
+                self.menu.draw_enhanced_minimap(self.screen, self.player, self.game_map, self.wave_manager.zombies)
             
-            # Draw weapon wheel if showing
-            if self.menu.show_weapon_wheel:
-                self.menu.draw_weapon_wheel(self.screen, self.player)
-                
-            # Draw items wheel if showing  
-            if self.menu.show_items_wheel:
-                self.menu.draw_items_wheel(self.screen, self.player)
+            with profiler.section("draw_ui"):
+                # Draw weapon wheel if showing
+                if self.menu.show_weapon_wheel:
+                    self.menu.draw_weapon_wheel(self.screen, self.player)
+                    
+                # Draw items wheel if showing  
+                if self.menu.show_items_wheel:
+                    self.menu.draw_items_wheel(self.screen, self.player)
             
             # Draw pickups
-            self.draw_pickups(self.screen, camera_x, camera_y)
+            with profiler.section("draw_pickups"):
+                self.draw_pickups(self.screen, camera_x, camera_y, viewport)
             
-            # Draw pause screen if paused
-            if self.menu.paused:
-                self.draw_pause_menu()
+            with profiler.section("draw_ui"):
+                # Draw pause screen if paused
+                if self.menu.paused:
+                    redrawn = self.draw_pause_menu()
+                    
+                    # If settings menu is open, draw it on top of the pause menu
+                    if self.menu.show_settings:
+                        self.draw_settings()
+                        redrawn = None  # The settings animate throughout; left to the presenter to find
                 
-                # If settings menu is open, draw it on top of the pause menu
-                if self.menu.show_settings:
-                    self.draw_settings()
-            
-            # FPS counter
-            if self.menu.settings["show_fps"]:
-                fps = str(int(self.clock.get_fps()))
-                fps_text = self.menu.small_font.render(f"FPS: {fps}", True, COLORS["white"])
-                self.screen.blit(fps_text, (WIDTH - 100, 10))
-            
-            # Debug information
-            if DEBUG:
-                debug_info = [
-                    f"Player pos: ({self.player.rect.centerx}, {self.player.rect.centery})",
-                    f"Zombies: {len(self.wave_manager.zombies)}",
-                    f"Bullets: {len(self.bullets)}",
-                    f"Wave: {self.wave_manager.current_wave}",
-                    f"Score: {self.player.score}"
-                ]
+                # FPS counter
+                if self.menu.settings["show_fps"]:
+                    fps = str(int(self.clock.get_fps()))
+                    fps_text = self.menu.text.render(self.menu.small_font, f"FPS: {fps}", COLORS["white"])
+                    fps_rect = self.screen.blit(fps_text, (WIDTH - 100, 10))
+                    if redrawn is not None:
+                        redrawn.append(fps_rect)
                 
-                for i, info in enumerate(debug_info):
-                    debug_text = self.menu.small_font.render(info, True, COLORS["yellow"])
-                    self.screen.blit(debug_text, (10, 40 + i * 20))
-            
-            # Update the display
-            pygame.display.flip()
+                # Debug information
+                if DEBUG:
+                    debug_info = [
+                        f"Player pos: ({self.player.rect.centerx}, {self.player.rect.centery})",
+                        f"Zombies: {len(self.wave_manager.zombies)}",
+                        f"Bullets: {len(self.bullets)}",
+                        f"Wave: {self.wave_manager.current_wave}",
+                        f"Score: {self.player.score}"
+                    ]
+                    
+                    for i, info in enumerate(debug_info):
+                        debug_text = self.menu.text.render(self.menu.small_font, info, COLORS["yellow"])
+                        self.screen.blit(debug_text, (10, 40 + i * 20))
+
+            # Profiler overlay
+            with profiler.section("draw_profiler"):
+                profiler.set_counter("zombies", len(self.wave_manager.zombies))
+                profiler.set_counter("bullets", len(self.bullets))
+                profiler.set_counter("particles", len(self.particle_system))
+                profiler.set_counter("effects", len(self.effects))
+                profiler.set_counter("text_hits", self.menu.text.hits)
+                profiler.set_counter("text_misses", self.menu.text.misses)
+                for name, drawn in viewport.drawn.items():
+                    profiler.set_counter(f"drawn_{name}", drawn)
+                    profiler.set_counter(f"culled_{name}", viewport.culled[name])
+                profiler.draw(self.screen)
+            return redrawn
             
         except Exception as e:
             print(f"Error in draw_game: {e}")
             # Continue despite rendering errors
 
     def draw_pause_menu(self):
-        """Draw the pause menu overlay"""
+        """Draw the pause menu overlay. Returns the rects that can change between frames."""
         try:
             # Animate the alpha for fade-in effect
             self.menu.ui_animations["pause_alpha"] = min(180, self.menu.ui_animations["pause_alpha"] + 10)
@@ -901,31 +1035,36 @@ class Game:
             self.screen.blit(overlay, (0, 0))
             
             # Draw pause text
-            title_text = self.menu.title_font.render("PAUSED", True, COLORS["white"])
+            title_text = self.menu.text.render(self.menu.title_font, "PAUSED", COLORS["white"])
             title_rect = title_text.get_rect(center=(WIDTH // 2, HEIGHT // 4))
             self.screen.blit(title_text, title_rect)
             
+            # While the overlay fades in the whole frame darkens
+            redrawn = [self.screen.get_rect()] if alpha < 180 else []
+            
             # Draw pause menu options
             for i, option in enumerate(self.menu.pause_options):
                 if i == self.menu.pause_selected:
                     # Highlight selected option
                     color = COLORS["yellow"]
                     # Add indicator arrow
-                    pygame.draw.polygon(self.screen, COLORS["yellow"], 
+                    redrawn.append(pygame.draw.polygon(self.screen, COLORS["yellow"], 
                         [(WIDTH // 2 - 140, HEIGHT // 2 + i * 50), 
                          (WIDTH // 2 - 120, HEIGHT // 2 + i * 50 + 10), 
-                         (WIDTH // 2 - 140, HEIGHT // 2 + i * 50 + 20)])
+                         (WIDTH // 2 - 140, HEIGHT // 2 + i * 50 + 20)]))
                 else:
                     color = COLORS["white"]
                 
-                option_text = self.menu.menu_font.render(option, True, color)
+                option_text = self.menu.text.render(self.menu.menu_font, option, color)
                 option_rect = option_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + i * 50))
                 self.screen.blit(option_text, option_rect)
+                redrawn.append(option_rect)  # The selection moves between options
             
             # Draw controls help
-            controls_text = self.menu.small_font.render("Use arrow keys to navigate, Enter to select", True, COLORS["white"])
+            controls_text = self.menu.text.render(self.menu.small_font, "Use arrow keys to navigate, Enter to select", COLORS["white"])
             controls_rect = controls_text.get_rect(center=(WIDTH // 2, HEIGHT - 50))
             self.screen.blit(controls_text, controls_rect)
+            return redrawn
             
         except Exception as e:
             print(f"Error drawing pause menu: {e}")
@@ -945,11 +1084,11 @@ class Game:
                 overlay.fill((0, 0, 0, 180))
                 self.screen.blit(overlay, (0, 0))
                 
-                title_text = self.menu.menu_font.render("Settings", True, COLORS["white"])
+                title_text = self.menu.text.render(self.menu.menu_font, "Settings", COLORS["white"])
                 title_rect = title_text.get_rect(center=(WIDTH // 2, HEIGHT // 4))
                 self.screen.blit(title_text, title_rect)
                 
-                help_text = self.menu.small_font.render("Press ESC to return", True, COLORS["white"])
+                help_text = self.menu.text.render(self.menu.small_font, "Press ESC to return", COLORS["white"])
                 help_rect = help_text.get_rect(center=(WIDTH // 2, HEIGHT - 50))
                 self.screen.blit(help_text, help_rect)
         except Exception as e:
@@ -959,50 +1098,138 @@ class Game:
     def reset_game(self):
         """Reset game state to initial values"""
         try:
-            self.player = Player(self.game_map)
-            self.wave_manager = WaveManager()
+            # Every session restarts the seeded streams so it can be replayed exactly
+            self.rng.reseed(RandomStreams.GAMEPLAY, RandomStreams.COSMETIC)
+            self.player = Player(self.game_map, self.rng.gameplay, self.game_clock)
+            self.wave_manager = WaveManager(self.rng.gameplay)
             self.bullets = []
-            self.particle_system = ParticleSystem()
+            self.pickups = []
+            self.pickup_hash = SpatialHash()
+            self.damage_indicators = []
+            self.particle_system = create_particle_system(self.rng.cosmetic)
+            self.effects = FlipbookEffects()
+            self.game_map.decals.clear()
+            self.game_clock.reset()
+            self.accumulator = 0.0
+            self.last_frame_time = time.perf_counter()
+            if hasattr(self.input_source, 'on_reset'):
+                self.input_source.on_reset(self)
             self.sound_manager.play_sound("game_start")
         except Exception as e:
             print(f"Game reset error: {e}")
             self.quit_game()
 
+    def world_state_hash(self):
+        """Hash of the gameplay state for this tick; cosmetic state is excluded.
+
+        Two runs with the same seed and inputs produce identical hash sequences,
+        so the first differing hash marks the tick where they diverged.
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        player = self.player
+        wave = self.wave_manager
+        digest.update(struct.pack(
+            "<qddddqqqqq",
+            self.game_clock.tick_count,
+            player.rect.centerx, player.rect.centery,
+            player.health, player.speed,
+            player.score, player.current_weapon_index, int(player.reloading),
+            wave.current_wave, wave.spawned_count
+        ))
+        for name in sorted(player.ammo):
+            digest.update(struct.pack("<q", player.ammo[name]))
+        for zombie in wave.zombies:
+            digest.update(zombie.type.encode())
+            digest.update(struct.pack("<ddd", zombie.x, zombie.y, zombie.health))
+        for bullet in self.bullets:
+            x, y = (bullet.x, bullet.y) if hasattr(bullet, 'x') else bullet.rect.center
+            digest.update(struct.pack("<dd", x, y))
+        for pickup in getattr(self, 'pickups', []):
+            digest.update(pickup["type"].encode())
+            digest.update(struct.pack("<ddq", pickup["x"], pickup["y"], pickup["lifetime"]))
+        return digest.hexdigest()
+
+    def finish_recording(self):
+        """Write out the replay if the input source is recording one"""
+        if hasattr(self.input_source, 'save'):
+            try:
+                self.input_source.save()
+            except Exception as e:
+                print(f"Error saving replay: {e}")
+
     def quit_game(self):
         """Clean up and exit game"""
+        self.finish_recording()
+        if self.profile_dump_path:
+            self.profiler.dump(self.profile_dump_path)
         pygame.quit()
         sys.exit()
 
     
+    def step_simulation(self):
+        """Advance the simulation by fixed ticks to catch up with real time.
+
+        Frame time is accumulated and spent in steps of one tick, so slow frames
+        run several ticks and fast frames run none; the game speed stays constant
+        whatever the render rate. Returns the interpolation factor for drawing.
+        """
+        now = time.perf_counter()
+        frame_time = min(now - self.last_frame_time, MAX_FRAME_TIME)
+        self.last_frame_time = now
+        step = self.game_clock.step_ms / 1000
+
+        # The pause menu freezes the simulation
+        if self.menu.paused:
+            return 1.0
+
+        self.accumulator += frame_time
+        steps = 0
+        while self.accumulator >= step and steps < MAX_SIM_STEPS_PER_FRAME:
+            try:
+                self.update_game()
+            except Exception as e:
+                print(f"Error in update_game: {e}")
+                import traceback
+                traceback.print_exc()
+            self.accumulator -= step
+            steps += 1
+
+            # Check player survival
+            if self.player.health <= 0:
+                self.game_state = "game_over"
+                self.sound_manager.play_sound("game_over")
+                self.sound_manager.stop_music()
+                self.finish_recording()
+                break
+
+        if self.accumulator >= step:
+            # Too far behind to catch up: drop the backlog and run slower instead
+            self.accumulator %= step
+        return self.accumulator / step
+
     def run(self):
         """Main game loop"""
         try:
             while self.running:
                 try:
-                    self.handle_events()
+                    self.profiler.begin_frame()
+                    with self.profiler.section("handle_events"):
+                        self.handle_events()
                     
+                    redrawn = None
                     if self.game_state == "menu":
                         # Draw main menu
-                        self.screen.fill(COLORS['black'])
-                        self.menu.draw_main_menu(self.screen)
+                        with self.profiler.section("draw_menu"):
+                            self.screen.fill(COLORS['black'])
+                            redrawn = self.menu.draw_main_menu(self.screen)
+                        self.profiler.draw(self.screen)
                     
                     elif self.game_state == "playing":
-                        # Update and draw game state
-                        try:
-                            self.update_game()
-                        except Exception as e:
-                            print(f"Error in update_game: {e}")
-                            import traceback
-                            traceback.print_exc()
-                        
-                        # Check player survival
-                        if self.player.health <= 0:
-                            self.game_state = "game_over"
-                            self.sound_manager.play_sound("game_over")
-                            self.sound_manager.stop_music()
+                        # Run as many fixed simulation steps as real time calls for
+                        alpha = self.step_simulation()
                         
                         try:
-                            self.draw_game()
+                            redrawn = self.draw_game(alpha)
                         except Exception as e:
                             print(f"Error in draw_game: {e}")
                             import traceback
@@ -1010,14 +1237,26 @@ class Game:
                     
                     elif self.game_state == "game_over":
                         # Draw game over screen
-                        self.screen.fill(COLORS['black'])
-                        self.menu.draw_game_over(self.screen, self.player.score)
+                        with self.profiler.section("draw_menu"):
+                            self.screen.fill(COLORS['black'])
+                            redrawn = self.menu.draw_game_over(self.screen, self.player.score)
+                        self.profiler.draw(self.screen)
+                    
+                    if self.profiler.show_overlay:
+                        redrawn = None  # The overlay changes every frame; left to the presenter to find
+                    scene = (self.game_state, self.menu.paused, self.menu.show_settings)
+                    if scene != self.presented_scene:
+                        self.presenter.invalidate()
+                        self.presented_scene = scene
                     
-                    # Update display
-                    pygame.display.flip()
+                    # Present the frame once; screens that do not scroll push only what changed
+                    with self.profiler.section("display_flip"):
+                        self.presenter.present(self.screen, static=self.game_state != "playing" or self.menu.paused,
+                                               rects=redrawn)
+                    self.profiler.set_counter("dirty_rects", self.presenter.dirty_rects)
                     
-                    # Maintain consistent frame rate
-                    self.clock.tick(FPS)
+                    # Cap the render rate; simulation speed does not depend on it
+                    self.clock.tick(MAX_FPS)
                     
                 except Exception as e:
                     print(f"Error in main game loop: {e}")
@@ -1029,6 +1268,73 @@ class Game:
             import traceback
             traceback.print_exc()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Zombie Survival")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the simulation without a window, as fast as possible")
+    parser.add_argument("--ticks", type=int, default=36000,
+                        help="maximum ticks to simulate in headless mode")
+    parser.add_argument("--idle", action="store_true",
+                        help="headless player stands still instead of running the built-in bot")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for map, waves, weapons and effects (random if omitted)")
+    parser.add_argument("--world", choices=("fixed", "chunked"), default=WORLD_MODE,
+                        help="fixed-size map, or an unbounded one streamed in chunks around the player")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record the session's input to a replay file")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play back a replay file")
+    parser.add_argument("--fast", action="store_true",
+                        help="play the replay headless, as fast as possible")
+    parser.add_argument("--seek-wave", type=int, default=None,
+                        help="start replay playback at the first tick of this wave")
+    parser.add_argument("--profile-dump", metavar="BASENAME",
+                        help="write per-stage frame timings to BASENAME.json/.csv on exit")
+    return parser.parse_args(argv)
+
+def play_replay(args):
+    """Play back a recorded session, in a window or headless as fast as possible"""
+    from replay import Replay, ReplayPlayer
+    replay = Replay.load(args.replay)
+    game = Game(headless=args.fast, seed=replay.seed, world=replay.world)
+    game.profile_dump_path = args.profile_dump
+    player = ReplayPlayer(replay, game)
+    game.reset_game()
+    game.game_state = "playing"
+    if args.seek_wave is not None:
+        player.seek_wave(args.seek_wave)
+
+    if args.fast:
+        start = pygame.time.get_ticks()
+        player.fast_forward(replay.tick_count - player.tick)
+        elapsed = (pygame.time.get_ticks() - start) / 1000
+        print(f"Replayed {replay.tick_count} ticks in {elapsed:.2f}s: wave {game.wave_manager.current_wave}, "
+              f"score {game.player.score}, world hash {game.world_state_hash()}")
+    else:
+        game.run()
+
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    args = parse_args()
+    if args.replay:
+        play_replay(args)
+    elif args.headless:
+        from simulation import Simulation, SimpleBot
+        input_source = None if args.idle else SimpleBot()
+        if args.record:
+            from replay import ReplayRecorder
+            input_source = ReplayRecorder(input_source or ScriptedInput(), args.record)
+        simulation = Simulation(input_source=input_source, seed=args.seed, world=args.world,
+                                profile=bool(args.profile_dump))
+        stats = simulation.run(args.ticks)
+        simulation.game.finish_recording()
+        if args.profile_dump:
+            simulation.game.profiler.dump(args.profile_dump)
+        print(stats)
+    else:
+        input_source = None
+        if args.record:
+            from replay import ReplayRecorder
+            input_source = ReplayRecorder(KeyboardMouseInput(), args.record)
+        game = Game(seed=args.seed, input_source=input_source, world=args.world)
+        game.profile_dump_path = args.profile_dump
+        game.run()
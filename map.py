@@ -3,15 +3,78 @@ import pygame
 import random
 import math
 from config import *
+from decals import DecalLayer
+from map_render import MapRenderCache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; without it maps use the formula terrain below
+    np = None
+
+def value_noise(rng, size, octaves=4, feature_tiles=12, persistence=0.5):
+    """Multi-octave value noise in 0..1 on a size x size grid.
+
+    Each octave bilinearly interpolates (with smoothstep weights) a random lattice
+    twice as fine as the last, done separably: along x for every lattice row, then
+    along y, so no octave costs more than a few passes over the grid.
+    """
+    total = np.zeros((size, size), dtype=np.float32)
+    amplitude = 1.0
+    cells = max(1, size // feature_tiles)
+    for _ in range(octaves):
+        lattice = rng.random((cells + 1, cells + 1), dtype=np.float32)
+        coords = np.arange(size, dtype=np.float32) * np.float32(cells / size)
+        index = np.minimum(coords.astype(np.intp), cells - 1)
+        weight = coords - index
+        weight = weight * weight * (3 - 2 * weight)
+        rows = lattice[:, index] * (1 - weight) + lattice[:, index + 1] * weight
+        total += np.float32(amplitude) * (rows[index] * (1 - weight)[:, None] + rows[index + 1] * weight[:, None])
+        amplitude *= persistence
+        cells = min(cells * 2, size)
+    return total * ((1 - persistence) / (1 - persistence ** octaves))
+
+
+def clear_start(tiles, tiles_x, tiles_y, tile_size=TILE_SIZE):
+    """Turn walls and water around the player's start tile into grass, leaving roads.
+
+    tiles_x and tiles_y are the world tile coordinates of the columns and rows of
+    tiles, on a map of tile_size pixel tiles.
+    """
+    start_x = WIDTH // 2 // tile_size
+    start_y = HEIGHT // 2 // tile_size
+    clearing = (tiles_x[None, :] - start_x) ** 2 + (tiles_y[:, None] - start_y) ** 2 <= START_CLEARING ** 2
+    tiles[clearing & (tiles != 3)] = 0
+
+
+def generate_terrain(size, seed, settings=MAPGEN_SETTINGS, tile_size=TILE_SIZE):
+    """Tile type array for a size x size map: noise terrain, border walls and a wall scatter,
+    with the player's start kept clear on a map of tile_size pixel tiles"""
+    rng = np.random.default_rng(seed)
+    height = value_noise(rng, size, settings["octaves"], settings["feature_tiles"], settings["persistence"])
+    tiles = np.zeros((size, size), dtype=np.uint8)
+    tiles[height < settings["water_level"]] = 2  # Water
+    tiles[height > settings["road_level"]] = 3  # Road
+    tiles[(tiles == 0) & (rng.random((size, size)) < settings["wall_density"])] = 1  # Random interior walls
+    clear_start(tiles, np.arange(size), np.arange(size), tile_size)
+    padding = settings["edge_padding"]
+    tiles[:padding] = tiles[-padding:] = 1  # Border walls
+    tiles[:, :padding] = tiles[:, -padding:] = 1
+    return tiles
+
 
 class GameMap:
-    def __init__(self, size=MAP_SIZE, tile_size=TILE_SIZE, assets=None):
+    def __init__(self, size=MAP_SIZE, tile_size=TILE_SIZE, assets=None, rng=None):
         self.size = size
         self.tile_size = tile_size
         self.grid_size = size // tile_size
         self.assets = assets
+        self.rng = rng if rng is not None else random
+        self.tile_changes = []  # (grid_x, grid_y) of every set_tile, for derived data like the flow field
         self.grid = self.generate_map()
         self.load_tile_definitions()
+        self.build_collision_grid()
+        self.render_cache = MapRenderCache(self)
+        self.decals = DecalLayer()  # Blood and scorch marks, drawn over the tiles
 
     def load_tile_definitions(self):
         """Load tile types with passability and textures"""
@@ -21,9 +84,14 @@ class GameMap:
             2: {"name": "water", "passable": False, "color": (0, 128, 255)},
             3: {"name": "road", "passable": True, "color": (100, 100, 100)}
         }
+        self.tile_textures = {}  # tile type -> Surface, built on first use
 
     def generate_map(self):
-        """Hybrid map generation with procedural elements and borders"""
+        """Seeded procedural terrain with borders; NumPy when available"""
+        if np is not None:
+            self.tile_array = generate_terrain(self.grid_size, self.rng.getrandbits(64), tile_size=self.tile_size)
+            return self.tile_array.tolist()
+        self.tile_array = None
         grid = [[0 for _ in range(self.grid_size)] for _ in range(self.grid_size)]
         edge_padding = 3
 
@@ -46,41 +114,201 @@ class GameMap:
                     x >= self.grid_size - edge_padding or 
                     y >= self.grid_size - edge_padding):
                     grid[y][x] = 1  # Border walls
-                elif random.random() < 0.08 and grid[y][x] == 0:
+                elif self.rng.random() < 0.08 and grid[y][x] == 0:
                     grid[y][x] = 1  # Random interior walls
 
         return grid
 
+    def build_collision_grid(self):
+        """Flat bytearray of solid tiles (1 = blocks movement) with a one-tile solid border.
+
+        Tile (grid_x, grid_y) is at (grid_y + 1) * stride + grid_x + 1, so clamping
+        coordinates to -1..grid_size lands everything off-map on the border.
+        """
+        self.stride = self.grid_size + 2
+        self.solid_types = bytes(not self.tile_defs[t]["passable"] for t in range(max(self.tile_defs) + 1))
+        if self.tile_array is not None:
+            padded = np.ones((self.stride, self.stride), dtype=np.uint8)
+            padded[1:-1, 1:-1] = np.frombuffer(self.solid_types, dtype=np.uint8)[self.tile_array]
+            self.solid = bytearray(padded.tobytes())
+        else:
+            self.solid = bytearray([1]) * (self.stride * self.stride)
+            for grid_y, row in enumerate(self.grid):
+                start = (grid_y + 1) * self.stride + 1
+                self.solid[start:start + self.grid_size] = bytes(self.solid_types[t] for t in row)
+        # NumPy view sharing the bytearray's memory, so set_tile shows up in batch queries too
+        self.solid_view = np.frombuffer(self.solid, dtype=np.uint8) if np is not None else None
+
+    def set_tile(self, grid_x, grid_y, tile_type):
+        """Change one tile, keeping the collision grid in step"""
+        self.grid[grid_y][grid_x] = tile_type
+        if self.tile_array is not None:
+            self.tile_array[grid_y, grid_x] = tile_type
+        self.solid[(grid_y + 1) * self.stride + grid_x + 1] = self.solid_types[tile_type]
+        self.render_cache.invalidate(grid_x, grid_y)
+        self.tile_changes.append((grid_x, grid_y))
+
     def is_passable(self, x, y):
         """Check passability at world coordinates"""
         grid_x = int(x // self.tile_size)
         grid_y = int(y // self.tile_size)
         if 0 <= grid_x < self.grid_size and 0 <= grid_y < self.grid_size:
-            return self.tile_defs[self.grid[grid_y][grid_x]]["passable"]
+            return not self.solid[(grid_y + 1) * self.stride + grid_x + 1]
         return False
 
+    def tile_indexes(self, xs, ys):
+        """Flat collision grid indexes of NumPy arrays of world coordinates"""
+        scale = 1.0 / self.tile_size
+        grid_x = np.floor(xs * scale)
+        grid_y = np.floor(ys * scale)
+        np.clip(grid_x, -1, self.grid_size, out=grid_x)
+        np.clip(grid_y, -1, self.grid_size, out=grid_y)
+        grid_y += 1
+        grid_y *= self.stride
+        grid_y += grid_x
+        grid_y += 1
+        return grid_y.astype(np.intp)
+
+    def are_passable(self, xs, ys):
+        """Vectorized is_passable over NumPy arrays of world coordinates"""
+        return self.solid_view[self.tile_indexes(xs, ys)] == 0
+
+    def is_solid_tile(self, grid_x, grid_y):
+        """Whether a tile blocks movement and shots; outside the map counts as solid"""
+        if 0 <= grid_x < self.grid_size and 0 <= grid_y < self.grid_size:
+            return self.solid[(grid_y + 1) * self.stride + grid_x + 1] == 1
+        return True
+
+    def raycast(self, x0, y0, x1, y1):
+        """Fraction of the segment (x0, y0)-(x1, y1) at which it first enters a solid tile.
+
+        Walks only the tiles the segment crosses (grid DDA) and returns None when
+        the whole segment is clear.
+        """
+        size = self.tile_size
+        grid_x, grid_y = int(x0 // size), int(y0 // size)
+        if self.is_solid_tile(grid_x, grid_y):
+            return 0.0
+        end_x, end_y = int(x1 // size), int(y1 // size)
+        dx = x1 - x0
+        dy = y1 - y0
+
+        # t at which the segment crosses the next vertical/horizontal grid line, and
+        # the t it takes to cross a whole tile along each axis
+        if dx > 0:
+            step_x, t_max_x, t_delta_x = 1, ((grid_x + 1) * size - x0) / dx, size / dx
+        elif dx < 0:
+            step_x, t_max_x, t_delta_x = -1, (grid_x * size - x0) / dx, -size / dx
+        else:
+            step_x, t_max_x, t_delta_x = 0, math.inf, math.inf
+        if dy > 0:
+            step_y, t_max_y, t_delta_y = 1, ((grid_y + 1) * size - y0) / dy, size / dy
+        elif dy < 0:
+            step_y, t_max_y, t_delta_y = -1, (grid_y * size - y0) / dy, -size / dy
+        else:
+            step_y, t_max_y, t_delta_y = 0, math.inf, math.inf
+
+        while grid_x != end_x or grid_y != end_y:
+            if t_max_x < t_max_y:
+                t = t_max_x
+                grid_x += step_x
+                t_max_x += t_delta_x
+            else:
+                t = t_max_y
+                grid_y += step_y
+                t_max_y += t_delta_y
+            if t > 1.0:
+                break  # Rounding carried us past the end tile
+            if self.is_solid_tile(grid_x, grid_y):
+                return t
+        return None
+
     def check_collision(self, x, y, radius=PLAYER_RADIUS):
-        """Improved collision detection with radius"""
-        grid_x = int(x // self.tile_size)
-        grid_y = int(y // self.tile_size)
-        
-        for i in range(max(0, grid_x - 1), min(self.grid_size, grid_x + 2)):
-            for j in range(max(0, grid_y - 1), min(self.grid_size, grid_y + 2)):
-                if self.grid[j][i] in [1, 2]:  # Walls and water
-                    rect_x = i * self.tile_size
-                    rect_y = j * self.tile_size
-                    
+        """Whether a circle overlaps a solid tile in the 3x3 window around its centre"""
+        size = self.tile_size
+        grid_x = int(x // size)
+        grid_y = int(y // size)
+        solid = self.solid
+        radius_sq = radius * radius
+
+        for j in range(max(0, grid_y - 1), min(self.grid_size, grid_y + 2)):
+            row = (j + 1) * self.stride + 1
+            for i in range(max(0, grid_x - 1), min(self.grid_size, grid_x + 2)):
+                if solid[row + i]:  # Walls and water
+                    rect_x = i * size
+                    rect_y = j * size
+
                     # Find closest point on tile
-                    closest_x = max(rect_x, min(x, rect_x + self.tile_size))
-                    closest_y = max(rect_y, min(y, rect_y + self.tile_size))
-                    
-                    distance = math.hypot(x - closest_x, y - closest_y)
-                    if distance < radius:
+                    dx = x - max(rect_x, min(x, rect_x + size))
+                    dy = y - max(rect_y, min(y, rect_y + size))
+                    if dx * dx + dy * dy < radius_sq:
                         return True
         return False
 
+    def check_collisions(self, xs, ys, radii):
+        """Vectorized check_collision: mask of circles overlapping a solid tile.
+
+        Takes NumPy arrays of centres and radii (or one radius for all); like
+        check_collision, radii must not exceed a tile and off-map tiles don't count.
+        """
+        size = self.tile_size
+        grid_x = np.floor(xs / size)
+        grid_y = np.floor(ys / size)
+        radii_sq = np.square(radii)
+        hit = np.zeros(len(xs), dtype=bool)
+        for offset_y in (-1, 0, 1):
+            tile_y = grid_y + offset_y
+            dy = ys - np.clip(ys, tile_y * size, tile_y * size + size)
+            for offset_x in (-1, 0, 1):
+                tile_x = grid_x + offset_x
+                dx = xs - np.clip(xs, tile_x * size, tile_x * size + size)
+                hit |= self.blocking_tiles(tile_x, tile_y) & (dx * dx + dy * dy < radii_sq)
+        return hit
+
+    def blocking_tiles(self, tile_x, tile_y):
+        """Mask of solid tiles for check_collisions; off-map tiles never block"""
+        on_map = (tile_x >= 0) & (tile_x < self.grid_size) & (tile_y >= 0) & (tile_y < self.grid_size)
+        index = ((np.clip(tile_y, -1, self.grid_size) + 1) * self.stride
+                 + np.clip(tile_x, -1, self.grid_size) + 1).astype(np.intp)
+        return on_map & (self.solid_view[index] == 1)
+
+    def solid_window(self, left, top, width, height):
+        """Row-major solid bytes of a block of tiles; tiles off the map count as solid"""
+        window = bytearray([1]) * (width * height)
+        first_x = max(left, 0)
+        last_x = min(left + width, self.grid_size)
+        if first_x >= last_x:
+            return window
+        for row in range(max(top, 0) - top, min(top + height, self.grid_size) - top):
+            start = (top + row + 1) * self.stride + first_x + 1
+            window[row * width + first_x - left:row * width + last_x - left] = self.solid[start:start + last_x - first_x]
+        return window
+
+    def tile_type(self, grid_x, grid_y):
+        """Tile type at grid coordinates, or None off the map"""
+        if 0 <= grid_x < self.grid_size and 0 <= grid_y < self.grid_size:
+            return self.grid[grid_y][grid_x]
+        return None
+
+    def tile_at(self, x, y):
+        """Tile type at world coordinates, or None off the map"""
+        return self.tile_type(int(x // self.tile_size), int(y // self.tile_size))
+
+    def clamp_position(self, x, y, margin=0):
+        """Clamp a world position to at least margin pixels inside the map"""
+        return (max(margin, min(self.size - margin, x)),
+                max(margin, min(self.size - margin, y)))
+
+    def stream(self, x, y):
+        """Make sure the map around (x, y) is loaded; a fixed map always is"""
+
     def draw(self, screen, camera_x, camera_y):
-        """Optimized drawing with camera view"""
+        """Draw the visible map from cached chunk surfaces, then the decals"""
+        self.render_cache.draw(screen, camera_x, camera_y)
+        self.decals.draw(screen, camera_x, camera_y)
+
+    def draw_tiles(self, screen, camera_x, camera_y):
+        """Blit every visible tile separately (the uncached path, kept for comparison)"""
         start_x = max(0, int(camera_x // self.tile_size))
         end_x = min(self.grid_size, int((camera_x + WIDTH) // self.tile_size) + 1)
         start_y = max(0, int(camera_y // self.tile_size))
@@ -101,7 +329,10 @@ class GameMap:
         if self.assets and f"tile_{self.tile_defs[tile_type]['name']}" in self.assets.textures:
             return self.assets.textures[f"tile_{self.tile_defs[tile_type]['name']}"]
         
-        # Fallback to colored surface
-        surface = pygame.Surface((self.tile_size, self.tile_size))
-        surface.fill(self.tile_defs[tile_type]["color"])
+        # Fallback to colored surface, made once per tile type
+        surface = self.tile_textures.get(tile_type)
+        if surface is None:
+            surface = pygame.Surface((self.tile_size, self.tile_size))
+            surface.fill(self.tile_defs[tile_type]["color"])
+            self.tile_textures[tile_type] = surface
         return surface
@@ -0,0 +1,79 @@
+# map_render.py
+from collections import OrderedDict
+
+import pygame
+from config import *
+
+
+class MapRenderCache:
+    """Map tiles pre-rendered into surfaces of chunk_tiles x chunk_tiles tiles.
+
+    A chunk is baked from the map's tile textures the first time it is on
+    screen and reused until one of its tiles changes, so drawing the map costs
+    one blit per visible chunk. At most max_chunks surfaces are kept, the least
+    recently drawn being dropped first.
+    """
+    def __init__(self, game_map, chunk_tiles=RENDER_CHUNK_TILES, max_chunks=RENDER_CHUNK_CACHE_SIZE):
+        self.game_map = game_map
+        self.chunk_tiles = chunk_tiles
+        self.chunk_size = chunk_tiles * game_map.tile_size
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (chunk_x, chunk_y) -> Surface, least recently drawn first
+        self.bakes = 0  # Chunks rendered so far, for benchmarks and the profiler
+
+    def clear(self):
+        self.chunks.clear()
+
+    def invalidate(self, grid_x, grid_y):
+        """Forget the chunk holding a changed tile; it is baked again when next drawn"""
+        self.chunks.pop((grid_x // self.chunk_tiles, grid_y // self.chunk_tiles), None)
+
+    def bake(self, chunk_x, chunk_y):
+        """Render one chunk; tiles off a fixed-size map are left out of the surface"""
+        game_map = self.game_map
+        n = self.chunk_tiles
+        tile_size = game_map.tile_size
+        columns = rows = n
+        if game_map.size is not None:
+            columns = max(0, min(n, game_map.grid_size - chunk_x * n))
+            rows = max(0, min(n, game_map.grid_size - chunk_y * n))
+        surface = pygame.Surface((columns * tile_size, rows * tile_size))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()  # Display format blits without per-pixel conversion
+        origin_x = chunk_x * n
+        origin_y = chunk_y * n
+        blits = []
+        for y in range(rows):
+            for x in range(columns):
+                texture = game_map.get_tile_texture(game_map.tile_type(origin_x + x, origin_y + y))
+                blits.append((texture, (x * tile_size, y * tile_size)))
+        surface.blits(blits, False)
+        self.bakes += 1
+        return surface
+
+    def draw(self, screen, camera_x, camera_y):
+        """One blit per visible chunk, baking the ones not cached yet"""
+        size = self.chunk_size
+        start_x = int(camera_x // size)
+        end_x = int((camera_x + WIDTH) // size) + 1
+        start_y = int(camera_y // size)
+        end_y = int((camera_y + HEIGHT) // size) + 1
+        if self.game_map.size is not None:
+            last = (self.game_map.grid_size - 1) // self.chunk_tiles + 1
+            start_x, start_y = max(0, start_x), max(0, start_y)
+            end_x, end_y = min(last, end_x), min(last, end_y)
+
+        chunks = self.chunks
+        blits = []
+        for chunk_y in range(start_y, end_y):
+            for chunk_x in range(start_x, end_x):
+                key = (chunk_x, chunk_y)
+                surface = chunks.get(key)
+                if surface is None:
+                    surface = chunks[key] = self.bake(chunk_x, chunk_y)
+                else:
+                    chunks.move_to_end(key)
+                blits.append((surface, (int(chunk_x * size - camera_x), int(chunk_y * size - camera_y))))
+        while len(chunks) > max(self.max_chunks, len(blits)):
+            chunks.popitem(last=False)
+        screen.blits(blits, False)
@@ -1,13 +1,16 @@
 import pygame
 from config import *
 import math
+import game_clock
+from text_cache import TextCache
 
 class Menu:
     def __init__(self):
-        self.title_font = pygame.font.Font(None, 72)
-        self.menu_font = pygame.font.Font(None, 48)
-        self.hud_font = pygame.font.Font(None, 32)
-        self.small_font = pygame.font.Font(None, 24)  # Added small font
+        self.text = TextCache()  # Fonts and rendered strings, shared with Game's HUD text
+        self.title_font = self.text.font(72)
+        self.menu_font = self.text.font(48)
+        self.hud_font = self.text.font(32)
+        self.small_font = self.text.font(24)  # Added small font
 
         self.main_menu_options = ["Start Game", "Settings", "Quit"]
         self.main_menu_selected = 0
@@ -77,7 +80,7 @@ class Menu:
         }
 
     def draw_main_menu(self, screen):
-        """Draws the main menu."""
+        """Draws the main menu. Returns the rects that can change between frames."""
         screen.fill(COLORS["black"])
 
         # Draw animated title
@@ -86,12 +89,13 @@ class Menu:
             200 + int(55 * math.sin(pygame.time.get_ticks() / 500)), 
             0
         )
-        title_text = self.title_font.render("Zombie Survival", True, title_color)
+        title_text = self.text.render(self.title_font, "Zombie Survival", title_color)
         title_rect = title_text.get_rect(center=(WIDTH // 2, HEIGHT // 4))
         screen.blit(title_text, title_rect)
+        redrawn = [title_rect]
 
         # Draw subtitle
-        subtitle = self.small_font.render("Survive the undead apocalypse", True, COLORS["white"])
+        subtitle = self.text.render(self.small_font, "Survive the undead apocalypse", COLORS["white"])
         subtitle_rect = subtitle.get_rect(center=(WIDTH // 2, HEIGHT // 4 + 50))
         screen.blit(subtitle, subtitle_rect)
 
@@ -101,32 +105,34 @@ class Menu:
                 # Draw selection indicator
                 indicator_x = WIDTH // 2 - 120
                 indicator_y = HEIGHT // 2 + index * 60
-                pygame.draw.polygon(screen, COLORS["green"], 
+                redrawn.append(pygame.draw.polygon(screen, COLORS["green"], 
                     [(indicator_x, indicator_y), 
                      (indicator_x + 15, indicator_y + 8), 
-                     (indicator_x, indicator_y + 16)])
+                     (indicator_x, indicator_y + 16)]))
                 
                 color = COLORS["green"]
                 # Add pulsing effect to selected item
                 size = 52 + int(4 * math.sin(pygame.time.get_ticks() / 200))
-                option_font = pygame.font.Font(None, size)
+                option_font = self.text.font(size)
             else:
                 color = COLORS["white"]
                 option_font = self.menu_font
                 
-            option_text = option_font.render(option, True, color)
+            option_text = self.text.render(option_font, option, color)
             option_rect = option_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + index * 60))
             screen.blit(option_text, option_rect)
+            redrawn.append(option_rect)  # The selection moves between options
 
         # Draw controls help
-        controls_text = self.small_font.render("Use arrow keys to navigate, Enter to select", True, COLORS["white"])
+        controls_text = self.text.render(self.small_font, "Use arrow keys to navigate, Enter to select", COLORS["white"])
         controls_rect = controls_text.get_rect(center=(WIDTH // 2, HEIGHT - 50))
         screen.blit(controls_text, controls_rect)
 
         # Draw version number
-        version_text = self.small_font.render("v1.0", True, COLORS["white"])
+        version_text = self.text.render(self.small_font, "v1.0", COLORS["white"])
         version_rect = version_text.get_rect(bottomright=(WIDTH - 10, HEIGHT - 10))
         screen.blit(version_text, version_rect)
+        return redrawn
 
     def draw_settings(self, screen):
         """Draw the settings menu with animations"""
@@ -147,7 +153,7 @@ class Menu:
         offset_y = self.ui_animations.get("settings_offset", 0)
         
         # Draw title
-        title_text = self.menu_font.render("Settings", True, COLORS["white"])
+        title_text = self.text.render(self.menu_font, "Settings", COLORS["white"])
         title_rect = title_text.get_rect(center=(WIDTH // 2, 100 + offset_y))
         screen.blit(title_text, title_rect)
         
@@ -169,7 +175,7 @@ class Menu:
                 color = COLORS["white"]
             
             # Draw option text
-            option_text = self.menu_font.render(option, True, color)
+            option_text = self.text.render(self.menu_font, option, color)
             option_rect = option_text.get_rect(midleft=(WIDTH // 2 - 120, start_y + i * 50 + 10))
             screen.blit(option_text, option_rect)
             
@@ -183,24 +189,24 @@ class Menu:
             elif option == "Graphics Quality":
                 quality_labels = ["Low", "Medium", "High"]
                 quality = quality_labels[self.settings["graphics_quality"]]
-                value_text = self.small_font.render(quality, True, color)
+                value_text = self.text.render(self.small_font, quality, color)
                 screen.blit(value_text, (WIDTH // 2 + 120, start_y + i * 50 + 5))
             elif option == "Difficulty":
                 difficulty_labels = ["Easy", "Normal", "Hard"]
                 difficulty = difficulty_labels[self.settings["difficulty"]]
-                value_text = self.small_font.render(difficulty, True, color)
+                value_text = self.text.render(self.small_font, difficulty, color)
                 screen.blit(value_text, (WIDTH // 2 + 120, start_y + i * 50 + 5))
             elif option == "Show FPS":
                 state = "ON" if self.settings["show_fps"] else "OFF"
-                value_text = self.small_font.render(state, True, color)
+                value_text = self.text.render(self.small_font, state, color)
                 screen.blit(value_text, (WIDTH // 2 + 120, start_y + i * 50 + 5))
             elif option == "Show Minimap":
                 state = "ON" if self.settings["show_minimap"] else "OFF"
-                value_text = self.small_font.render(state, True, color)
+                value_text = self.text.render(self.small_font, state, color)
                 screen.blit(value_text, (WIDTH // 2 + 120, start_y + i * 50 + 5))
         
         # Draw controls help
-        controls_text = self.small_font.render("↑↓: Navigate   ←→: Adjust   Enter: Toggle   Esc: Back", True, COLORS["white"])
+        controls_text = self.text.render(self.small_font, "↑↓: Navigate   ←→: Adjust   Enter: Toggle   Esc: Back", COLORS["white"])
         controls_rect = controls_text.get_rect(center=(WIDTH // 2, HEIGHT - 50 + offset_y))
         screen.blit(controls_text, controls_rect)
 
@@ -222,7 +228,7 @@ class Menu:
         pygame.draw.circle(screen, COLORS["white"], (handle_x, y), 8)
         
         # Draw percentage
-        percent_text = self.small_font.render(f"{int(value * 100)}%", True, color)
+        percent_text = self.text.render(self.small_font, f"{int(value * 100)}%", color)
         screen.blit(percent_text, (x + slider_width + 10, y - 8))
 
     def draw_hud(self, screen, player, wave):
@@ -259,7 +265,7 @@ class Menu:
                               (health_x + i, health_y, 1, health_height))
         
         # Health text
-        health_text = self.small_font.render(f"{int(player.health)}/{player.max_health} HP", True, COLORS["white"])
+        health_text = self.text.render(self.small_font, f"{int(player.health)}/{player.max_health} HP", COLORS["white"])
         screen.blit(health_text, (health_x + health_width // 2 - health_text.get_width() // 2, 
                                health_y + health_height // 2 - health_text.get_height() // 2))
         
@@ -270,7 +276,7 @@ class Menu:
         # Current weapon display
         if hasattr(player, 'current_weapon'):
             weapon_name = player.current_weapon.name
-            weapon_text = self.small_font.render(weapon_name, True, COLORS["white"])
+            weapon_text = self.text.render(self.small_font, weapon_name, COLORS["white"])
             screen.blit(weapon_text, (weapon_x, weapon_y - 20))
             
             # Ammo display with dynamic coloring
@@ -285,15 +291,15 @@ class Menu:
             else:
                 ammo_color = COLORS["white"]
                 
-            ammo_text = self.small_font.render(f"Ammo: {ammo}/{max_ammo}", True, ammo_color)
+            ammo_text = self.text.render(self.small_font, f"Ammo: {ammo}/{max_ammo}", ammo_color)
             screen.blit(ammo_text, (weapon_x, weapon_y))
             
             # Reload indicator
             if player.reloading:
-                reload_progress = min(1.0, (pygame.time.get_ticks() - player.reload_start_time) / RELOAD_TIME)
+                reload_progress = min(1.0, (game_clock.get_ticks(player.clock) - player.reload_start_time) / RELOAD_TIME)
                 reload_width = 100 * reload_progress
                 pygame.draw.rect(screen, COLORS["yellow"], (weapon_x, weapon_y + 20, reload_width, 5))
-                reload_text = self.small_font.render("RELOADING", True, COLORS["yellow"])
+                reload_text = self.text.render(self.small_font, "RELOADING", COLORS["yellow"])
                 screen.blit(reload_text, (weapon_x + 110, weapon_y + 15))
         
         # Score and wave info
@@ -312,7 +318,7 @@ class Menu:
                 self.wave_pulse_time = 0
         self.last_wave = wave
         
-        wave_text = self.menu_font.render(f"Wave: {wave}", True, COLORS["red"])
+        wave_text = self.text.render(self.menu_font, f"Wave: {wave}", COLORS["red"])
         wave_text_rect = wave_text.get_rect(topright=(WIDTH - 20, 20 + pulse_amount))
         screen.blit(wave_text, wave_text_rect)
         
@@ -325,7 +331,7 @@ class Menu:
         elif self.displayed_score > player.score:  # Just in case
             self.displayed_score = player.score
             
-        score_text = self.small_font.render(f"Score: {self.displayed_score}", True, COLORS["white"])
+        score_text = self.text.render(self.small_font, f"Score: {self.displayed_score}", COLORS["white"])
         screen.blit(score_text, (score_x, score_y + 40))
         
         # Draw tutorial tip
@@ -335,7 +341,7 @@ class Menu:
             self.last_tip_change = current_time
             
         tip_alpha = min(255, (self.tip_display_time - (current_time - self.last_tip_change)) // 10)
-        tip_text = self.small_font.render(self.tips[self.current_tip], True, COLORS["white"])
+        tip_text = self.text.render(self.small_font, self.tips[self.current_tip], COLORS["white"])
         tip_surface = pygame.Surface((tip_text.get_width() + 20, tip_text.get_height() + 10), pygame.SRCALPHA)
         tip_surface.fill((0, 0, 0, 150))
         tip_surface.blit(tip_text, (10, 5))
@@ -392,7 +398,7 @@ class Menu:
                             slot_width, slot_height))
             
             # Draw weapon name
-            name_text = self.small_font.render(weapon.name.split()[0], True, COLORS["white"])
+            name_text = self.text.render(self.small_font, weapon.name.split()[0], COLORS["white"])
             name_rect = name_text.get_rect(center=(
                 start_x + i * (slot_width + spacing) + slot_width // 2,
                 start_y + 15
@@ -400,7 +406,7 @@ class Menu:
             screen.blit(name_text, name_rect)
             
             # Draw key number
-            key_text = self.small_font.render(f"{i+1}", True, COLORS["yellow"])
+            key_text = self.text.render(self.small_font, f"{i+1}", COLORS["yellow"])
             key_rect = key_text.get_rect(center=(
                 start_x + i * (slot_width + spacing) + slot_width // 2,
                 start_y + 35
@@ -408,7 +414,7 @@ class Menu:
             screen.blit(key_text, key_rect)
             
             # Draw ammo counter
-            ammo_text = self.small_font.render(f"{player.ammo.get(weapon.name, 0)}", True, COLORS["white"])
+            ammo_text = self.text.render(self.small_font, f"{player.ammo.get(weapon.name, 0)}", COLORS["white"])
             ammo_rect = ammo_text.get_rect(bottomright=(
                 start_x + i * (slot_width + spacing) + slot_width - 5,
                 start_y + slot_height - 5
@@ -436,7 +442,7 @@ class Menu:
         pygame.draw.circle(screen, COLORS["green"], (player_minimap_x, player_minimap_y), pulse_size)
         
         # Map title
-        map_text = self.small_font.render("MINIMAP", True, COLORS["white"])
+        map_text = self.text.render(self.small_font, "MINIMAP", COLORS["white"])
         map_rect = map_text.get_rect(center=(minimap_x + minimap_size//2, minimap_y - 10))
         screen.blit(map_text, map_rect)
 
@@ -460,7 +466,7 @@ class Menu:
             alpha = int(255 * (1 - (time_in_tip - 0.8) / 0.2))
         
         # Create a surface for the text with an alpha channel
-        tip_text = self.small_font.render(self.tips[self.current_tip], True, COLORS["yellow"])
+        tip_text = self.text.render(self.small_font, self.tips[self.current_tip], COLORS["yellow"]).copy()  # Faded below
         tip_alpha_surface = pygame.Surface(tip_text.get_size(), pygame.SRCALPHA)
         tip_alpha_surface.fill((255, 255, 255, alpha))
         tip_text.blit(tip_alpha_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
@@ -490,20 +496,20 @@ class Menu:
         pygame.draw.circle(screen, self.crosshair_color, (x, y), 2)
 
     def draw_game_over(self, screen, score):
-        """Draws the game over screen."""
+        """Draws the game over screen. Returns the rects that can change between frames."""
         screen.fill(COLORS["black"])
 
         # Draw animated game over text
         pulse = math.sin(pygame.time.get_ticks() / 200) * 5
         game_over_size = 72 + int(pulse)
-        game_over_font = pygame.font.Font(None, game_over_size)
+        game_over_font = self.text.font(game_over_size)
         
-        game_over_text = game_over_font.render("Game Over", True, COLORS["red"])
+        game_over_text = self.text.render(game_over_font, "Game Over", COLORS["red"])
         game_over_rect = game_over_text.get_rect(center=(WIDTH // 2, HEIGHT // 3))
         screen.blit(game_over_text, game_over_rect)
 
         # Draw stats with labels
-        score_text = self.menu_font.render(f"Final Score: {score:,}", True, COLORS["white"])
+        score_text = self.text.render(self.menu_font, f"Final Score: {score:,}", COLORS["white"])
         score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
         screen.blit(score_text, score_rect)
 
@@ -511,21 +517,22 @@ class Menu:
         pygame.draw.line(screen, COLORS["red"], (WIDTH//4, HEIGHT//2 + 50), (WIDTH*3//4, HEIGHT//2 + 50), 3)
 
         # Option buttons with highlight effect
-        restart_text = self.menu_font.render("Press R to Restart", True, COLORS["green"])
+        restart_text = self.text.render(self.menu_font, "Press R to Restart", COLORS["green"])
         restart_rect = restart_text.get_rect(center=(WIDTH // 2, HEIGHT * 2 // 3))
         
         # Draw button background that pulses
         pulse_width = int(restart_rect.width + 20 + 10 * math.sin(pygame.time.get_ticks() / 300))
-        pygame.draw.rect(screen, (30, 70, 30), 
+        button_rect = pygame.draw.rect(screen, (30, 70, 30), 
                        (restart_rect.centerx - pulse_width//2, 
                         restart_rect.centery - restart_rect.height//2 - 5,
                         pulse_width, restart_rect.height + 10))
         
         screen.blit(restart_text, restart_rect)
 
-        menu_text = self.menu_font.render("Press ESC for Menu", True, COLORS["blue"])
+        menu_text = self.text.render(self.menu_font, "Press ESC for Menu", COLORS["blue"])
         menu_rect = menu_text.get_rect(center=(WIDTH // 2, HEIGHT * 2 // 3 + 60))
         screen.blit(menu_text, menu_rect)
+        return [game_over_rect, score_rect, button_rect]
 
     def main_menu_select_next(self):
         """Selects the next main menu option."""
@@ -560,22 +567,29 @@ class Menu:
         self.minimap_overlay.fill((0, 0, 0, 0))
         
         # Calculate visible area based on zoom
-        visible_size = MAP_SIZE / self.minimap_zoom
+        map_size = game_map.size  # None for a chunked map, which has no edge
+        visible_size = (map_size or MAP_SIZE) / self.minimap_zoom
         map_scale = minimap_size / visible_size
         
         # Calculate minimap boundaries
         player_x = player.rect.centerx
         player_y = player.rect.centery
-        min_x = max(0, player_x - visible_size // 2)
-        min_y = max(0, player_y - visible_size // 2)
-        max_x = min(MAP_SIZE, min_x + visible_size)
-        max_y = min(MAP_SIZE, min_y + visible_size)
+        if map_size is None:
+            min_x = player_x - visible_size // 2
+            min_y = player_y - visible_size // 2
+            max_x = min_x + visible_size
+            max_y = min_y + visible_size
+        else:
+            min_x = max(0, player_x - visible_size // 2)
+            min_y = max(0, player_y - visible_size // 2)
+            max_x = min(map_size, min_x + visible_size)
+            max_y = min(map_size, min_y + visible_size)
         
         # Update fog of war
         view_radius = 300  # Visible radius around player
         for x in range(int(player_x - view_radius), int(player_x + view_radius), 32):
             for y in range(int(player_y - view_radius), int(player_y + view_radius), 32):
-                if 0 <= x < MAP_SIZE and 0 <= y < MAP_SIZE:
+                if map_size is None or (0 <= x < map_size and 0 <= y < map_size):
                     dist = math.hypot(x - player_x, y - player_y)
                     if dist <= view_radius:
                         self.fog_of_war.add((x // 32, y // 32))
@@ -588,8 +602,8 @@ class Menu:
                     map_y = int((tile_y * 32 - min_y) * map_scale)
                     tile_size = max(1, int(32 * map_scale))
                     
-                    if 0 <= tile_x < game_map.grid_size and 0 <= tile_y < game_map.grid_size:
-                        tile_type = game_map.grid[tile_y][tile_x]
+                    tile_type = game_map.tile_at(tile_x * 32, tile_y * 32)
+                    if tile_type is not None:
                         color = COLORS["dark_gray"]  # Default color
                         if hasattr(game_map, 'tile_defs') and tile_type in game_map.tile_defs:
                             color = game_map.tile_defs[tile_type]["color"]
@@ -640,7 +654,7 @@ class Menu:
                         (minimap_x, minimap_y, minimap_size, minimap_size), 2)
         
         # Draw zoom level indicator
-        zoom_text = self.small_font.render(f"Zoom: {self.minimap_zoom:.1f}x", True, COLORS["white"])
+        zoom_text = self.text.render(self.small_font, f"Zoom: {self.minimap_zoom:.1f}x", COLORS["white"])
         screen.blit(zoom_text, (minimap_x, minimap_y - 20))
 
     def handle_minimap_input(self, event):
@@ -717,13 +731,13 @@ class Menu:
             else:
                 color = COLORS["white"]
                 
-            name_text = self.small_font.render(weapon.name.split()[0], True, color)
+            name_text = self.text.render(self.small_font, weapon.name.split()[0], color)
             name_rect = name_text.get_rect(center=(name_x, name_y))
             screen.blit(name_text, name_rect)
             
             # Draw ammo count
             ammo = player.ammo.get(weapon.name, 0)
-            ammo_text = self.small_font.render(f"{ammo}", True, color)
+            ammo_text = self.text.render(self.small_font, f"{ammo}", color)
             ammo_rect = ammo_text.get_rect(center=(name_x, name_y + 20))
             screen.blit(ammo_text, ammo_rect)
             
@@ -743,16 +757,16 @@ class Menu:
         
         # Draw center circle with current weapon
         pygame.draw.circle(screen, COLORS["blue"], (center_x, center_y), 40)
-        current_text = self.small_font.render("Current", True, COLORS["white"])
+        current_text = self.text.render(self.small_font, "Current", COLORS["white"])
         current_rect = current_text.get_rect(center=(center_x, center_y - 10))
         screen.blit(current_text, current_rect)
         
-        weapon_text = self.small_font.render(player.current_weapon.name.split()[0], True, COLORS["white"])
+        weapon_text = self.text.render(self.small_font, player.current_weapon.name.split()[0], COLORS["white"])
         weapon_rect = weapon_text.get_rect(center=(center_x, center_y + 10))
         screen.blit(weapon_text, weapon_rect)
         
         # Draw instruction text
-        instruction = self.small_font.render("Release TAB to select", True, COLORS["white"])
+        instruction = self.text.render(self.small_font, "Release TAB to select", COLORS["white"])
         instruction_rect = instruction.get_rect(center=(center_x, center_y + self.wheel_radius + 30))
         screen.blit(instruction, instruction_rect)
 
@@ -817,7 +831,7 @@ class Menu:
                 else:
                     color = COLORS["white"]
                     
-                name_text = self.small_font.render(item["name"], True, color)
+                name_text = self.text.render(self.small_font, item["name"], color)
                 name_rect = name_text.get_rect(center=(name_x, name_y))
                 screen.blit(name_text, name_rect)
                 
@@ -836,12 +850,12 @@ class Menu:
                     pygame.draw.polygon(screen, (255, 255, 0, 30), points)
         else:
             # Show "No items" message if inventory is empty
-            no_items_text = self.small_font.render("No items", True, COLORS["white"])
+            no_items_text = self.text.render(self.small_font, "No items", COLORS["white"])
             no_items_rect = no_items_text.get_rect(center=(center_x, center_y))
             screen.blit(no_items_text, no_items_rect)
         
         # Draw instruction text
-        instruction = self.small_font.render("Release Q to use item", True, COLORS["white"])
+        instruction = self.text.render(self.small_font, "Release Q to use item", COLORS["white"])
         instruction_rect = instruction.get_rect(center=(center_x, center_y + self.items_wheel_radius + 30))
         screen.blit(instruction, instruction_rect)
 
@@ -3,46 +3,52 @@ import random
 import math
 from config import *
 
+try:
+    import numpy as np
+except ImportError:  # Without NumPy particles fall back to one Particle object each
+    np = None
+
 class Particle:
-    def __init__(self, x, y, color, particle_type="default"):
+    def __init__(self, x, y, color, particle_type="default", rng=None):
+        self.rng = rng if rng is not None else random
         self.x = x
         self.y = y
         self.color = color
         self.type = particle_type
-        self.size = random.randint(2, 5)
-        self.lifetime = random.randint(10, 20)
+        self.size = self.rng.randint(2, 5)
+        self.lifetime = self.rng.randint(10, 20)
         self.alpha = 255
         self.max_lifetime = self.lifetime
         
         # Set particle behavior based on type
         if self.type == "explosion":
-            self.vx = random.uniform(-3, 3)
-            self.vy = random.uniform(-3, 3)
+            self.vx = self.rng.uniform(-3, 3)
+            self.vy = self.rng.uniform(-3, 3)
             self.decay_rate = 0.15
-            self.size_decay = random.uniform(0.1, 0.2)
+            self.size_decay = self.rng.uniform(0.1, 0.2)
         elif self.type == "blood":
-            self.vx = random.uniform(-1.5, 1.5)
-            self.vy = random.uniform(-1.5, 1.5) + 0.5  # Blood falls down slightly
+            self.vx = self.rng.uniform(-1.5, 1.5)
+            self.vy = self.rng.uniform(-1.5, 1.5) + 0.5  # Blood falls down slightly
             self.decay_rate = 0.1
-            self.size_decay = random.uniform(0.05, 0.1)
+            self.size_decay = self.rng.uniform(0.05, 0.1)
         elif self.type == "impact":
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(1, 3)
+            angle = self.rng.uniform(0, 2 * math.pi)
+            speed = self.rng.uniform(1, 3)
             self.vx = math.cos(angle) * speed
             self.vy = math.sin(angle) * speed
             self.decay_rate = 0.2
-            self.size_decay = random.uniform(0.1, 0.15)
+            self.size_decay = self.rng.uniform(0.1, 0.15)
         elif self.type == "sparkle":
-            self.vx = random.uniform(-0.5, 0.5)
-            self.vy = random.uniform(-0.5, 0.5) - 0.2  # Sparkles rise slightly
+            self.vx = self.rng.uniform(-0.5, 0.5)
+            self.vy = self.rng.uniform(-0.5, 0.5) - 0.2  # Sparkles rise slightly
             self.decay_rate = 0.15
-            self.size_decay = random.uniform(0.05, 0.1)
+            self.size_decay = self.rng.uniform(0.05, 0.1)
             self.pulsing = True
-            self.pulse_rate = random.uniform(0.2, 0.4)
-            self.pulse_offset = random.uniform(0, 2 * math.pi)
+            self.pulse_rate = self.rng.uniform(0.2, 0.4)
+            self.pulse_offset = self.rng.uniform(0, 2 * math.pi)
         else:  # default
-            self.vx = random.uniform(-2, 2)
-            self.vy = random.uniform(-2, 2)
+            self.vx = self.rng.uniform(-2, 2)
+            self.vy = self.rng.uniform(-2, 2)
             self.decay_rate = 0.1
             self.size_decay = 0.1
             self.pulsing = False
@@ -81,101 +87,386 @@ class Particle:
             self.size *= pulse_factor
 
     def draw(self, screen, camera_x=0, camera_y=0):
-        if self.lifetime > 0 and self.size > 0:
-            # Create a surface with per-pixel alpha
-            particle_surface = pygame.Surface((int(self.size * 2) + 1, int(self.size * 2) + 1), pygame.SRCALPHA)
-            
-            # Draw different shapes based on particle type
-            if self.type == "sparkle":
-                # For sparkles, draw a star-like shape
-                color_with_alpha = (*self.color, self.alpha)
-                center = (int(self.size) + 1, int(self.size) + 1)
-                
-                # Draw star shape
-                points = []
-                outer_radius = self.size
-                inner_radius = self.size * 0.4
-                for i in range(8):  # 8-pointed star
-                    angle = i * math.pi / 4
-                    if i % 2 == 0:
-                        radius = outer_radius
-                    else:
-                        radius = inner_radius
-                    x = center[0] + radius * math.cos(angle)
-                    y = center[1] + radius * math.sin(angle)
-                    points.append((x, y))
-                
-                pygame.draw.polygon(particle_surface, color_with_alpha, points)
+        if self.lifetime > 0:
+            draw_particle(screen, self.type, self.x, self.y, self.size, self.color, self.alpha,
+                          self.rng, camera_x, camera_y)
+
+
+def draw_particle(screen, particle_type, x, y, size, color, alpha, rng=random, camera_x=0, camera_y=0):
+    """Draw one particle centred on world position (x, y)"""
+    if size > 0:
+        # Create a surface with per-pixel alpha
+        particle_surface = pygame.Surface((int(size * 2) + 1, int(size * 2) + 1), pygame.SRCALPHA)
+        
+        # Draw different shapes based on particle type
+        if particle_type == "sparkle":
+            # For sparkles, draw a star-like shape
+            color_with_alpha = (*color, alpha)
+            center = (int(size) + 1, int(size) + 1)
             
-            elif self.type == "blood":
-                # For blood, draw irregular shapes
-                color_with_alpha = (*self.color, self.alpha)
-                pygame.draw.circle(particle_surface, color_with_alpha, 
-                                  (int(self.size) + 1, int(self.size) + 1), int(self.size))
-                
-                # Add some splatter effect
-                if self.size > 2:
-                    for _ in range(2):
-                        offset_x = random.uniform(-self.size/2, self.size/2)
-                        offset_y = random.uniform(-self.size/2, self.size/2)
-                        pygame.draw.circle(particle_surface, color_with_alpha,
-                                          (int(self.size + offset_x) + 1, int(self.size + offset_y) + 1), 
-                                           int(self.size / 2))
+            # Draw star shape
+            points = []
+            outer_radius = size
+            inner_radius = size * 0.4
+            for i in range(8):  # 8-pointed star
+                angle = i * math.pi / 4
+                if i % 2 == 0:
+                    radius = outer_radius
+                else:
+                    radius = inner_radius
+                points.append((center[0] + radius * math.cos(angle),
+                               center[1] + radius * math.sin(angle)))
             
-            else:
-                # Standard circle for other particle types
-                color_with_alpha = (*self.color, self.alpha)
-                pygame.draw.circle(particle_surface, color_with_alpha, 
-                                  (int(self.size) + 1, int(self.size) + 1), int(self.size))
+            pygame.draw.polygon(particle_surface, color_with_alpha, points)
+        
+        elif particle_type == "blood":
+            # For blood, draw irregular shapes
+            color_with_alpha = (*color, alpha)
+            pygame.draw.circle(particle_surface, color_with_alpha, 
+                              (int(size) + 1, int(size) + 1), int(size))
             
-            # Blit the particle surface
-            screen.blit(particle_surface, 
-                       (int(self.x - self.size - camera_x), 
-                        int(self.y - self.size - camera_y)))
+            # Add some splatter effect
+            if size > 2:
+                for _ in range(2):
+                    offset_x = rng.uniform(-size/2, size/2)
+                    offset_y = rng.uniform(-size/2, size/2)
+                    pygame.draw.circle(particle_surface, color_with_alpha,
+                                      (int(size + offset_x) + 1, int(size + offset_y) + 1), 
+                                       int(size / 2))
+        
+        else:
+            # Standard circle for other particle types
+            color_with_alpha = (*color, alpha)
+            pygame.draw.circle(particle_surface, color_with_alpha, 
+                              (int(size) + 1, int(size) + 1), int(size))
+        
+        # Blit the particle surface
+        screen.blit(particle_surface, 
+                   (int(x - size - camera_x), 
+                    int(y - size - camera_y)))
 
 
 class ParticleSystem:
-    def __init__(self):
+    def __init__(self, rng=None, max_particles=500):
+        # Particles are cosmetic and should draw from the game's cosmetic stream
+        self.rng = rng if rng is not None else random
         self.particles = []
-        self.max_particles = 500  # Limit to prevent performance issues
+        self.max_particles = max_particles  # Limit to prevent performance issues
+
+    def __len__(self):
+        return len(self.particles)
 
     def add_explosion(self, x, y, color=COLORS['red'], count=20):
         """Add explosion effect"""
         for _ in range(min(count, self.max_particles - len(self.particles))):
-            self.particles.append(Particle(x, y, color, "explosion"))
+            self.particles.append(Particle(x, y, color, "explosion", self.rng))
 
-    def add_blood_effect(self, x, y, count=15):
-        """Add blood splatter effect"""
+    def add_blood_effect(self, x, y, count=15, lifetime=None):
+        """Add blood splatter effect; lifetime caps the ticks the drops last"""
         for _ in range(min(count, self.max_particles - len(self.particles))):
-            self.particles.append(Particle(x, y, COLORS['dark_red'], "blood"))
+            particle = Particle(x, y, COLORS['dark_red'], "blood", self.rng)
+            if lifetime is not None:
+                particle.lifetime = particle.max_lifetime = min(particle.lifetime, lifetime)
+            self.particles.append(particle)
     
     def add_impact(self, x, y, color=COLORS['white'], count=10):
         """Add impact/collision effect"""
         for _ in range(min(count, self.max_particles - len(self.particles))):
-            self.particles.append(Particle(x, y, color, "impact"))
+            self.particles.append(Particle(x, y, color, "impact", self.rng))
     
     def add_sparkle(self, x, y, color=COLORS['gold'], count=5):
         """Add sparkle/powerup effect"""
         for _ in range(min(count, self.max_particles - len(self.particles))):
-            self.particles.append(Particle(x, y, color, "sparkle"))
+            self.particles.append(Particle(x, y, color, "sparkle", self.rng))
 
     def add_trail(self, x, y, color, trail_length=5):
         """Add trail effect (for fast movement)"""
         for i in range(trail_length):
             if len(self.particles) < self.max_particles:
-                p = Particle(x, y, color)
+                p = Particle(x, y, color, rng=self.rng)
                 p.size = max(1, 3 - i * 0.5)  # Decreasing size
-                p.vx = random.uniform(-0.5, 0.5)
-                p.vy = random.uniform(-0.5, 0.5)
+                p.vx = self.rng.uniform(-0.5, 0.5)
+                p.vy = self.rng.uniform(-0.5, 0.5)
                 p.lifetime = max(5, 10 - i * 2)  # Decreasing lifetime
                 self.particles.append(p)
 
     def update(self):
-        for particle in self.particles[:]:
+        for particle in self.particles:
             particle.update()
-            if particle.lifetime <= 0 or particle.size <= 0:
-                self.particles.remove(particle)
+        self.particles = [p for p in self.particles if p.lifetime > 0 and p.size > 0]
 
-    def draw(self, screen, camera_x=0, camera_y=0):
+    def draw(self, screen, camera_x=0, camera_y=0, viewport=None):
+        """Blit the live particles; with a viewport, only those it can see"""
+        atlas = particle_atlas()
+        blits = []
         for particle in self.particles:
-            particle.draw(screen, camera_x, camera_y)
+            if particle.lifetime > 0 and particle.size > 0:
+                if viewport is not None and not viewport.visible(particle.x, particle.y, particle.size):
+                    continue
+                sprite, size = atlas.sprite(particle.type, particle.color, particle.size, particle.alpha)
+                blits.append((sprite, (int(particle.x - size - camera_x), int(particle.y - size - camera_y))))
+        screen.blits(blits, False)
+        if viewport is not None:
+            viewport.record("particles", len(blits), len(self.particles))
+
+
+# Atlas layout: sizes in half-pixel steps up to 5 px, alpha in 16 buckets
+ATLAS_SIZE_STEPS = 11
+ATLAS_ALPHA_BUCKETS = 16
+ATLAS_SHEET_SPRITES = ATLAS_SIZE_STEPS * ATLAS_ALPHA_BUCKETS
+ATLAS_DEFAULT_SHEETS = (("explosion", COLORS['red']), ("blood", COLORS['dark_red']),
+                        ("impact", COLORS['white']), ("sparkle", COLORS['gold']))
+
+
+class ParticleAtlas:
+    """Pre-rendered particle sprites: one sheet per (type, colour), size step x alpha bucket.
+
+    A sheet occupies consecutive entries of self.sprites, so the sprite of a
+    particle is sheet offset + size step * ATLAS_ALPHA_BUCKETS + alpha bucket.
+    """
+    def __init__(self, sheets=ATLAS_DEFAULT_SHEETS):
+        self.sprites = []
+        self.offsets = {}
+        for kind, color in sheets:
+            self.sheet(kind, color)
+
+    def sheet(self, kind, color):
+        """Offset of a sheet in self.sprites, rendering it the first time it is asked for"""
+        key = (kind, tuple(color))
+        offset = self.offsets.get(key)
+        if offset is None:
+            offset = self.offsets[key] = len(self.sprites)
+            splatter = random.Random(0)  # Blood splatter is baked in, the same every run
+            for step in range(ATLAS_SIZE_STEPS):
+                size = step / 2
+                for bucket in range(ATLAS_ALPHA_BUCKETS):
+                    sprite = pygame.Surface((step + 1, step + 1), pygame.SRCALPHA)
+                    draw_particle(sprite, kind, size, size, size, key[1], bucket * 16 + 15, splatter)
+                    self.sprites.append(sprite)
+        return offset
+
+    def sprite(self, kind, color, size, alpha):
+        """Sprite closest to a particle, with the quantized size to position it by"""
+        step = min(ATLAS_SIZE_STEPS - 1, int(size * 2 + 0.5))
+        index = self.sheet(kind, color) + step * ATLAS_ALPHA_BUCKETS + min(alpha, 255) // 16
+        return self.sprites[index], step / 2
+
+
+_atlas = None
+
+
+def particle_atlas():
+    """The shared atlas, built on the first draw (sprites need pygame initialised)"""
+    global _atlas
+    if _atlas is None:
+        _atlas = ParticleAtlas()
+    return _atlas
+
+
+# Per-kind physics of the array engine, indexed by PARTICLE_KINDS
+PARTICLE_KINDS = ("default", "explosion", "blood", "impact", "sparkle")
+KIND_IDS = {kind: i for i, kind in enumerate(PARTICLE_KINDS)}
+KIND_FRICTION = (1.0, 0.9, 0.95, 1.0, 0.98)
+KIND_GRAVITY = (0.0, 0.0, 0.05, 0.0, 0.0)
+FLOAT_COLUMNS = ("x", "y", "vx", "vy", "size", "size_decay", "pulse_rate", "pulse_offset")
+INT_COLUMNS = ("lifetime", "max_lifetime", "kind", "palette_id")
+PARTICLE_NOISE_BLOCK = 1024  # Uniform numbers drawn per Generator call
+
+
+class ParticleArraySystem(ParticleSystem):
+    """ParticleSystem keeping every particle in preallocated NumPy columns.
+
+    Rows 0..count-1 are live. Emitters fill new rows in one go, update integrates,
+    decays and culls the whole pool with array operations, and dead rows are
+    filled from the live tail so the pool stays packed.
+    """
+    def __init__(self, rng=None, max_particles=MAX_PARTICLES):
+        self.rng = rng if rng is not None else random
+        self.max_particles = max_particles
+        self.count = 0
+        for name in FLOAT_COLUMNS:
+            setattr(self, name, np.zeros(max_particles))
+        for name in INT_COLUMNS:
+            setattr(self, name, np.zeros(max_particles, dtype=np.int32))
+        # (type, colour) pairs seen so far; palette_id indexes this list
+        self.palette = []
+        self.palette_ids = {}
+        # Emitters draw in bulk from a NumPy generator seeded off the cosmetic stream
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        self.noise = np.zeros(0)
+        self.noise_pos = 0
+        self.friction = np.array(KIND_FRICTION)
+        self.gravity = np.array(KIND_GRAVITY)
+        self.time_ms = 0.0  # Simulated clock driving the sparkle pulse
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, kind, x, y, color, count):
+        """Claim up to count new rows at (x, y); returns the slice to fill in"""
+        count = max(0, min(count, self.max_particles - self.count))
+        rows = slice(self.count, self.count + count)
+        self.count += count
+        self.x[rows] = x
+        self.y[rows] = y
+        self.kind[rows] = KIND_IDS[kind]
+        key = (kind, tuple(color))
+        palette_id = self.palette_ids.get(key)
+        if palette_id is None:
+            palette_id = self.palette_ids[key] = len(self.palette)
+            self.palette.append(key)
+        self.palette_id[rows] = palette_id
+        self.size[rows] = self.uniform(2, 6, rows) // 1
+        self.lifetime[rows] = self.max_lifetime[rows] = self.uniform(10, 21, rows)
+        # A zero rate with a quarter-turn offset keeps the pulse factor at exactly 1
+        self.pulse_rate[rows] = 0.0
+        self.pulse_offset[rows] = math.pi / 2
+        return rows
+
+    def uniform(self, low, high, rows):
+        """Uniform numbers for the emitted rows, cut from a pre-drawn block.
+
+        Emitters ask for a handful of numbers at a time, where a Generator call
+        costs more than the numbers themselves.
+        """
+        count = rows.stop - rows.start
+        if self.noise_pos + count > len(self.noise):
+            self.noise = self.np_rng.random(max(count, PARTICLE_NOISE_BLOCK))
+            self.noise_pos = 0
+        block = self.noise[self.noise_pos:self.noise_pos + count]
+        self.noise_pos += count
+        return low + (high - low) * block
+
+    def add_explosion(self, x, y, color=COLORS['red'], count=20):
+        """Add explosion effect"""
+        rows = self.emit("explosion", x, y, color, count)
+        self.vx[rows] = self.uniform(-3, 3, rows)
+        self.vy[rows] = self.uniform(-3, 3, rows)
+        self.size_decay[rows] = self.uniform(0.1, 0.2, rows)
+
+    def add_blood_effect(self, x, y, count=15, lifetime=None):
+        """Add blood splatter effect; lifetime caps the ticks the drops last"""
+        rows = self.emit("blood", x, y, COLORS['dark_red'], count)
+        if lifetime is not None:
+            self.lifetime[rows] = self.max_lifetime[rows] = np.minimum(self.lifetime[rows], lifetime)
+        self.vx[rows] = self.uniform(-1.5, 1.5, rows)
+        self.vy[rows] = self.uniform(-1.5, 1.5, rows) + 0.5  # Blood falls down slightly
+        self.size_decay[rows] = self.uniform(0.05, 0.1, rows)
+
+    def add_impact(self, x, y, color=COLORS['white'], count=10):
+        """Add impact/collision effect"""
+        rows = self.emit("impact", x, y, color, count)
+        angle = self.uniform(0, 2 * math.pi, rows)
+        speed = self.uniform(1, 3, rows)
+        self.vx[rows] = np.cos(angle) * speed
+        self.vy[rows] = np.sin(angle) * speed
+        self.size_decay[rows] = self.uniform(0.1, 0.15, rows)
+
+    def add_sparkle(self, x, y, color=COLORS['gold'], count=5):
+        """Add sparkle/powerup effect"""
+        rows = self.emit("sparkle", x, y, color, count)
+        self.vx[rows] = self.uniform(-0.5, 0.5, rows)
+        self.vy[rows] = self.uniform(-0.5, 0.5, rows) - 0.2  # Sparkles rise slightly
+        self.size_decay[rows] = self.uniform(0.05, 0.1, rows)
+        self.pulse_rate[rows] = self.uniform(0.2, 0.4, rows)
+        self.pulse_offset[rows] = self.uniform(0, 2 * math.pi, rows)
+
+    def add_trail(self, x, y, color, trail_length=5):
+        """Add trail effect (for fast movement)"""
+        rows = self.emit("default", x, y, color, trail_length)
+        steps = np.arange(rows.stop - rows.start)
+        self.size[rows] = np.maximum(1, 3 - steps * 0.5)  # Decreasing size
+        self.vx[rows] = self.uniform(-0.5, 0.5, rows)
+        self.vy[rows] = self.uniform(-0.5, 0.5, rows)
+        self.lifetime[rows] = np.maximum(5, 10 - steps * 2)  # Decreasing lifetime
+        self.size_decay[rows] = 0.1
+
+    def update(self):
+        """Integrate, decay and cull every live particle"""
+        self.time_ms += 1000 / FPS
+        n = self.count
+        if n == 0:
+            return
+        vx = self.vx[:n]
+        vy = self.vy[:n]
+        self.x[:n] += vx
+        self.y[:n] += vy
+        kind = self.kind[:n]
+        friction = self.friction[kind]
+        vx *= friction
+        vy *= friction
+        vy += self.gravity[kind]
+        size = self.size[:n]
+        size -= self.size_decay[:n]
+        np.maximum(size, 0, out=size)
+        lifetime = self.lifetime[:n]
+        lifetime -= 1
+
+        alive = (lifetime > 0) & (size > 0)
+        survivors = int(np.count_nonzero(alive))
+        if survivors < n:
+            # Swap-compact: live rows past the new end move into the dead rows before it
+            holes = np.flatnonzero(~alive[:survivors])
+            movers = survivors + np.flatnonzero(alive[survivors:])
+            for name in FLOAT_COLUMNS + INT_COLUMNS:
+                column = getattr(self, name)
+                column[holes] = column[movers]
+            self.count = survivors
+
+    def draw_sizes(self):
+        """Current sizes of the live particles with the sparkle pulse applied"""
+        n = self.count
+        pulse = 0.5 + 0.5 * np.sin(self.time_ms / 100 * self.pulse_rate[:n] + self.pulse_offset[:n])
+        return self.size[:n] * pulse
+
+    def draw(self, screen, camera_x=0, camera_y=0, viewport=None):
+        """Blit the particles that land on screen; a viewport gets the drawn/culled counts"""
+        n = self.count
+        if viewport is not None:
+            viewport.record("particles", 0, n)
+        if n == 0:
+            return
+        # Snap every particle to its atlas sprite and blit the lot in one call
+        steps = np.minimum(np.rint(self.draw_sizes() * 2), ATLAS_SIZE_STEPS - 1).astype(np.intp)
+        left = (self.x[:n] - steps * 0.5 - camera_x).astype(np.intp)
+        top = (self.y[:n] - steps * 0.5 - camera_y).astype(np.intp)
+        visible = np.flatnonzero((steps > 0) & (left + steps >= 0) & (left < screen.get_width())
+                                 & (top + steps >= 0) & (top < screen.get_height()))
+        if viewport is not None:
+            viewport.record("particles", len(visible), n)
+        if len(visible) == 0:
+            return
+        atlas = particle_atlas()
+        offsets = np.array([atlas.sheet(*key) for key in self.palette], dtype=np.intp)
+        buckets = np.minimum(255 * self.lifetime[visible] // self.max_lifetime[visible], 255) // 16
+        sprite_ids = offsets[self.palette_id[visible]] + steps[visible] * ATLAS_ALPHA_BUCKETS + buckets
+        positions = zip(left[visible].tolist(), top[visible].tolist())
+        screen.blits(zip(map(atlas.sprites.__getitem__, sprite_ids.tolist()), positions), False)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            state[name] = state[name][:self.count].copy()
+        state["noise"] = self.noise[self.noise_pos:].copy()  # Only the unused numbers
+        state["noise_pos"] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Pad the trimmed columns back out to the full pool
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            column = getattr(self, name)
+            pool = np.zeros(self.max_particles, dtype=column.dtype)
+            pool[:self.count] = column
+            setattr(self, name, pool)
+
+
+def create_particle_system(rng=None, use_arrays=USE_PARTICLE_ARRAYS):
+    """The NumPy particle engine when available, otherwise the Particle object list"""
+    if use_arrays and ParticleArraySystem.available():
+        return ParticleArraySystem(rng)
+    return ParticleSystem(rng)
@@ -0,0 +1,347 @@
+# pathfinder.py
+import heapq
+import math
+from collections import OrderedDict
+
+from config import *
+from flow_field import FieldSearch, NEIGHBOURS, STRAIGHT_COST, DIAGONAL_COST, UNREACHED
+
+
+class Cluster:
+    """One square of cluster_tiles x cluster_tiles tiles in the abstract graph.
+
+    Entrances are the tiles where a route can cross into a neighbouring
+    cluster; for each one the cluster keeps its abstract steps (the tiles it
+    crosses to, and every other entrance it can reach inside the cluster, with
+    their costs). Distance fields towards entrances and goal tiles, which paths
+    are refined from, are kept until the cluster is dropped.
+    """
+    __slots__ = ("left", "top", "stride", "open_cells", "entrances", "steps", "fields")
+
+    def __init__(self, left, top, stride, open_cells):
+        self.left = left
+        self.top = top
+        self.stride = stride
+        self.open_cells = open_cells  # Padded like FlowField, one solid cell around the cluster
+        self.entrances = {}  # entrance tile -> tiles across the border it steps to
+        self.steps = {}  # entrance tile -> [(tile, cost)] of its edges in the abstract graph
+        self.fields = {}  # tile -> distance list towards it
+
+    def cell_of(self, tile):
+        return (tile[1] - self.top + 1) * self.stride + tile[0] - self.left + 1
+
+    def tile_of(self, cell):
+        row, column = divmod(cell, self.stride)
+        return self.left + column - 1, self.top + row - 1
+
+    def field_to(self, tile):
+        """Distances from every cell of the cluster to one of its tiles"""
+        distance = self.fields.get(tile)
+        if distance is not None:
+            return distance
+        distance = self.fields[tile] = [UNREACHED] * len(self.open_cells)
+        cell = self.cell_of(tile)
+        if self.open_cells[cell]:
+            distance[cell] = 0
+            FieldSearch(self.open_cells, self.stride, distance, [cell]).run()
+        return distance
+
+    def descend(self, field, tile):
+        """Tiles from tile down a distance field to its zero, or None if it is not reached"""
+        open_cells = self.open_cells
+        stride = self.stride
+        cell = self.cell_of(tile)
+        if field[cell] >= UNREACHED:
+            return None
+        tiles = []
+        while field[cell]:
+            best = cell
+            for step_x, step_y in NEIGHBOURS:
+                neighbour = cell + step_y * stride + step_x
+                if field[neighbour] < field[best] and (
+                        not (step_x and step_y)
+                        or (open_cells[cell + step_x] and open_cells[cell + step_y * stride])):
+                    best = neighbour
+            cell = best
+            tiles.append(self.tile_of(cell))
+        return tiles
+
+
+class Path:
+    """Route from a tile to a goal tile, refined one abstract step at a time as it is followed.
+
+    Pass it as the flow_field of Zombie.move_towards: sample() gives the
+    direction to the next tile on the route, and None once the goal tile is
+    reached (or the route went stale after a tile change), at which point the
+    zombie steers straight at its target.
+    """
+    def __init__(self, pathfinder, nodes):
+        self.pathfinder = pathfinder
+        self.nodes = nodes  # Start tile, entrance tiles, goal tile
+        self.next_node = 1  # Index in nodes of the end of the next segment to refine
+        self.map_version = len(pathfinder.game_map.tile_changes)
+        self.tiles = []  # Refined tiles still ahead
+
+    @property
+    def goal(self):
+        return self.nodes[-1]
+
+    def refine(self):
+        """Append the tiles of the next abstract step; False when there are none left"""
+        if self.next_node >= len(self.nodes):
+            return False
+        if len(self.pathfinder.game_map.tile_changes) != self.map_version:
+            self.next_node = len(self.nodes)  # The map changed under the route; find a new one
+            return False
+        start = self.nodes[self.next_node - 1]
+        end = self.nodes[self.next_node]
+        self.next_node += 1
+        tiles = self.pathfinder.refine(start, end)
+        if tiles is None:
+            self.next_node = len(self.nodes)
+            return False
+        self.tiles.extend(tiles)
+        return True
+
+    def sample(self, x, y, tile_size=TILE_SIZE):
+        """Unit direction from a world position towards the next tile of the route, or None"""
+        tile = (int(x // tile_size), int(y // tile_size))
+        tiles = self.tiles
+        if tile in tiles:
+            del tiles[:tiles.index(tile) + 1]
+        while not tiles:
+            if not self.refine():
+                return None
+            if tile in tiles:
+                del tiles[:tiles.index(tile) + 1]
+        dx = (tiles[0][0] + 0.5) * tile_size - x
+        dy = (tiles[0][1] + 0.5) * tile_size - y
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return None
+        return dx / length, dy / length
+
+
+class HierarchicalPathfinder:
+    """HPA* routes over a GameMap for zombies that need their own destination.
+
+    The map is cut into clusters of cluster_tiles x cluster_tiles tiles. The
+    abstract graph links the entrances between neighbouring clusters with the
+    costs of crossing each cluster, so a query searches a few entrances per
+    cluster instead of every tile, and the returned Path is only turned into
+    tiles a cluster at a time as it is followed. Step costs match the flow
+    field's (2 straight, 3 diagonal).
+
+    Clusters are built on first use (precompute() builds a fixed-size map's
+    up front), and entrance sequences are cached by (start cluster, goal
+    cluster). Tiles changed through set_tile drop the clusters around them and
+    every cached route crossing those clusters. On an unbounded chunked map
+    the least recently used clusters are dropped past max_clusters.
+    """
+    def __init__(self, game_map, cluster_tiles=HPA_CLUSTER_TILES, cache_size=HPA_PATH_CACHE_SIZE,
+                 max_clusters=HPA_CLUSTER_CACHE_SIZE, max_nodes=HPA_SEARCH_NODES):
+        self.game_map = game_map
+        self.cluster_tiles = cluster_tiles
+        self.cache_size = cache_size
+        self.max_clusters = max_clusters
+        self.max_nodes = max_nodes  # Abstract nodes expanded before a query gives up
+        self.clusters = OrderedDict()  # (cluster_x, cluster_y) -> Cluster, least recently used first
+        self.routes = OrderedDict()  # (start cluster, goal cluster) -> (entrances, clusters crossed)
+        self.map_version = 0  # Entries of game_map.tile_changes already applied
+        self.hits = self.misses = 0  # Route cache counters, for benchmarks and the profiler
+
+    def cluster_key(self, tile):
+        return tile[0] // self.cluster_tiles, tile[1] // self.cluster_tiles
+
+    def precompute(self):
+        """Build every cluster of a fixed-size map"""
+        if self.game_map.size is None:
+            return
+        count = -(-self.game_map.grid_size // self.cluster_tiles)
+        for cluster_y in range(count):
+            for cluster_x in range(count):
+                self.cluster((cluster_x, cluster_y))
+
+    def cluster(self, key):
+        """The cluster at key, built if needed"""
+        cluster = self.clusters.get(key)
+        if cluster is not None:
+            self.clusters.move_to_end(key)
+            return cluster
+        cluster = self.clusters[key] = self.build_cluster(key)
+        return cluster
+
+    def build_cluster(self, key):
+        n = self.cluster_tiles
+        left, top = key[0] * n, key[1] * n
+        # The solid flags of the cluster and the ring of tiles around it
+        side = n + 2
+        window = self.game_map.solid_window(left - 1, top - 1, side, side)
+        open_cells = bytearray(side * side)
+        for row in range(1, n + 1):
+            for column in range(1, n + 1):
+                open_cells[row * side + column] = not window[row * side + column]
+        cluster = Cluster(left, top, side, open_cells)
+
+        # An entrance for every run of open tiles facing open tiles across a
+        # border: one in the middle of a short run, one at each end of a wide one
+        borders = (
+            (side + 1, side, side),  # West: first inside cell, first outside cell, step along the border
+            (side + n, side + n + 1, side),  # East
+            (side + 1, 1, 1),  # North
+            (n * side + 1, (n + 1) * side + 1, 1),  # South
+        )
+        for first_inside, first_outside, step in borders:
+            run = []
+            for i in range(n + 1):
+                inside = first_inside + i * step
+                outside = first_outside + i * step
+                if i < n and open_cells[inside] and not window[outside]:
+                    run.append((inside, outside))
+                    continue
+                if run:
+                    picks = (run[0], run[-1]) if len(run) >= HPA_WIDE_ENTRANCE else (run[(len(run) - 1) // 2],)
+                    for inside, outside in picks:
+                        cluster.entrances.setdefault(cluster.tile_of(inside), []).append(cluster.tile_of(outside))
+                    run = []
+
+        for entrance, crossings in cluster.entrances.items():
+            field = cluster.field_to(entrance)
+            steps = cluster.steps[entrance] = [(tile, STRAIGHT_COST) for tile in crossings]
+            for other in cluster.entrances:
+                cost = field[cluster.cell_of(other)]
+                if other != entrance and cost < UNREACHED:
+                    steps.append((other, cost))
+        return cluster
+
+    def apply_tile_changes(self):
+        """Drop the clusters and cached routes affected by tiles changed since the last query"""
+        changes = self.game_map.tile_changes[self.map_version:]
+        if not changes:
+            return
+        self.map_version = len(self.game_map.tile_changes)
+        n = self.cluster_tiles
+        dropped = set()
+        for grid_x, grid_y in changes:
+            cluster_x, cluster_y = grid_x // n, grid_y // n
+            dropped.add((cluster_x, cluster_y))
+            # A tile on a border also moves the entrances of the cluster across it
+            if grid_x % n == 0:
+                dropped.add((cluster_x - 1, cluster_y))
+            elif grid_x % n == n - 1:
+                dropped.add((cluster_x + 1, cluster_y))
+            if grid_y % n == 0:
+                dropped.add((cluster_x, cluster_y - 1))
+            elif grid_y % n == n - 1:
+                dropped.add((cluster_x, cluster_y + 1))
+        for key in dropped:
+            self.clusters.pop(key, None)
+        for route, (entrances, crossed) in list(self.routes.items()):
+            if not crossed.isdisjoint(dropped):
+                del self.routes[route]
+
+    def find_path(self, start_x, start_y, goal_x, goal_y):
+        """Path between two world positions, or None if the goal cannot be reached"""
+        self.apply_tile_changes()
+        while len(self.clusters) > self.max_clusters:
+            self.clusters.popitem(last=False)
+        tile_size = self.game_map.tile_size
+        start = (int(start_x // tile_size), int(start_y // tile_size))
+        goal = (int(goal_x // tile_size), int(goal_y // tile_size))
+        start_key = self.cluster_key(start)
+        goal_key = self.cluster_key(goal)
+        start_cluster = self.cluster(start_key)
+        goal_cluster = self.cluster(goal_key)
+        goal_field = goal_cluster.field_to(goal)
+        if goal_field[goal_cluster.cell_of(goal)] >= UNREACHED:
+            return None
+        if start_key == goal_key and goal_field[start_cluster.cell_of(start)] < UNREACHED:
+            return Path(self, [start, goal])  # A route inside one cluster
+
+        # Costs from the start to its cluster's entrances and from the goal cluster's entrances to the goal
+        start_costs = {}
+        start_cell = start_cluster.cell_of(start)
+        for entrance in start_cluster.entrances:
+            cost = start_cluster.fields[entrance][start_cell]
+            if cost < UNREACHED:
+                start_costs[entrance] = cost
+        goal_costs = {}
+        for entrance in goal_cluster.entrances:
+            cost = goal_field[goal_cluster.cell_of(entrance)]
+            if cost < UNREACHED:
+                goal_costs[entrance] = cost
+
+        route = self.routes.get((start_key, goal_key))
+        if route is not None and route[0][0] in start_costs and route[0][-1] in goal_costs:
+            self.routes.move_to_end((start_key, goal_key))
+            self.hits += 1
+            return Path(self, [start] + route[0] + [goal])
+        self.misses += 1
+
+        entrances = self.search(start, goal, start_costs, goal_costs)
+        if entrances is None:
+            return None
+        crossed = frozenset(self.cluster_key(tile) for tile in entrances)
+        self.routes[(start_key, goal_key)] = (entrances, crossed)
+        if len(self.routes) > self.cache_size:
+            self.routes.popitem(last=False)
+        return Path(self, [start] + entrances + [goal])
+
+    def search(self, start, goal, start_costs, goal_costs):
+        """A* over the entrances from start to goal; the entrance tiles in between, or None"""
+        goal_x, goal_y = goal
+        extra = DIAGONAL_COST - STRAIGHT_COST
+
+        def estimate(tile):
+            # Octile distance in step costs, never more than the real cost
+            dx = abs(tile[0] - goal_x)
+            dy = abs(tile[1] - goal_y)
+            return STRAIGHT_COST * dx + extra * dy if dx > dy else STRAIGHT_COST * dy + extra * dx
+
+        best = {}
+        parent = {}
+        queue = []
+        order = 0  # Tie-breaker so the heap never compares tiles
+        for entrance, cost in start_costs.items():
+            best[entrance] = cost
+            parent[entrance] = None
+            heapq.heappush(queue, (cost + estimate(entrance), order, cost, entrance))
+            order += 1
+        expanded = 0
+        final = None
+        final_cost = UNREACHED
+        while queue:
+            _, _, cost, tile = heapq.heappop(queue)
+            if cost > best.get(tile, UNREACHED):
+                continue
+            if cost + estimate(tile) >= final_cost:
+                break
+            expanded += 1
+            if expanded > self.max_nodes:
+                return None
+            if tile in goal_costs and cost + goal_costs[tile] < final_cost:
+                final, final_cost = tile, cost + goal_costs[tile]
+            cluster = self.cluster(self.cluster_key(tile))
+            for other, step in cluster.steps.get(tile, ()):
+                total = cost + step
+                if total < best.get(other, UNREACHED):
+                    best[other] = total
+                    parent[other] = tile
+                    heapq.heappush(queue, (total + estimate(other), order, total, other))
+                    order += 1
+        if final is None:
+            return None
+        entrances = []
+        while final is not None:
+            entrances.append(final)
+            final = parent[final]
+        entrances.reverse()
+        return entrances
+
+    def refine(self, start, end):
+        """Tiles after start up to end: a step across a border, or a walk inside one cluster"""
+        key = self.cluster_key(end)
+        if self.cluster_key(start) != key:
+            return [end]  # Entrances across a border are neighbouring tiles
+        cluster = self.cluster(key)
+        return cluster.descend(cluster.field_to(end), start)
@@ -1,10 +1,11 @@
 import pygame
 from config import *
 import math
+import game_clock
 from weapon import Pistol, Shotgun, AssaultRifle, SniperRifle, SubmachineGun, GrenadeLauncher  # Import all weapons
 
 class Player:
-    def __init__(self, game_map):
+    def __init__(self, game_map, rng=None, clock=None):
         self.rect = pygame.Rect(WIDTH // 2, HEIGHT // 2, 32, 32)
         self.game_map = game_map
         self.color = COLORS["green"]
@@ -12,6 +13,12 @@ class Player:
         self.health = PLAYER_HEALTH
         self.max_health = PLAYER_HEALTH
         self.weapons = [Pistol(), Shotgun(), AssaultRifle(), SniperRifle(), SubmachineGun(), GrenadeLauncher()] #add all weapons.
+        if rng is not None:
+            for weapon in self.weapons:
+                weapon.rng = rng
+        self.clock = clock  # The game's GameClock; gameplay timers read it
+        for weapon in self.weapons:
+            weapon.clock = clock
         self.current_weapon_index = 0
         self.ammo = {  # Store ammo per weapon type
             "Pistol": MAX_AMMO["pistol"],
@@ -29,6 +36,7 @@ class Player:
         self.invulnerable_timer = 0
         self.inventory = []  # Initialize the inventory list
         self.knockback = [0, 0]
+        self.prev_center = self.rect.center  # Position at the start of the last tick
 
     @property
     def current_weapon(self):
@@ -40,16 +48,18 @@ class Player:
             max_ammo = self.current_weapon.max_ammo
             if self.ammo[weapon_name] < max_ammo:
                 self.reloading = True
-                self.reload_start_time = pygame.time.get_ticks()
+                self.reload_start_time = game_clock.get_ticks(self.clock)
 
     def update_reload(self):
-        if self.reloading and pygame.time.get_ticks() - self.reload_start_time > RELOAD_TIME:
+        if self.reloading and game_clock.get_ticks(self.clock) - self.reload_start_time > RELOAD_TIME:
             weapon_name = self.current_weapon.name
             self.ammo[weapon_name] = self.current_weapon.max_ammo
             self.reloading = False
 
     def update(self, dx, dy, game_map, mouse_x, mouse_y, weapon_switch, shoot):
         """Updates player position, weapon, and shooting."""
+        self.prev_center = self.rect.center
+
         # Apply movement speed
         dx *= self.speed
         dy *= self.speed
@@ -63,7 +73,7 @@ class Player:
         
         # Update invulnerability status
         if self.invulnerable:
-            if pygame.time.get_ticks() - self.invulnerable_timer > 1000:  # 1 second of invulnerability
+            if game_clock.get_ticks(self.clock) - self.invulnerable_timer > 1000:  # 1 second of invulnerability
                 self.invulnerable = False
         
         # Update reload status
@@ -113,7 +123,7 @@ class Player:
         if not self.invulnerable:
             self.health = max(0, self.health - amount)
             self.invulnerable = True
-            self.invulnerable_timer = pygame.time.get_ticks()
+            self.invulnerable_timer = game_clock.get_ticks(self.clock)
 
     def heal(self, amount):
         self.health = min(self.max_health, self.health + amount)
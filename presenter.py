@@ -0,0 +1,115 @@
+# presenter.py
+import pygame
+from config import *
+
+try:
+    import numpy as np
+except ImportError:  # Without NumPy static screens are compared as a whole
+    np = None
+
+
+class FramePresenter:
+    """Puts each finished frame on the display with a single present call.
+
+    A game frame scrolls with the camera and changes everywhere, so it is
+    flipped whole. Static screens (main menu, pause, game over) mostly redraw
+    the same pixels and report the rects of what they animate; those are
+    pushed with pygame.display.update(rects), together with the rects of the
+    frame before, which the shrinking part of an animation leaves behind. The
+    first static frame after anything else is presented whole.
+
+    Screens that report no rects (settings, the profiler overlay) fall back to
+    comparing the pixels with the last frame presented in blocks of block_size
+    pixels, pushing only the runs of changed blocks. A frame identical to the
+    last is not presented at all.
+    """
+    def __init__(self, block_size=PRESENT_BLOCK_SIZE):
+        self.block_size = block_size
+        self.previous = None  # Pixels of the last static frame compared
+        self.last_rects = None  # Rects reported by the last static frame; None presents the next one whole
+        self.flips = self.updates = self.skipped = 0  # Presents by kind, for benchmarks and the profiler
+        self.dirty_rects = 0  # Rects pushed by the last present
+        self.dirty_area = 0  # Pixels pushed by the last present
+
+    def present(self, screen, static=False, rects=None):
+        """Show the frame drawn on screen; static frames push only what changed since the last one.
+
+        rects are the parts of a static frame that differ from the last one;
+        without them the changes are found by comparing pixels.
+        """
+        if not static:
+            self.invalidate()
+            pygame.display.flip()
+            self.flips += 1
+            self.dirty_rects = 1
+            self.dirty_area = screen.get_width() * screen.get_height()
+            return
+        if rects is None:
+            self.last_rects = None
+            rects = self.changed_rects(screen)
+        else:
+            self.previous = None  # The pixels compared last are out of date from here on
+            if self.last_rects is None:
+                self.last_rects = rects
+                rects = [screen.get_rect()]
+            else:
+                rects, self.last_rects = self.last_rects + rects, rects
+        self.dirty_rects = len(rects)
+        self.dirty_area = sum(rect.width * rect.height for rect in rects)
+        if rects:
+            pygame.display.update(rects)
+            self.updates += 1
+        else:
+            self.skipped += 1
+
+    def invalidate(self):
+        """Make the next static frame present in full, e.g. after the window was exposed"""
+        self.previous = None
+        self.last_rects = None
+
+    def changed_rects(self, screen):
+        """Rects covering the blocks of screen that differ from the last static frame"""
+        full = [screen.get_rect()]
+        if np is None:
+            current = screen.get_buffer().raw
+            changed = current != self.previous
+            self.previous = current
+            return full if changed else []
+
+        # The screen's pixels as a (height, width * units) array, one unit per
+        # 32-bit pixel or one per byte for other depths
+        width, height = screen.get_size()
+        units = 1 if screen.get_bytesize() == 4 else screen.get_bytesize()
+        buffer = screen.get_buffer()
+        pixels = np.frombuffer(buffer, dtype=np.uint32 if units == 1 else np.uint8)
+        pixels = pixels.reshape(height, -1)[:, :width * units]
+        previous = self.previous
+        if previous is None or previous.shape != pixels.shape:
+            self.previous = pixels.copy()
+            del pixels, buffer  # Unlock the screen before presenting it
+            return full
+        changed = pixels != previous
+        np.copyto(previous, pixels)
+        del pixels, buffer
+
+        # Changed pixels reduced to one flag per block, indexed [block_y, block_x]
+        size = self.block_size
+        full_rows = height - height % size
+        rows = changed[:full_rows].reshape(-1, size, changed.shape[1]).any(axis=1)
+        if full_rows < height:
+            rows = np.vstack((rows, changed[full_rows:].any(axis=0)))
+        span = size * units
+        padding = -rows.shape[1] % span
+        if padding:
+            rows = np.hstack((rows, np.zeros((rows.shape[0], padding), dtype=bool)))
+        blocks = rows.reshape(rows.shape[0], -1, span).any(axis=2)
+
+        rects = []
+        for block_y in np.flatnonzero(blocks.any(axis=1)).tolist():
+            # One rect per run of changed blocks along the row
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], blocks[block_y].view(np.int8), [0]))))
+            top = block_y * size
+            for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+                left = start * size
+                rects.append(pygame.Rect(left, top, min(end * size, width) - left, min(size, height - top)))
+        return rects
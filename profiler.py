@@ -0,0 +1,238 @@
+# profiler.py
+import contextlib
+import csv
+import json
+import time
+from array import array
+
+import pygame
+from config import *
+
+# Overlay palette, assigned to stages in the order they are first timed
+STAGE_COLORS = [
+    (230, 25, 75), (60, 180, 75), (255, 225, 25), (0, 130, 200), (245, 130, 48),
+    (145, 30, 180), (70, 240, 240), (240, 50, 230), (210, 245, 60), (250, 190, 212),
+    (0, 128, 128), (220, 190, 255), (170, 110, 40), (255, 250, 200), (128, 0, 0),
+    (170, 255, 195), (128, 128, 0), (255, 215, 180), (0, 0, 128), (128, 128, 128),
+]
+
+_NULL_SECTION = contextlib.nullcontext()
+
+
+class _Section:
+    __slots__ = ("profiler", "index", "start")
+
+    def __init__(self, profiler, index):
+        self.profiler = profiler
+        self.index = index
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        profiler = self.profiler
+        profiler.stage_samples[self.index][profiler.head] += time.perf_counter_ns() - self.start
+        return False
+
+
+class FrameProfiler:
+    """Times each stage of a frame with perf_counter_ns into a fixed-size ring buffer.
+
+    Stages are leaf sections of the frame (one per update/draw pass) so they can be
+    stacked; whatever part of the frame they do not cover is reported as "other".
+    """
+    def __init__(self, capacity=PROFILER_SETTINGS["history"], enabled=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.head = 0  # Slot being filled by the current frame
+        self.frame_count = 0  # Completed frames (saturates at capacity in reads)
+        self.frame_start = None
+        self.frame_samples = array('q', bytes(8 * capacity))
+        self.stage_names = []
+        self.stage_index = {}
+        self.stage_samples = []
+        self.counters = {}  # Latest value of free-form per-frame counters
+        self.show_overlay = False
+        self.overlay = None
+
+    def stage(self, name):
+        """Index of a stage, allocating its ring buffer on first use"""
+        index = self.stage_index.get(name)
+        if index is None:
+            index = len(self.stage_names)
+            self.stage_names.append(name)
+            self.stage_index[name] = index
+            self.stage_samples.append(array('q', bytes(8 * self.capacity)))
+        return index
+
+    def section(self, name):
+        """Context manager adding the elapsed time of the block to a stage"""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, self.stage(name))
+
+    def set_counter(self, name, value):
+        self.counters[name] = value
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if self.frame_start is not None:
+            # Close the previous frame: its time runs from one begin_frame to the next
+            self.frame_samples[self.head] = now - self.frame_start
+            self.frame_count += 1
+            self.head = (self.head + 1) % self.capacity
+            for samples in self.stage_samples:
+                samples[self.head] = 0
+        self.frame_start = now
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+
+    def recent_frames(self, count=None):
+        """Slot indexes of completed frames, oldest first"""
+        available = min(self.frame_count, self.capacity - 1)
+        if count is not None:
+            available = min(available, count)
+        return [(self.head - available + i) % self.capacity for i in range(available)]
+
+    def stage_average_ms(self, name, frames=60):
+        slots = self.recent_frames(frames)
+        if not slots or name not in self.stage_index:
+            return 0.0
+        samples = self.stage_samples[self.stage_index[name]]
+        return sum(samples[i] for i in slots) / len(slots) / 1e6
+
+    def rows(self):
+        """Completed frames as dicts of milliseconds, oldest first"""
+        result = []
+        for slot in self.recent_frames():
+            frame_ns = self.frame_samples[slot]
+            row = {"frame": frame_ns / 1e6}
+            staged = 0
+            for name, samples in zip(self.stage_names, self.stage_samples):
+                row[name] = samples[slot] / 1e6
+                staged += samples[slot]
+            row["other"] = max(0, frame_ns - staged) / 1e6
+            result.append(row)
+        return result
+
+    def dump_json(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "stages": self.stage_names + ["other"],
+                "counters": self.counters,
+                "frames_ms": self.rows(),
+            }, f, indent=1)
+
+    def dump_csv(self, path):
+        columns = ["frame"] + self.stage_names + ["other"]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([f"{column}_ms" for column in columns])
+            for row in self.rows():
+                writer.writerow([f"{row.get(column, 0.0):.4f}" for column in columns])
+
+    def dump(self, basename=None):
+        """Write both JSON and CSV dumps; returns the base path used"""
+        basename = basename or time.strftime("profile_%Y%m%d_%H%M%S")
+        self.dump_json(basename + ".json")
+        self.dump_csv(basename + ".csv")
+        print(f"Profiler dump written to {basename}.json/.csv")
+        return basename
+
+    def draw(self, screen):
+        if self.show_overlay:
+            if self.overlay is None:
+                self.overlay = ProfilerOverlay(self)
+            self.overlay.draw(screen)
+
+
+class ProfilerOverlay:
+    """Stacked bar of the last frame, a scrolling frame-time graph and a legend"""
+    def __init__(self, profiler, width=PROFILER_SETTINGS["graph_width"], height=PROFILER_SETTINGS["graph_height"]):
+        self.profiler = profiler
+        self.width = width
+        self.height = height
+        self.budget_ms = 1000 / FPS
+        self.ms_per_pixel = self.budget_ms * 2 / height  # Graph spans two frame budgets
+        self.graph = pygame.Surface((width, height))
+        self.graph.fill((20, 20, 20))
+        self.font = pygame.font.Font(None, 16)
+        self.last_frame_drawn = 0
+        self.legend = None
+        self.legend_frame = -1
+
+    def color(self, index):
+        return STAGE_COLORS[index % len(STAGE_COLORS)]
+
+    def update_graph(self):
+        """Scroll the graph and draw one stacked column per newly completed frame"""
+        profiler = self.profiler
+        new_frames = min(profiler.frame_count - self.last_frame_drawn, self.width)
+        if new_frames <= 0:
+            return
+        self.graph.scroll(-new_frames, 0)
+        self.graph.fill((20, 20, 20), (self.width - new_frames, 0, new_frames, self.height))
+        slots = profiler.recent_frames(new_frames)
+        for column, slot in enumerate(slots):
+            x = self.width - len(slots) + column
+            y = self.height
+            for index, samples in enumerate(profiler.stage_samples):
+                pixels = int(samples[slot] / 1e6 / self.ms_per_pixel)
+                if pixels > 0:
+                    pygame.draw.line(self.graph, self.color(index), (x, y - 1), (x, y - pixels))
+                    y -= pixels
+            # Unattributed time (sleep, untimed code) on top in grey
+            frame_top = self.height - int(profiler.frame_samples[slot] / 1e6 / self.ms_per_pixel)
+            if frame_top < y:
+                pygame.draw.line(self.graph, (90, 90, 90), (x, y - 1), (x, max(0, frame_top)))
+        budget_y = self.height - int(self.budget_ms / self.ms_per_pixel)
+        pygame.draw.line(self.graph, COLORS["white"], (self.width - new_frames, budget_y), (self.width, budget_y))
+        self.last_frame_drawn = profiler.frame_count
+
+    def update_legend(self):
+        profiler = self.profiler
+        # Re-render the legend a few times a second rather than every frame
+        if self.legend is not None and profiler.frame_count - self.legend_frame < 15:
+            return
+        self.legend_frame = profiler.frame_count
+        lines = []
+        for index, name in enumerate(profiler.stage_names):
+            lines.append((self.color(index), f"{name}: {profiler.stage_average_ms(name):.2f} ms"))
+        for name, value in profiler.counters.items():
+            lines.append((COLORS["light_gray"], f"{name}: {value}"))
+        font = self.font
+        line_height = font.get_linesize()
+        self.legend = pygame.Surface((self.width, max(1, line_height * len(lines))), pygame.SRCALPHA)
+        self.legend.fill((0, 0, 0, 160))
+        for i, (color, text) in enumerate(lines):
+            pygame.draw.rect(self.legend, color, (2, i * line_height + 2, 7, 7))
+            self.legend.blit(font.render(text, True, COLORS["white"]), (14, i * line_height))
+
+    def draw(self, screen):
+        profiler = self.profiler
+        self.update_graph()
+        self.update_legend()
+        x, y = PROFILER_SETTINGS["position"]
+
+        # Stacked bar for the most recent frame
+        slots = profiler.recent_frames(1)
+        bar_height = 10
+        pygame.draw.rect(screen, (20, 20, 20), (x, y, self.width, bar_height))
+        if slots:
+            slot = slots[0]
+            bar_x = x
+            for index, samples in enumerate(profiler.stage_samples):
+                pixels = int(samples[slot] / 1e6 / (self.budget_ms / self.width))
+                if pixels > 0:
+                    pygame.draw.rect(screen, self.color(index), (bar_x, y, pixels, bar_height))
+                    bar_x += pixels
+            frame_ms = profiler.frame_samples[slot] / 1e6
+            label = self.font.render(f"frame {frame_ms:.2f} ms", True, COLORS["white"])
+            screen.blit(label, (x + self.width + 6, y))
+
+        screen.blit(self.graph, (x, y + bar_height + 4))
+        screen.blit(self.legend, (x, y + bar_height + 8 + self.height))
@@ -0,0 +1,311 @@
+# replay.py
+import io
+import pickle
+import struct
+import zlib
+from config import *
+from input_source import InputFrame
+
+# File layout: header, then tagged sections (tag, payload length, payload)
+REPLAY_MAGIC = b"ZRPL"
+REPLAY_VERSION = 1
+HEADER_FORMAT = "<4sHqd"          # magic, version, seed, tick length in ms
+SECTION_FORMAT = "<4sI"           # tag, payload length
+FRAME_FORMAT = "<bbffbbB"         # dx, dy, aim_x, aim_y, weapon_switch, use_item, flags
+KEYFRAME_FORMAT = "<II8s"         # tick, wave, world hash
+WAVE_START_FORMAT = "<II"         # wave, tick
+
+FLAG_SHOOT = 1
+FLAG_RELOAD = 2
+
+KEYFRAME_INTERVAL = 30 * FPS      # Periodic snapshot every 30 seconds of game time
+
+
+def encode_frame(frame):
+    flags = (FLAG_SHOOT if frame.shoot else 0) | (FLAG_RELOAD if frame.reload else 0)
+    return struct.pack(
+        FRAME_FORMAT, frame.dx, frame.dy, frame.aim_x, frame.aim_y,
+        -1 if frame.weapon_switch is None else frame.weapon_switch,
+        -1 if frame.use_item is None else frame.use_item,
+        flags
+    )
+
+def decode_frame(data, offset=0):
+    dx, dy, aim_x, aim_y, weapon_switch, use_item, flags = struct.unpack_from(FRAME_FORMAT, data, offset)
+    return InputFrame(
+        dx, dy, aim_x, aim_y,
+        shoot=bool(flags & FLAG_SHOOT),
+        weapon_switch=None if weapon_switch < 0 else weapon_switch,
+        reload=bool(flags & FLAG_RELOAD),
+        use_item=None if use_item < 0 else use_item
+    )
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """Pickles game state by reference to the shared map, clock and random streams"""
+    def __init__(self, file, game):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.shared = {id(game.game_map): ("map",), id(game.game_clock): ("clock",)}
+        for name, stream in game.rng.streams.items():
+            self.shared[id(stream)] = ("rng", name)
+
+    def persistent_id(self, obj):
+        return self.shared.get(id(obj))
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file, game):
+        super().__init__(file)
+        self.game = game
+
+    def persistent_load(self, pid):
+        if pid[0] == "map":
+            return self.game.game_map
+        if pid[0] == "clock":
+            return self.game.game_clock
+        return self.game.rng.stream(pid[1])
+
+
+def capture_snapshot(game):
+    """Serialize the simulation state at the start of the current tick"""
+    state = {
+        "tick": game.game_clock.tick_count,
+        "rng": game.rng.getstate(),
+        "player": game.player,
+        "wave_manager": game.wave_manager,
+        "bullets": game.bullets,
+        "pickups": getattr(game, 'pickups', []),
+        "damage_indicators": getattr(game, 'damage_indicators', []),
+        "particle_system": game.particle_system,
+        "effects": game.effects,
+        "selected_item_index": game.menu.selected_item_index,
+    }
+    buffer = io.BytesIO()
+    _SnapshotPickler(buffer, game).dump(state)
+    return zlib.compress(buffer.getvalue())
+
+def restore_snapshot(game, blob):
+    """Load a snapshot produced by capture_snapshot into a game with the same seed"""
+    state = _SnapshotUnpickler(io.BytesIO(zlib.decompress(blob)), game).load()
+    game.game_clock.tick_count = state["tick"]
+    game.rng.setstate(state["rng"])
+    game.player = state["player"]
+    game.wave_manager = state["wave_manager"]
+    game.bullets = state["bullets"]
+    game.pickups = state["pickups"]
+    game.rebuild_pickup_hash()  # The zombie hash travels with the wave manager
+    game.damage_indicators = state["damage_indicators"]
+    game.particle_system = state["particle_system"]
+    game.effects = state["effects"]
+    game.menu.selected_item_index = state["selected_item_index"]
+
+
+class Replay:
+    """Recorded session: seed, world mode, one input frame per tick, keyframes and wave start ticks"""
+    def __init__(self, seed, step_ms, world="fixed"):
+        self.seed = seed
+        self.step_ms = step_ms
+        self.world = world  # Map kind the session was played on; files without a WRLD section are "fixed"
+        self.frames = bytearray()  # Packed FRAME_FORMAT records
+        self.keyframes = []  # (tick, wave, world_hash, snapshot blob), ordered by tick
+        self.wave_starts = {}  # wave number -> first tick of that wave
+
+    @property
+    def tick_count(self):
+        return len(self.frames) // struct.calcsize(FRAME_FORMAT)
+
+    def frame(self, tick):
+        return decode_frame(self.frames, tick * struct.calcsize(FRAME_FORMAT))
+
+    def keyframe_before(self, tick):
+        """Latest keyframe at or before a tick, or None"""
+        best = None
+        for keyframe in self.keyframes:
+            if keyframe[0] > tick:
+                break
+            best = keyframe
+        return best
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, REPLAY_MAGIC, REPLAY_VERSION, self.seed, self.step_ms))
+            self._write_section(f, b"WRLD", self.world.encode("ascii"))
+            self._write_section(f, b"INPT", zlib.compress(bytes(self.frames), 9))
+            waves = b"".join(struct.pack(WAVE_START_FORMAT, wave, tick)
+                             for wave, tick in sorted(self.wave_starts.items()))
+            self._write_section(f, b"WAVE", waves)
+            for tick, wave, world_hash, blob in self.keyframes:
+                self._write_section(f, b"KEYF", struct.pack(KEYFRAME_FORMAT, tick, wave, world_hash) + blob)
+
+    @staticmethod
+    def _write_section(f, tag, payload):
+        f.write(struct.pack(SECTION_FORMAT, tag, len(payload)))
+        f.write(payload)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, seed, step_ms = struct.unpack_from(HEADER_FORMAT, data, 0)
+        if magic != REPLAY_MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        if version != REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version {version}")
+
+        replay = cls(seed, step_ms)
+        offset = struct.calcsize(HEADER_FORMAT)
+        section_size = struct.calcsize(SECTION_FORMAT)
+        keyframe_size = struct.calcsize(KEYFRAME_FORMAT)
+        wave_size = struct.calcsize(WAVE_START_FORMAT)
+        while offset < len(data):
+            tag, length = struct.unpack_from(SECTION_FORMAT, data, offset)
+            offset += section_size
+            payload = data[offset:offset + length]
+            offset += length
+            if tag == b"WRLD":
+                replay.world = payload.decode("ascii")
+            elif tag == b"INPT":
+                replay.frames = bytearray(zlib.decompress(payload))
+            elif tag == b"WAVE":
+                for i in range(0, len(payload), wave_size):
+                    wave, tick = struct.unpack_from(WAVE_START_FORMAT, payload, i)
+                    replay.wave_starts[wave] = tick
+            elif tag == b"KEYF":
+                tick, wave, world_hash = struct.unpack_from(KEYFRAME_FORMAT, payload, 0)
+                replay.keyframes.append((tick, wave, world_hash, payload[keyframe_size:]))
+            # Unknown sections are skipped so newer files still load
+        replay.keyframes.sort(key=lambda keyframe: keyframe[0])
+        return replay
+
+
+class ReplayRecorder:
+    """Input source wrapper that records every frame it hands to the game"""
+    def __init__(self, source, path=None, keyframe_interval=KEYFRAME_INTERVAL):
+        self.source = source
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.replay = None
+        self.last_wave = None
+
+    def queue_weapon_switch(self, index):
+        self.source.queue_weapon_switch(index)
+
+    def queue_reload(self):
+        self.source.queue_reload()
+
+    def queue_item_use(self, index):
+        self.source.queue_item_use(index)
+
+    def on_reset(self, game):
+        """Start a fresh recording; called by Game.reset_game"""
+        self.replay = Replay(game.rng.seed, game.game_clock.step_ms, game.world)
+        self.last_wave = None
+
+    def poll(self, game):
+        if self.replay is None:
+            self.on_reset(game)
+        tick = self.replay.tick_count
+
+        # Keyframes are taken before the tick runs, at wave starts and periodically
+        wave = game.wave_manager.current_wave
+        if wave != self.last_wave:
+            self.replay.wave_starts.setdefault(wave, tick)
+            self.last_wave = wave
+            self.add_keyframe(game, tick)
+        elif tick % self.keyframe_interval == 0:
+            self.add_keyframe(game, tick)
+
+        # Hand the game the decoded frame so recording and playback see identical input
+        encoded = encode_frame(self.source.poll(game))
+        self.replay.frames += encoded
+        return decode_frame(encoded)
+
+    def add_keyframe(self, game, tick):
+        world_hash = bytes.fromhex(game.world_state_hash())
+        self.replay.keyframes.append(
+            (tick, game.wave_manager.current_wave, world_hash, capture_snapshot(game))
+        )
+
+    def save(self, path=None):
+        path = path or self.path
+        if self.replay is not None and path:
+            self.replay.save(path)
+            print(f"Saved replay ({self.replay.tick_count} ticks) to {path}")
+
+
+class ReplayInput:
+    """Input source that feeds a recorded replay back into the game"""
+    def __init__(self, replay):
+        self.replay = replay
+        self.tick = 0
+
+    @property
+    def finished(self):
+        return self.tick >= self.replay.tick_count
+
+    def queue_weapon_switch(self, index):
+        pass
+
+    def queue_reload(self):
+        pass
+
+    def queue_item_use(self, index):
+        pass
+
+    def on_reset(self, game):
+        self.tick = 0
+
+    def poll(self, game):
+        if self.finished:
+            return InputFrame(aim_x=game.player.rect.centerx, aim_y=game.player.rect.centery)
+        frame = self.replay.frame(self.tick)
+        self.tick += 1
+        return frame
+
+
+class ReplayPlayer:
+    """Drives a game from a replay, with fast-forward and keyframe seeking"""
+    def __init__(self, replay, game):
+        self.replay = replay
+        self.game = game
+        self.input = ReplayInput(replay)
+        game.input_source = self.input
+
+    @property
+    def tick(self):
+        return self.input.tick
+
+    def step(self):
+        """Simulate one recorded tick; returns False at the end of the replay"""
+        if self.input.finished:
+            return False
+        self.game.update_game()
+        return True
+
+    def fast_forward(self, ticks):
+        """Simulate up to `ticks` recorded ticks without rendering"""
+        for _ in range(ticks):
+            if not self.step():
+                break
+
+    def seek(self, tick):
+        """Jump to a tick via the nearest earlier keyframe, then simulate the remainder"""
+        tick = max(0, min(tick, self.replay.tick_count))
+        keyframe = self.replay.keyframe_before(tick)
+        if keyframe is not None and (keyframe[0] > self.tick or tick < self.tick):
+            key_tick, _, world_hash, blob = keyframe
+            restore_snapshot(self.game, blob)
+            self.input.tick = key_tick
+            if bytes.fromhex(self.game.world_state_hash()) != world_hash:
+                print(f"Warning: replay keyframe at tick {key_tick} does not match its recorded hash")
+        elif tick < self.tick:
+            # No keyframe to jump back to: restart the session
+            self.game.reset_game()
+            self.input.tick = 0
+        self.fast_forward(tick - self.tick)
+
+    def seek_wave(self, wave):
+        """Jump to the first tick of a wave"""
+        if wave not in self.replay.wave_starts:
+            raise ValueError(f"Replay never reaches wave {wave}")
+        self.seek(self.replay.wave_starts[wave])
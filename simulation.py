@@ -0,0 +1,113 @@
+# simulation.py
+import math
+import time
+from config import *
+from input_source import InputFrame, ScriptedInput
+from main import Game
+
+class SimulationStats:
+    """Summary of a headless run"""
+    def __init__(self, ticks, elapsed, wave, score, player_alive):
+        self.ticks = ticks
+        self.elapsed = elapsed
+        self.wave = wave
+        self.score = score
+        self.player_alive = player_alive
+
+    @property
+    def ticks_per_second(self):
+        return self.ticks / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def __repr__(self):
+        return (f"SimulationStats(ticks={self.ticks}, elapsed={self.elapsed:.3f}s, "
+                f"ticks_per_second={self.ticks_per_second:.0f}, wave={self.wave}, "
+                f"score={self.score}, player_alive={self.player_alive})")
+
+
+class Simulation:
+    """Runs the game systems headless, with no rendering or frame-rate sleep"""
+    def __init__(self, input_source=None, game=None, seed=None, record_hashes=False, profile=False,
+                 world=WORLD_MODE):
+        self.game = game or Game(headless=True, input_source=input_source or ScriptedInput(), seed=seed,
+                                 world=world)
+        if input_source is not None:
+            self.game.input_source = input_source
+        self.game.profiler.enabled = profile
+        self.game.reset_game()
+        self.game.game_state = "playing"
+        self.tick = 0
+        # One world_state_hash per tick when recording, for divergence hunting
+        self.hashes = [] if record_hashes else None
+
+    def step(self):
+        """Advance the simulation by one tick; returns False once the player is dead"""
+        game = self.game
+        game.profiler.begin_frame()
+        game.update_game()
+        self.tick += 1
+        if self.hashes is not None:
+            self.hashes.append(game.world_state_hash())
+        if game.player.health <= 0:
+            game.game_state = "game_over"
+            return False
+        return True
+
+    def run(self, max_ticks, stop_on_death=True):
+        """Run up to max_ticks as fast as possible and report throughput"""
+        start = time.perf_counter()
+        ticks = 0
+        alive = True
+        while ticks < max_ticks:
+            alive = self.step()
+            ticks += 1
+            if not alive and stop_on_death:
+                break
+        elapsed = time.perf_counter() - start
+        return SimulationStats(
+            ticks, elapsed,
+            self.game.wave_manager.current_wave,
+            self.game.player.score,
+            alive
+        )
+
+
+def first_divergence(hashes_a, hashes_b):
+    """Index of the first tick whose world hashes differ, or None if the runs match"""
+    for tick, (hash_a, hash_b) in enumerate(zip(hashes_a, hashes_b)):
+        if hash_a != hash_b:
+            return tick
+    if len(hashes_a) != len(hashes_b):
+        return min(len(hashes_a), len(hashes_b))
+    return None
+
+
+class SimpleBot(ScriptedInput):
+    """Headless player that shoots the nearest zombie and backs away from it"""
+    def __init__(self, keep_distance=150):
+        super().__init__(self.decide)
+        self.keep_distance = keep_distance
+
+    def decide(self, game, tick):
+        player_x, player_y = game.player.rect.center
+        nearest = None
+        nearest_dist = float("inf")
+        for zombie in game.wave_manager.zombies:
+            dist = math.hypot(zombie.x - player_x, zombie.y - player_y)
+            if dist < nearest_dist:
+                nearest, nearest_dist = zombie, dist
+
+        if nearest is None:
+            return InputFrame(aim_x=player_x, aim_y=player_y)
+
+        dx = dy = 0
+        if nearest_dist < self.keep_distance:
+            dx = (player_x > nearest.x) - (player_x < nearest.x)
+            dy = (player_y > nearest.y) - (player_y < nearest.y)
+
+        weapon = game.player.current_weapon
+        out_of_ammo = game.player.ammo.get(weapon.name, 0) <= 0
+        return InputFrame(
+            dx, dy, nearest.x, nearest.y,
+            shoot=not out_of_ammo,
+            reload=out_of_ammo and not game.player.reloading
+        )
@@ -0,0 +1,164 @@
+# spatial_hash.py
+import math
+from config import SPATIAL_HASH_CELL_SIZE
+
+class SpatialHash:
+    """Uniform grid over world space for broadphase collision queries.
+
+    Each entity is filed under the cell holding its centre and queries widen their
+    search by the largest radius inserted, so overlaps across cell borders are still
+    found. Buckets are dicts rather than sets: results come back in insertion order,
+    which keeps simulations deterministic.
+    """
+    def __init__(self, cell_size=SPATIAL_HASH_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y) -> {id(entity): entry}
+        self.entries = {}  # id(entity) -> [entity, x, y, radius, cell]
+        self.max_radius = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, entity):
+        return id(entity) in self.entries
+
+    def cell_of(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, entity, x, y, radius=0):
+        key = id(entity)
+        if key in self.entries:
+            self.move(entity, x, y)
+            return
+        cell = self.cell_of(x, y)
+        entry = [entity, x, y, radius, cell]
+        self.entries[key] = entry
+        self.cells.setdefault(cell, {})[key] = entry
+        if radius > self.max_radius:
+            self.max_radius = radius
+
+    def move(self, entity, x, y):
+        """Update an entity's position, re-filing it only when it changes cell"""
+        key = id(entity)
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry[1] = x
+        entry[2] = y
+        size = self.cell_size
+        cell = (int(x // size), int(y // size))
+        if cell != entry[4]:
+            self._unlink(key, entry[4])
+            entry[4] = cell
+            self.cells.setdefault(cell, {})[key] = entry
+
+    def remove(self, entity):
+        key = id(entity)
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self._unlink(key, entry[4])
+
+    def _unlink(self, key, cell):
+        bucket = self.cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self.cells[cell]
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+        self.max_radius = 0
+
+    def _buckets(self, left, top, right, bottom):
+        """Buckets of the cells that could hold an entity touching the box"""
+        size = self.cell_size
+        pad = self.max_radius
+        min_cx, max_cx = int((left - pad) // size), int((right + pad) // size)
+        min_cy, max_cy = int((top - pad) // size), int((bottom + pad) // size)
+        cells = self.cells
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(cells):
+            # Box spans more cells than are occupied: walk the occupied ones instead
+            return [bucket for (cx, cy), bucket in cells.items()
+                    if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy]
+        buckets = []
+        get = cells.get
+        for cy in range(min_cy, max_cy + 1):
+            for cx in range(min_cx, max_cx + 1):
+                bucket = get((cx, cy))
+                if bucket:
+                    buckets.append(bucket)
+        return buckets
+
+    def query_circle(self, x, y, radius=0, per_cell=None):
+        """Entities whose circle overlaps the circle at (x, y).
+
+        per_cell caps the matches taken from any one cell, bounding the cost in
+        crowded areas; every cell still contributes, so the sample is not lopsided.
+        """
+        result = []
+        for bucket in self._buckets(x - radius, y - radius, x + radius, y + radius):
+            found = 0
+            for entity, ex, ey, eradius, _ in bucket.values():
+                reach = radius + eradius
+                dx = ex - x
+                dy = ey - y
+                if dx * dx + dy * dy < reach * reach:
+                    result.append(entity)
+                    found += 1
+                    if found == per_cell:
+                        break
+        return result
+
+    def query_rect(self, left, top, right, bottom):
+        """Entities whose bounding box overlaps the box, e.g. the camera's view"""
+        result = []
+        for bucket in self._buckets(left, top, right, bottom):
+            for entity, ex, ey, eradius, _ in bucket.values():
+                if left - eradius <= ex <= right + eradius and top - eradius <= ey <= bottom + eradius:
+                    result.append(entity)
+        return result
+
+    def query_segment(self, x0, y0, x1, y1, radius=0):
+        """Entities touched by a circle of the given radius swept from (x0, y0) to (x1, y1).
+
+        Returns (t, entity) pairs ordered by t, the fraction of the segment travelled
+        at first contact, so the nearest hit comes first.
+        """
+        dx = x1 - x0
+        dy = y1 - y0
+        length_sq = dx * dx + dy * dy
+        hits = []
+        buckets = self._buckets(min(x0, x1) - radius, min(y0, y1) - radius, max(x0, x1) + radius, max(y0, y1) + radius)
+        for bucket in buckets:
+            for entity, ex, ey, eradius, _ in bucket.values():
+                reach = radius + eradius
+                fx = x0 - ex
+                fy = y0 - ey
+                c = fx * fx + fy * fy - reach * reach
+                if c < 0:
+                    hits.append((0.0, entity))  # Already overlapping at the start
+                    continue
+                # Smallest root of |f + t*d|^2 = reach^2; b >= 0 means moving away
+                b = fx * dx + fy * dy
+                if b >= 0:
+                    continue
+                discriminant = b * b - length_sq * c
+                if discriminant < 0:
+                    continue
+                t = (-b - math.sqrt(discriminant)) / length_sq
+                if t <= 1.0:
+                    hits.append((t, entity))
+        if len(hits) > 1:
+            hits.sort(key=lambda hit: hit[0])
+        return hits
+
+    def __getstate__(self):
+        # Buckets are keyed by id(), which does not survive pickling; store the
+        # entries in bucket order and re-insert them on load
+        entries = [entry[:4] for bucket in self.cells.values() for entry in bucket.values()]
+        return {"cell_size": self.cell_size, "entries": entries}
+
+    def __setstate__(self, state):
+        self.__init__(state["cell_size"])
+        for entity, x, y, radius in state["entries"]:
+            self.insert(entity, x, y, radius)
@@ -0,0 +1,36 @@
+# tests/test_map.py
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import *
+from chunked_map import ChunkedGameMap
+from map import GameMap
+from player import Player
+
+
+def assert_start_is_open(game_map, seed):
+    """The player can stand on the spawn and step away from it in every direction"""
+    start_x, start_y = Player(game_map).rect.center
+    assert not game_map.check_collision(start_x, start_y, PLAYER_RADIUS), seed
+    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        player = Player(game_map)
+        player.move(dx * PLAYER_SPEED, dy * PLAYER_SPEED, game_map)
+        assert player.rect.center != (start_x, start_y), (seed, dx, dy)
+
+
+def test_player_start_is_open_for_every_seed():
+    """Generated terrain never walls in the player's fixed spawn"""
+    for seed in range(200):
+        assert_start_is_open(GameMap(rng=random.Random(seed)), seed)
+
+
+def test_player_start_is_open_with_other_tile_sizes():
+    """The clearing follows the map's own tile size, fixed and chunked"""
+    for tile_size in (16, 32):
+        for seed in range(50):
+            assert_start_is_open(GameMap(tile_size=tile_size, rng=random.Random(seed)), (tile_size, seed))
+            assert_start_is_open(ChunkedGameMap(tile_size=tile_size, rng=random.Random(seed)), (tile_size, seed))
@@ -0,0 +1,44 @@
+# text_cache.py
+from collections import OrderedDict
+
+import pygame
+from config import *
+
+
+class TextCache:
+    """Fonts by size and rendered text surfaces, kept in an LRU.
+
+    render() rasterizes a string only the first time it is asked for in a
+    given font and colour (or after it dropped out of the max_surfaces most
+    recently used); HUD and menu text that stays the same between frames is a
+    dictionary lookup. hits and misses count the lookups for the profiler.
+    """
+    def __init__(self, max_surfaces=TEXT_CACHE_SIZE):
+        self.max_surfaces = max_surfaces
+        self.fonts = {}  # size -> default Font at that size
+        self.surfaces = OrderedDict()  # (font, text, color) -> Surface, least recently used first
+        self.hits = self.misses = 0
+
+    def font(self, size):
+        """The default font at a size, loaded once"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, font, text, color):
+        """Antialiased surface of text in a Font; shared, so callers must not draw on it"""
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = font.render(text, True, color)
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
@@ -1,18 +1,48 @@
 import random
 import math
 import pygame
+from flow_field import FlowField
+from spatial_hash import SpatialHash
 from zombie import Zombie
-from config import ZOMBIE_RADIUS, SPAWN_DISTANCE, MAP_SIZE
+from zombie_store import ZombieStore
+from config import ZOMBIE_RADIUS, SPAWN_DISTANCE, USE_ZOMBIE_ARRAYS, ZOMBIE_ARRAYS_MIN_HORDE
 
 class WaveManager:
-    def __init__(self):
+    def __init__(self, rng=None, use_arrays=USE_ZOMBIE_ARRAYS):
+        self.rng = rng if rng is not None else random
+        self.use_arrays = use_arrays and ZombieStore.available()
+        self.store = None
         self.zombies = []
+        self.spatial_hash = SpatialHash()  # Broadphase index of self.zombies
+        self.flow_field = FlowField()  # Shared route to the player, rebuilt when they change tile
         self.current_wave = 1
         self.zombies_per_wave = 5
         self.spawned_count = 0
         self.spawn_timer = 0
         self.spawn_delay = 60  # frames between spawns
         self.wave_complete = False
+        self.prepare_horde(self.zombies_per_wave)
+
+    def prepare_horde(self, count):
+        """Hold a coming horde of count zombies in the array store when it is big enough to pay off.
+
+        Only switches while no zombie is alive, e.g. between waves.
+        """
+        if self.zombies:
+            return
+        arrays = self.use_arrays and count >= ZOMBIE_ARRAYS_MIN_HORDE
+        if arrays == (self.store is not None):
+            return
+        if arrays:
+            # Zombies live in NumPy columns; the list holds their views and the
+            # store answers the broadphase queries itself
+            self.store = ZombieStore(self.rng)
+            self.zombies = self.store.views
+            self.spatial_hash = self.store
+        else:
+            self.store = None
+            self.zombies = []
+            self.spatial_hash = SpatialHash()
 
     def update(self, player_rect, game_map):
         """Update wave status and spawn zombies as needed"""
@@ -36,6 +66,7 @@ class WaveManager:
         try:
             self.current_wave += 1
             self.zombies_per_wave = 5 + (self.current_wave * 2)  # Increase zombies per wave
+            self.prepare_horde(self.zombies_per_wave)
             self.spawned_count = 0
             self.wave_complete = False
             # Make zombies spawn faster in later waves
@@ -63,20 +94,20 @@ class WaveManager:
                 min_distance = 300
                 max_distance = 600
                 
-                angle = random.uniform(0, 2 * 3.14159)
-                distance = random.uniform(min_distance, max_distance)
+                angle = self.rng.uniform(0, 2 * 3.14159)
+                distance = self.rng.uniform(min_distance, max_distance)
                 
                 spawn_x = player_rect.centerx + distance * math.cos(angle)
                 spawn_y = player_rect.centery + distance * math.sin(angle)
                 
                 # Keep within map bounds
-                spawn_x = max(50, min(MAP_SIZE - 50, spawn_x))
-                spawn_y = max(50, min(MAP_SIZE - 50, spawn_y))
+                spawn_x, spawn_y = game_map.clamp_position(spawn_x, spawn_y, 50)
                 
-                # Check if spawn location is valid
-                if game_map.is_passable(spawn_x, spawn_y):
-                    zombie = Zombie(spawn_x, spawn_y, zombie_type)
-                    self.zombies.append(zombie)
+                # Check if spawn location is valid and has a route to the player
+                if (game_map.is_passable(spawn_x, spawn_y)
+                        and self.flow_field.reachable(spawn_x, spawn_y, game_map.tile_size)):
+                    zombie = Zombie(spawn_x, spawn_y, zombie_type, self.rng)
+                    self.add_zombie(zombie)
                     self.spawned_count += 1
                     return True
                 
@@ -86,8 +117,8 @@ class WaveManager:
             # spawn at a fixed offset from player as fallback
             fallback_x = player_rect.centerx + 400
             fallback_y = player_rect.centery + 400
-            zombie = Zombie(fallback_x, fallback_y, zombie_type)
-            self.zombies.append(zombie)
+            zombie = Zombie(fallback_x, fallback_y, zombie_type, self.rng)
+            self.add_zombie(zombie)
             self.spawned_count += 1
             return True
             
@@ -95,6 +126,23 @@ class WaveManager:
             print(f"Error spawning zombie: {e}")
             return False
     
+    def add_zombie(self, zombie):
+        """Add a zombie to the wave and the spatial hash; returns the zombie as stored"""
+        if self.store is not None:
+            return self.store.add(zombie)
+        self.zombies.append(zombie)
+        self.spatial_hash.insert(zombie, zombie.x, zombie.y, zombie.radius)
+        return zombie
+
+    def remove_zombie(self, zombie):
+        """Remove a zombie from the wave and the spatial hash"""
+        if self.store is not None:
+            self.store.remove(zombie)
+            return
+        if zombie in self.zombies:
+            self.zombies.remove(zombie)
+        self.spatial_hash.remove(zombie)
+
     def choose_zombie_type(self):
         """Choose a zombie type based on wave number"""
         try:
@@ -110,20 +158,39 @@ class WaveManager:
                 # Only regular zombies in early waves
                 return "regular"
                 
-            return random.choices(types, weights=weights, k=1)[0]
+            return self.rng.choices(types, weights=weights, k=1)[0]
         except Exception as e:
             print(f"Error choosing zombie type: {e}")
             return "regular"  # Fall back to regular zombies on error
 
-    def draw_zombies(self, screen, camera_x, camera_y):
-        """Draw all zombies in the game with safe iteration"""
+    def draw_zombies(self, screen, camera_x, camera_y, alpha=1.0, viewport=None):
+        """Draw the zombies in the game, only those the viewport can see when given one.
+
+        alpha blends between each zombie's previous and current simulated
+        position; the blend is applied by shifting the camera per zombie.
+        """
         try:
-            for zombie in self.zombies[:]:  # Use a copy of the list for safe iteration
+            lag = 1.0 - alpha
+            look_at = pygame.mouse.get_pos()  # Every zombie's eyes follow the cursor
+            if self.store is not None:
+                self.store.draw(screen, camera_x, camera_y, lag, look_at, viewport)
+                return
+            zombies = self.zombies
+            if viewport is not None:
+                zombies = [zombie for zombie in zombies if viewport.visible(zombie.x, zombie.y, zombie.radius)]
+                viewport.record("zombies", len(zombies), len(self.zombies))
+            else:
+                zombies = zombies[:]  # Use a copy of the list for safe iteration
+            for zombie in zombies:
                 try:
-                    zombie.draw(screen, camera_x, camera_y)
+                    zombie.draw(
+                        screen,
+                        camera_x + (zombie.x - zombie.prev_x) * lag,
+                        camera_y + (zombie.y - zombie.prev_y) * lag,
+                        look_at
+                    )
                 except Exception as e:
                     print(f"Error drawing zombie: {e}")
-                    if zombie in self.zombies:
-                        self.zombies.remove(zombie)
+                    self.remove_zombie(zombie)
         except Exception as e:
             print(f"Error in draw_zombies: {e}")
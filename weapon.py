@@ -3,6 +3,7 @@ import random
 import math
 from bullet import Bullet
 from config import *
+import game_clock
 
 class Weapon:
     def __init__(self, name, fire_rate, damage, spread, max_ammo):
@@ -11,19 +12,21 @@ class Weapon:
         self.damage = damage
         self.spread = spread
         self.max_ammo = max_ammo
-        self.last_shot = 0
+        self.rng = random  # Replaced with the game's gameplay stream by Player
+        self.clock = None  # The game's GameClock, set by Player
+        self.last_shot = None  # Simulation time of the last shot
 
     def can_shoot(self):
-        return pygame.time.get_ticks() - self.last_shot > self.fire_rate
+        return self.last_shot is None or game_clock.get_ticks(self.clock) - self.last_shot > self.fire_rate
 
 
     def fire(self, start_pos, target_pos, bullets):
         if self.can_shoot():
-            self.last_shot = pygame.time.get_ticks()
+            self.last_shot = game_clock.get_ticks(self.clock)
             dx = target_pos[0] - start_pos[0]
             dy = target_pos[1] - start_pos[1]
             angle = math.atan2(dy, dx)
-            angle += random.uniform(-self.spread, self.spread)
+            angle += self.rng.uniform(-self.spread, self.spread)
             bullets.append(Bullet(start_pos[0], start_pos[1], angle))
             return True
         return False
@@ -53,7 +56,7 @@ class Shotgun(Weapon):
             for _ in range(7):
                 dx = target_pos[0] - start_pos[0]
                 dy = target_pos[1] - start_pos[1]
-                angle = math.atan2(dy, dx) + random.uniform(-0.3, 0.3)
+                angle = math.atan2(dy, dx) + self.rng.uniform(-0.3, 0.3)
                 bullets.append(Bullet(start_pos[0], start_pos[1], angle))
             return True
         return False
@@ -70,7 +73,7 @@ class GrenadeLauncher(Weapon):
 
     def fire(self, start_pos, target_pos, bullets):
         if self.can_shoot():
-            self.last_shot = pygame.time.get_ticks()
+            self.last_shot = game_clock.get_ticks(self.clock)
             grenade = Grenade(start_pos[0], start_pos[1], target_pos, self.damage)
             bullets.append(grenade)
             return True
@@ -139,6 +142,7 @@ class Grenade:
         self.vx = math.cos(self.angle) * self.speed
         self.vy = math.sin(self.angle) * self.speed
         self.rect = pygame.Rect(int(self.x - self.radius), int(self.y - self.radius), self.radius * 2, self.radius * 2) #add rect.
+        self.prev_x, self.prev_y = self.x, self.y
         print(f"Created new grenade: pos=({self.x}, {self.y}), target=({target_pos[0]}, {target_pos[1]}), lifetime={self.lifetime}")
 
     def update(self, game):
@@ -147,6 +151,7 @@ class Grenade:
             print("WARNING: Grenade lifetime was None, resetting to default")
             self.lifetime = 120
 
+        self.prev_x, self.prev_y = self.x, self.y
         self.x += self.vx
         self.y += self.vy
         self.lifetime -= 1
@@ -161,6 +166,9 @@ class Grenade:
                 import traceback
                 traceback.print_exc()
 
+    def get_draw_radius(self):
+        return self.radius
+
     def draw(self, screen, camera_x=0, camera_y=0):
         pygame.draw.circle(
             screen,
@@ -171,13 +179,9 @@ class Grenade:
 
     def explode(self, game):
         print(f"Grenade exploding at ({self.x}, {self.y})")
-        game.particle_system.add_explosion(
-            self.x, 
-            self.y, 
-            COLORS['yellow'],
-            30
-        )
-        for zombie in game.wave_manager.zombies[:]:
+        game.effects.add("grenade_explosion", self.x, self.y)
+        game.game_map.decals.add_scorch(self.x, self.y, self.explosion_radius)
+        for zombie in game.wave_manager.spatial_hash.query_circle(self.x, self.y, self.explosion_radius):
             distance = math.sqrt((self.x - zombie.x) ** 2 + (self.y - zombie.y) ** 2)
             if distance <= self.explosion_radius:
                 zombie.take_damage(self.damage)
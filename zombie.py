@@ -2,16 +2,47 @@ import pygame
 import math
 import random
 from config import *
+from zombie_sprites import ZombieSpriteCache, eye_direction
+
+# Per-type stats, shared by every zombie (and by the array store in zombie_store.py)
+ZOMBIE_TYPES = {
+    "regular": {"health": 100, "color": COLORS["red"], "speed": ZOMBIE_SPEED, "damage": 10},
+    "fast": {"health": 60, "color": COLORS["yellow"], "speed": ZOMBIE_SPEED * 1.5, "damage": 5},
+    "tank": {"health": 200, "color": COLORS["dark_red"], "speed": ZOMBIE_SPEED * 0.7, "damage": 20}
+}
+
+def draw_health_bar(screen, x, y, radius, health_pct):
+    """Draw enhanced health bar with gradient color over a zombie centred at screen (x, y)"""
+    bar_width = radius * 2
+    bar_height = 4
+    bar_x = x - bar_width // 2
+    bar_y = y - radius - 10
+
+    # Draw background/border
+    pygame.draw.rect(screen, COLORS["black"],
+                     (bar_x - 1, bar_y - 1, bar_width + 2, bar_height + 2))
+
+    if health_pct > 0.6:
+        health_color = COLORS["green"]
+    elif health_pct > 0.3:
+        health_color = COLORS["yellow"]
+    else:
+        health_color = COLORS["red"]
+
+    # Draw filled portion
+    filled_width = int(bar_width * health_pct)
+    pygame.draw.rect(screen, health_color, (bar_x, bar_y, filled_width, bar_height))
+
 
 class Zombie:
-    def __init__(self, x, y, zombie_type="regular"):
+    zombie_types = ZOMBIE_TYPES
+    sprite_cache = ZombieSpriteCache()  # Shared by every zombie; kept off instances so snapshots stay picklable
+
+    def __init__(self, x, y, zombie_type="regular", rng=None):
+        self.rng = rng if rng is not None else random
         self.radius = 16  # Zombie radius
         self.x, self.y = x, y  # Center coordinates
-        self.zombie_types = {
-            "regular": {"health": 100, "color": COLORS["red"], "speed": ZOMBIE_SPEED, "damage": 10},
-            "fast": {"health": 60, "color": COLORS["yellow"], "speed": ZOMBIE_SPEED * 1.5, "damage": 5},
-            "tank": {"health": 200, "color": COLORS["dark_red"], "speed": ZOMBIE_SPEED * 0.7, "damage": 20}
-        }
+        self.prev_x, self.prev_y = x, y  # Position at the start of the last tick
         self.type = zombie_type
         self.health = self.zombie_types[zombie_type]["health"]
         self.max_health = self.health
@@ -19,28 +50,49 @@ class Zombie:
         self.speed = self.zombie_types[zombie_type]["speed"]
         self.damage = self.zombie_types[zombie_type]["damage"]
         self.path_timer = 0
-        self.path_timer_max = random.randint(30, 60)
+        self.path_timer_max = self.rng.randint(30, 60)
         self.path_offset_x = 0
         self.path_offset_y = 0
+        # Neighbour push, refreshed every ZOMBIE_SEPARATION_INTERVAL ticks at a per-zombie phase
+        self.push_x = self.push_y = 0.0
+        self.separation_phase = self.path_timer_max % ZOMBIE_SEPARATION_INTERVAL
         self.animation_frame = 0
         self.hit_flash = 0
         self.size_pulse = 0
 
-    def move_towards(self, target_x, target_y, game_map):
+    def move_towards(self, target_x, target_y, game_map, spatial_hash=None, flow_field=None):
+        """Step towards the target, keeping spatial_hash (if given) in sync.
+
+        With a flow_field built towards the target the zombie follows it around
+        obstacles, steering straight (with its path offset) only where the field
+        has no direction to give. A pathfinder.Path to the target works the same way.
+        """
+        self.prev_x, self.prev_y = self.x, self.y
         self.path_timer += 1
         if self.path_timer >= self.path_timer_max:
             self.path_timer = 0
-            self.path_timer_max = random.randint(30, 60)
-            self.path_offset_x = random.randint(-50, 50)
-            self.path_offset_y = random.randint(-50, 50)
-        dx = (target_x + self.path_offset_x) - self.x
-        dy = (target_y + self.path_offset_y) - self.y
-        dist = math.hypot(dx, dy)
-        if dist == 0:
-            return
-        dx /= dist
-        dy /= dist
+            self.path_timer_max = self.rng.randint(30, 60)
+            self.path_offset_x = self.rng.randint(-50, 50)
+            self.path_offset_y = self.rng.randint(-50, 50)
+        direction = flow_field.sample(self.x, self.y, game_map.tile_size) if flow_field is not None else None
+        if direction is not None:
+            dx, dy = direction
+        else:
+            dx = (target_x + self.path_offset_x) - self.x
+            dy = (target_y + self.path_offset_y) - self.y
+            dist = math.hypot(dx, dy)
+            if dist == 0:
+                return
+            dx /= dist
+            dy /= dist
         move_x = self.speed * dx
+        move_y = self.speed * dy
+        if spatial_hash is not None:
+            # Crowding neighbours push this zombie aside so hordes spread out instead of stacking
+            if (self.animation_frame + self.separation_phase) % ZOMBIE_SEPARATION_INTERVAL == 0:
+                self.push_x, self.push_y = self.separation(spatial_hash)
+            move_x += self.push_x
+            move_y += self.push_y
         new_x = self.x + move_x
         if self.check_position_valid(new_x, self.y, game_map):
             self.x = new_x
@@ -48,7 +100,6 @@ class Zombie:
             diag_x = self.x + (move_x * 0.5)
             if self.check_position_valid(diag_x, self.y, game_map):
                 self.x = diag_x
-        move_y = self.speed * dy
         new_y = self.y + move_y
         if self.check_position_valid(self.x, new_y, game_map):
             self.y = new_y
@@ -56,11 +107,38 @@ class Zombie:
             diag_y = self.y + (move_y * 0.5)
             if self.check_position_valid(self.x, diag_y, game_map):
                 self.y = diag_y
+        if spatial_hash is not None:
+            spatial_hash.move(self, self.x, self.y)
         self.animation_frame = (self.animation_frame + 1) % 30
         if self.hit_flash > 0:
             self.hit_flash -= 1
         self.size_pulse = 2 * math.sin(self.animation_frame / 5)
 
+    def separation(self, spatial_hash):
+        """Displacement resolving part of the overlap with the nearest few zombies"""
+        push_x = push_y = 0.0
+        reach = ZOMBIE_SEPARATION_DISTANCE
+        # The hash adds each neighbour's radius to the query radius
+        neighbours = spatial_hash.query_circle(self.x, self.y, reach - self.radius,
+                                               per_cell=ZOMBIE_SEPARATION_NEIGHBOURS)
+        for other in neighbours:
+            if other is self:
+                continue
+            away_x = self.x - other.x
+            away_y = self.y - other.y
+            distance = math.hypot(away_x, away_y)
+            if distance == 0 or distance >= reach:
+                continue  # Exactly stacked zombies drift apart through their path offsets
+            strength = (reach - distance) * ZOMBIE_SEPARATION_STRENGTH / distance
+            push_x += away_x * strength
+            push_y += away_y * strength
+        # Cap the push so a packed crowd eases apart instead of jittering
+        push = math.hypot(push_x, push_y)
+        if push > ZOMBIE_SEPARATION_MAX_PUSH:
+            push_x *= ZOMBIE_SEPARATION_MAX_PUSH / push
+            push_y *= ZOMBIE_SEPARATION_MAX_PUSH / push
+        return push_x, push_y
+
     def check_position_valid(self, x, y, game_map):
         points = [(x, y)]
         return any(game_map.is_passable(px, py) for px, py in points)
@@ -78,106 +156,32 @@ class Zombie:
             return COLORS["white"]
         return self.color
 
-    def draw(self, screen, camera_x, camera_y):
-        """Draw zombie with enhanced visuals"""
+    def draw(self, screen, camera_x, camera_y, look_at=None):
+        """Draw the zombie: its cached sprite, then a health bar once damaged.
+
+        The eyes follow look_at, a screen position (the mouse cursor if None);
+        WaveManager.draw_zombies reads the mouse once for the whole horde.
+        """
         render_radius = self.get_render_radius()
-        render_color = self.get_render_color()
-        
-        # Draw shadow
-        pygame.draw.circle(
-            screen, 
-            COLORS["black"], 
-            (int(self.x - camera_x + 3), int(self.y - camera_y + 3)), 
-            render_radius, 
-            0
-        )
-        
-        # Draw zombie body
-        pygame.draw.circle(
-            screen,
-            render_color,
-            (int(self.x - camera_x), int(self.y - camera_y)),
-            render_radius
-        )
-        
-        # Draw eyes based on direction to player
-        eye_radius = max(2, render_radius // 5)
-        eye_offset = render_radius // 3
-        
-        # Direction vector to player
-        player_pos = pygame.mouse.get_pos()  
-        dx = (player_pos[0] + camera_x) - self.x
-        dy = (player_pos[1] + camera_y) - self.y
-        dist = max(1, math.hypot(dx, dy))
-        dx, dy = dx / dist, dy / dist
-        
-        # Left eye
-        left_eye_x = int(self.x - camera_x - eye_offset + dx * eye_offset * 0.5)
-        left_eye_y = int(self.y - camera_y - eye_offset + dy * eye_offset * 0.5)
-        pygame.draw.circle(screen, COLORS["black"], (left_eye_x, left_eye_y), eye_radius)
-        
-        # Right eye
-        right_eye_x = int(self.x - camera_x + eye_offset + dx * eye_offset * 0.5)
-        right_eye_y = int(self.y - camera_y - eye_offset + dy * eye_offset * 0.5)
-        pygame.draw.circle(screen, COLORS["black"], (right_eye_x, right_eye_y), eye_radius)
-        
-        # Draw zombie-type specific visual enhancements
-        if self.type == "fast":
-            # Draw speed lines
-            for i in range(3):
-                offset = (i - 1) * 5
-                pygame.draw.line(
-                    screen, 
-                    COLORS["yellow"], 
-                    (int(self.x - camera_x + offset - 5), int(self.y - camera_y + render_radius - 5)), 
-                    (int(self.x - camera_x + offset - 15), int(self.y - camera_y + render_radius - 5)),
-                    2
-                )
-        elif self.type == "tank":
-            # Draw armor plates
-            for angle in range(0, 360, 60):
-                rad = math.radians(angle)
-                armor_x = int(self.x - camera_x + math.cos(rad) * render_radius * 0.7)
-                armor_y = int(self.y - camera_y + math.sin(rad) * render_radius * 0.7)
-                pygame.draw.circle(screen, COLORS["dark_gray"], (armor_x, armor_y), 4)
-        
-        # Draw health bar
-        self.draw_health_bar(screen, camera_x, camera_y)
-        
-        # Draw damage text if hit recently
+        screen_x = int(self.x - camera_x)
+        screen_y = int(self.y - camera_y)
+        if look_at is None:
+            look_at = pygame.mouse.get_pos()
+        direction = eye_direction(look_at[0] - screen_x, look_at[1] - screen_y)
+        sprite, origin = self.sprite_cache.get(self.type, self.get_render_color(), render_radius, direction)
+        screen.blit(sprite, (screen_x - origin, screen_y - origin))
+
+        if self.health < self.max_health:
+            self.draw_health_bar(screen, camera_x, camera_y)
+
+        # Exclamation mark floating upward while the hit flash lasts
         if self.hit_flash > 0:
-            # Create a damage text that floats upward
-            damage_color = COLORS["white"]
-            damage_text = pygame.font.Font(None, 24).render("!", True, damage_color)
-            offset_y = self.hit_flash * 2  
-            screen.blit(damage_text, 
-                     (int(self.x - camera_x - damage_text.get_width() // 2),
-                      int(self.y - camera_y - render_radius - 15 - offset_y)))
+            mark = self.sprite_cache.get_flash_mark()
+            screen.blit(mark, (screen_x - mark.get_width() // 2,
+                               int(self.y - camera_y - render_radius - 15 - self.hit_flash * 2)))
 
     def draw_health_bar(self, screen, camera_x, camera_y):
-        """Draw enhanced health bar with gradient color"""
-        bar_width = self.radius * 2
-        bar_height = 4
-        bar_x = self.x - bar_width // 2 - camera_x
-        bar_y = self.y - self.radius - 10 - camera_y
-        
-        # Draw background/border
-        pygame.draw.rect(screen, COLORS["black"], 
-                       (bar_x - 1, bar_y - 1, bar_width + 2, bar_height + 2))
-        
-        # Calculate health percentage and color
-        health_pct = self.health / self.max_health
-        
-        if health_pct > 0.6:
-            health_color = COLORS["green"]
-        elif health_pct > 0.3:
-            health_color = COLORS["yellow"]
-        else:
-            health_color = COLORS["red"]
-        
-        # Draw filled portion
-        filled_width = int(bar_width * health_pct)
-        pygame.draw.rect(screen, health_color, (bar_x, bar_y, filled_width, bar_height))
+        draw_health_bar(screen, self.x - camera_x, self.y - camera_y, self.radius, self.health / self.max_health)
 
     def draw_type_indicator(self, screen, camera_x, camera_y):
         if self.type == "fast":
@@ -0,0 +1,91 @@
+# zombie_sprites.py
+import math
+
+import pygame
+from config import *
+
+# Eye directions a sprite is baked for; the last index is "looking straight ahead"
+EYE_DIRECTIONS = 16
+
+
+def eye_direction(dx, dy):
+    """Index of the baked eye direction closest to (dx, dy)"""
+    if math.hypot(dx, dy) < 1:
+        return EYE_DIRECTIONS
+    return round(math.atan2(dy, dx) * EYE_DIRECTIONS / (2 * math.pi)) % EYE_DIRECTIONS
+
+
+class ZombieSpriteCache:
+    """Zombie bodies pre-rendered per type, colour, radius and eye direction.
+
+    Each sprite holds the shadow, body, eyes and type decorations that
+    Zombie.draw used to issue as separate draw calls, in display format with a
+    colour key, so a zombie costs one blit. Sprites are made on first use; the
+    radius only takes the few values of the size pulse, so the cache stays
+    small (at most a few hundred surfaces).
+    """
+    COLORKEY = (255, 0, 255)
+
+    def __init__(self):
+        self.sprites = {}  # (type, colour, radius, direction) -> (Surface, origin)
+        self.bakes = 0  # Sprites rendered so far, for benchmarks and the profiler
+        self.flash_mark = None  # The "!" shown over a zombie that was just hit
+
+    def get(self, zombie_type, color, radius, direction):
+        """(sprite, origin) for one look; blit the sprite at the zombie's screen position minus origin"""
+        key = (zombie_type, color, radius, direction)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites[key] = self.bake(zombie_type, color, radius, direction)
+        return sprite
+
+    def get_flash_mark(self):
+        if self.flash_mark is None:
+            self.flash_mark = pygame.font.Font(None, 24).render("!", True, COLORS["white"])
+        return self.flash_mark
+
+    def bake(self, zombie_type, color, radius, direction):
+        # Room for the shadow offset and the fast zombie's speed lines
+        origin = radius + 24
+        surface = pygame.Surface((origin * 2, origin * 2))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.fill(self.COLORKEY)
+        x = y = origin
+
+        # Shadow and body
+        pygame.draw.circle(surface, COLORS["black"], (x + 3, y + 3), radius, 0)
+        pygame.draw.circle(surface, color, (x, y), radius)
+
+        # Eyes, shifted towards the look direction
+        eye_radius = max(2, radius // 5)
+        eye_offset = radius // 3
+        if direction < EYE_DIRECTIONS:
+            angle = direction * 2 * math.pi / EYE_DIRECTIONS
+            dx, dy = math.cos(angle), math.sin(angle)
+        else:
+            dx = dy = 0.0
+        pygame.draw.circle(surface, COLORS["black"],
+                           (int(x - eye_offset + dx * eye_offset * 0.5), int(y - eye_offset + dy * eye_offset * 0.5)),
+                           eye_radius)
+        pygame.draw.circle(surface, COLORS["black"],
+                           (int(x + eye_offset + dx * eye_offset * 0.5), int(y - eye_offset + dy * eye_offset * 0.5)),
+                           eye_radius)
+
+        # Type decorations
+        if zombie_type == "fast":
+            # Speed lines
+            for i in range(3):
+                offset = (i - 1) * 5
+                pygame.draw.line(surface, COLORS["yellow"],
+                                 (x + offset - 5, y + radius - 5), (x + offset - 15, y + radius - 5), 2)
+        elif zombie_type == "tank":
+            # Armor plates
+            for angle in range(0, 360, 60):
+                rad = math.radians(angle)
+                pygame.draw.circle(surface, COLORS["dark_gray"],
+                                   (int(x + math.cos(rad) * radius * 0.7), int(y + math.sin(rad) * radius * 0.7)), 4)
+
+        surface.set_colorkey(self.COLORKEY, pygame.RLEACCEL)
+        self.bakes += 1
+        return surface, origin
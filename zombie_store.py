@@ -0,0 +1,437 @@
+# zombie_store.py
+import math
+import random
+from config import *
+from zombie import ZOMBIE_TYPES, Zombie, draw_health_bar
+from zombie_sprites import EYE_DIRECTIONS
+
+try:
+    import numpy as np
+except ImportError:  # Without NumPy the wave manager keeps one Zombie object per zombie
+    np = None
+
+TYPE_NAMES = list(ZOMBIE_TYPES)
+FLOAT_COLUMNS = ("x", "y", "prev_x", "prev_y", "health", "max_health", "speed", "damage", "radius",
+                 "path_offset_x", "path_offset_y")
+INT_COLUMNS = ("type_id", "path_timer", "path_timer_max", "animation_frame", "hit_flash")
+
+
+def _column(name, cast=float):
+    """Property reading and writing one store column at the view's row"""
+    def get(self):
+        return cast(getattr(self.store, name)[self.index])
+
+    def set(self, value):
+        getattr(self.store, name)[self.index] = value
+    return property(get, set)
+
+
+def _position_column(name):
+    """Like _column, but moving a zombie also invalidates the store's grid index"""
+    def get(self):
+        return float(getattr(self.store, name)[self.index])
+
+    def set(self, value):
+        getattr(self.store, name)[self.index] = value
+        self.store.grid_index = None
+    return property(get, set)
+
+
+class ZombieView(Zombie):
+    """Zombie-compatible handle on one row of a ZombieStore.
+
+    Rendering and the existing gameplay code (bullets, grenades, the minimap) use
+    views exactly like Zombie objects; every attribute reads or writes the arrays.
+    """
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    x = _position_column("x")
+    y = _position_column("y")
+    prev_x = _column("prev_x")
+    prev_y = _column("prev_y")
+    health = _column("health")
+    max_health = _column("max_health")
+    speed = _column("speed")
+    damage = _column("damage")
+    radius = _column("radius", int)
+    animation_frame = _column("animation_frame", int)
+    hit_flash = _column("hit_flash", int)
+
+    @property
+    def type(self):
+        return TYPE_NAMES[self.store.type_id[self.index]]
+
+    @property
+    def color(self):
+        return ZOMBIE_TYPES[self.type]["color"]
+
+    @property
+    def size_pulse(self):
+        return 2 * math.sin(self.animation_frame / 5)
+
+    def move_towards(self, target_x, target_y, game_map, spatial_hash=None, flow_field=None):
+        raise TypeError("Zombies in a ZombieStore are moved by ZombieStore.step")
+
+
+class ZombieStore:
+    """Structure-of-arrays horde storage stepped with whole-array NumPy operations.
+
+    Rows 0..count-1 hold the live zombies and self.views holds one ZombieView per
+    row, in row order, so it can stand in for the wave's zombie list. Removal moves
+    the last row into the hole. The store also answers the SpatialHash queries
+    from a cell index that is rebuilt lazily after zombies move.
+    """
+    def __init__(self, rng=None, capacity=256, cell_size=SPATIAL_HASH_CELL_SIZE):
+        rng = rng if rng is not None else random
+        self.count = 0
+        self.capacity = capacity
+        for name in FLOAT_COLUMNS:
+            setattr(self, name, np.zeros(capacity))
+        for name in INT_COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=np.int32))
+        self.views = []
+        # Path offsets are drawn in bulk from a NumPy generator seeded off the gameplay stream
+        self.np_rng = np.random.default_rng(rng.getrandbits(64))
+        self.cell_size = cell_size
+        self.grid_index = None  # Built on the first query after zombies move
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, zombie):
+        index = getattr(zombie, 'index', None)
+        return index is not None and index < self.count and self.views[index] is zombie
+
+    def _grow(self):
+        self.capacity *= 2
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            old = getattr(self, name)
+            column = np.zeros(self.capacity, dtype=old.dtype)
+            column[:self.count] = old[:self.count]
+            setattr(self, name, column)
+
+    def add(self, zombie):
+        """Copy a Zombie into a new row and return the view standing in for it"""
+        if self.count == self.capacity:
+            self._grow()
+        row = self.count
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            if name != "type_id":
+                getattr(self, name)[row] = getattr(zombie, name)
+        self.type_id[row] = TYPE_NAMES.index(zombie.type)
+        view = ZombieView(self, row)
+        self.views.append(view)
+        self.count += 1
+        self.grid_index = None
+        return view
+
+    def remove(self, view):
+        if view not in self:
+            return
+        row = view.index
+        last = self.count - 1
+        if row != last:
+            for name in FLOAT_COLUMNS + INT_COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            moved = self.views[last]
+            moved.index = row
+            self.views[row] = moved
+        self.views.pop()
+        view.index = None  # Detached: reading it now is an error rather than another zombie's data
+        self.count -= 1
+        self.grid_index = None
+
+    # SpatialHash compatibility: rows are indexed by the store itself
+    def insert(self, entity, x, y, radius=0):
+        self.grid_index = None
+
+    def move(self, entity, x, y):
+        self.grid_index = None
+
+    def step(self, target_x, target_y, game_map, flow_field=None):
+        """Move every zombie one tick towards the target (the vectorized move_towards)"""
+        n = self.count
+        if n == 0:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+
+        # New random path offsets for zombies whose timer ran out
+        timer = self.path_timer[:n]
+        timer += 1
+        expired = np.flatnonzero(timer >= self.path_timer_max[:n])
+        if len(expired):
+            timer[expired] = 0
+            self.path_timer_max[expired] = self.np_rng.integers(30, 61, len(expired))
+            self.path_offset_x[expired] = self.np_rng.integers(-50, 51, len(expired))
+            self.path_offset_y[expired] = self.np_rng.integers(-50, 51, len(expired))
+
+        # Steer towards the target, plus the crowd push
+        dx = target_x + self.path_offset_x[:n] - x
+        dy = target_y + self.path_offset_y[:n] - y
+        dist = np.sqrt(dx * dx + dy * dy)  # np.hypot is several times slower
+        np.maximum(dist, 1e-9, out=dist)  # A zombie on its target has dx = dy = 0 and stays put
+        dx /= dist
+        dy /= dist
+        if flow_field is not None:
+            # Follow the field wherever it gives a direction
+            flow_x, flow_y, follow = flow_field.sample_many(x, y, game_map.tile_size)
+            np.copyto(dx, flow_x, where=follow)
+            np.copyto(dy, flow_y, where=follow)
+        speed = self.speed[:n]
+        push_x, push_y = self.separation(x, y)
+        move_x = dx
+        move_x *= speed
+        move_x += push_x
+        move_y = dy
+        move_y *= speed
+        move_y += push_y
+
+        # Move one axis at a time, falling back to half a step when blocked
+        for column, move in ((x, move_x), (y, move_y)):
+            moved = column + move
+            ok = game_map.are_passable(moved, y) if column is x else game_map.are_passable(x, moved)
+            blocked = np.flatnonzero(~ok)
+            if len(blocked):
+                moved[blocked] = column[blocked] + move[blocked] * 0.5
+                if column is x:
+                    ok[blocked] = game_map.are_passable(moved[blocked], y[blocked])
+                else:
+                    ok[blocked] = game_map.are_passable(x[blocked], moved[blocked])
+            np.copyto(column, moved, where=ok)
+
+        frames = self.animation_frame[:n]
+        frames += 1
+        frames %= 30
+        flash = self.hit_flash[:n]
+        np.maximum(flash - 1, 0, out=flash)
+        self.grid_index = None
+
+    def separation(self, x, y):
+        """Crowd push down the gradient of a smoothed zombie density grid.
+
+        The vectorized counterpart of Zombie.separation: instead of visiting
+        neighbours it bins the horde into ZOMBIE_DENSITY_CELL_SIZE cells, spreads
+        each count over the 3x3 cells a zombie body covers and pushes every zombie
+        towards emptier ground. The cost is linear in zombies plus grid cells.
+        """
+        scale = 1.0 / ZOMBIE_DENSITY_CELL_SIZE
+        grid_x = np.floor(x * scale)
+        grid_y = np.floor(y * scale)
+        # A two-cell margin keeps the blur and the gradient taps inside the grid
+        left = grid_x.min() - 2
+        top = grid_y.min() - 2
+        width = int(grid_x.max() - left) + 3
+        height = int(grid_y.max() - top) + 3
+        if width * height > ZOMBIE_DENSITY_MAX_CELLS:
+            # Horde scattered over a huge area: crowding is not the problem there
+            return 0.0, 0.0
+        grid_y -= top
+        grid_y *= width
+        grid_y += grid_x
+        grid_y -= left
+        cells = grid_y.astype(np.intp)
+        counts = np.bincount(cells, minlength=width * height)
+        # 3x3 box blur on the flat grid; the empty margin stops rows bleeding into each other
+        spread = counts.copy()
+        spread[width:] += counts[:-width]
+        spread[:-width] += counts[width:]
+        density = spread.copy()
+        density[1:] += spread[:-1]
+        density[:-1] += spread[1:]
+        # Central differences at each zombie's cell, pointing away from the crowd
+        push_x = (density.take(cells - 1) - density.take(cells + 1)) * (0.5 * ZOMBIE_DENSITY_PUSH)
+        push_y = (density.take(cells - width) - density.take(cells + width)) * (0.5 * ZOMBIE_DENSITY_PUSH)
+        # Cap the push like Zombie.separation does
+        push_sq = push_x * push_x + push_y * push_y
+        over = np.flatnonzero(push_sq > ZOMBIE_SEPARATION_MAX_PUSH ** 2)
+        if len(over):
+            scale = ZOMBIE_SEPARATION_MAX_PUSH / np.sqrt(push_sq[over])
+            push_x[over] *= scale
+            push_y[over] *= scale
+        return push_x, push_y
+
+    def touching(self, x, y, radius):
+        """Views of zombies overlapping the circle at (x, y), in row order"""
+        n = self.count
+        reach = self.radius[:n] + radius
+        rows = np.flatnonzero((self.x[:n] - x) ** 2 + (self.y[:n] - y) ** 2 < reach * reach)
+        return [self.views[row] for row in rows]
+
+    def dead(self):
+        """Views of zombies with no health left, in row order"""
+        rows = np.flatnonzero(self.health[:self.count] <= 0)
+        return [self.views[row] for row in rows]
+
+    def _build_grid_index(self):
+        """Sort rows by cell so each query touches only the rows in the cells it covers"""
+        n = self.count
+        size = self.cell_size
+        cell_x = np.floor_divide(self.x[:n], size).astype(np.intp)
+        cell_y = np.floor_divide(self.y[:n], size).astype(np.intp)
+        origin_x = int(cell_x.min()) if n else 0
+        origin_y = int(cell_y.min()) if n else 0
+        width = int(cell_x.max()) - origin_x + 1 if n else 1
+        height = int(cell_y.max()) - origin_y + 1 if n else 1
+        keys = (cell_y - origin_y) * width + (cell_x - origin_x)
+        starts = np.zeros(width * height + 1, dtype=np.intp)
+        np.cumsum(np.bincount(keys, minlength=width * height), out=starts[1:])
+        self.grid_index = {
+            "origin": (origin_x, origin_y), "width": width, "height": height,
+            "rows": np.argsort(keys, kind="stable").tolist(), "starts": starts.tolist(),
+            "x": self.x[:n].tolist(), "y": self.y[:n].tolist(), "radius": self.radius[:n].tolist(),
+            "max_radius": float(self.radius[:n].max()) if n else 0.0,
+        }
+        return self.grid_index
+
+    def _buckets(self, left, top, right, bottom):
+        """Row lists of the cells that could hold a zombie touching the box"""
+        index = self.grid_index or self._build_grid_index()
+        size = self.cell_size
+        pad = index["max_radius"]
+        origin_x, origin_y = index["origin"]
+        width = index["width"]
+        min_cx = max(int((left - pad) // size) - origin_x, 0)
+        max_cx = min(int((right + pad) // size) - origin_x, width - 1)
+        min_cy = max(int((top - pad) // size) - origin_y, 0)
+        max_cy = min(int((bottom + pad) // size) - origin_y, index["height"] - 1)
+        rows = index["rows"]
+        starts = index["starts"]
+        buckets = []
+        for cy in range(min_cy, max_cy + 1):
+            base = cy * width
+            for cx in range(min_cx, max_cx + 1):
+                start = starts[base + cx]
+                end = starts[base + cx + 1]
+                if start < end:
+                    buckets.append(rows[start:end])
+        return buckets, index
+
+    def query_circle(self, x, y, radius=0, per_cell=None):
+        """Same contract as SpatialHash.query_circle, returning views"""
+        buckets, index = self._buckets(x - radius, y - radius, x + radius, y + radius)
+        xs, ys, radii = index["x"], index["y"], index["radius"]
+        views = self.views
+        result = []
+        for bucket in buckets:
+            found = 0
+            for row in bucket:
+                reach = radius + radii[row]
+                dx = xs[row] - x
+                dy = ys[row] - y
+                if dx * dx + dy * dy < reach * reach:
+                    result.append(views[row])
+                    found += 1
+                    if found == per_cell:
+                        break
+        return result
+
+    def query_segment(self, x0, y0, x1, y1, radius=0):
+        """Same contract as SpatialHash.query_segment, returning (t, view) pairs"""
+        dx = x1 - x0
+        dy = y1 - y0
+        length_sq = dx * dx + dy * dy
+        buckets, index = self._buckets(min(x0, x1) - radius, min(y0, y1) - radius,
+                                       max(x0, x1) + radius, max(y0, y1) + radius)
+        xs, ys, radii = index["x"], index["y"], index["radius"]
+        views = self.views
+        hits = []
+        for bucket in buckets:
+            for row in bucket:
+                reach = radius + radii[row]
+                fx = x0 - xs[row]
+                fy = y0 - ys[row]
+                c = fx * fx + fy * fy - reach * reach
+                if c < 0:
+                    hits.append((0.0, views[row]))
+                    continue
+                b = fx * dx + fy * dy
+                if b >= 0:
+                    continue
+                discriminant = b * b - length_sq * c
+                if discriminant < 0:
+                    continue
+                t = (-b - math.sqrt(discriminant)) / length_sq
+                if t <= 1.0:
+                    hits.append((t, views[row]))
+        if len(hits) > 1:
+            hits.sort(key=lambda hit: hit[0])
+        return hits
+
+    def draw(self, screen, camera_x, camera_y, lag=0.0, look_at=(0, 0), viewport=None):
+        """Draw the horde as Zombie.draw would, from whole-column maths and one blits call.
+
+        lag blends each zombie back towards its previous position (see
+        WaveManager.draw_zombies); the eyes follow look_at, a screen position.
+        With a viewport only the rows it can see are drawn.
+        """
+        n = self.count
+        if viewport is not None:
+            rows = np.flatnonzero(viewport.mask(self.x[:n], self.y[:n], self.radius[:n]))
+            viewport.record("zombies", len(rows), n)
+        else:
+            rows = np.arange(n)
+        if not len(rows):
+            return
+        sprites = Zombie.sprite_cache
+        x = self.x[rows]
+        y = self.y[rows]
+        lag_x = (x - self.prev_x[rows]) * lag
+        lag_y = (y - self.prev_y[rows]) * lag
+        # Truncated like int() in Zombie.draw
+        screen_x = (x - camera_x - lag_x).astype(np.int64)
+        screen_y = (y - camera_y - lag_y).astype(np.int64)
+        radius = self.radius[rows].astype(np.int64) + (2 * np.sin(self.animation_frame[rows] / 5)).astype(np.int64)
+        look_x = look_at[0] - screen_x
+        look_y = look_at[1] - screen_y
+        direction = np.round(np.arctan2(look_y, look_x) * (EYE_DIRECTIONS / (2 * math.pi))).astype(np.int64) % EYE_DIRECTIONS
+        direction[np.hypot(look_x, look_y) < 1] = EYE_DIRECTIONS
+        hit_flash = self.hit_flash[rows]
+        flashing = hit_flash > 0
+
+        colors = [ZOMBIE_TYPES[name]["color"] for name in TYPE_NAMES]
+        white = COLORS["white"]
+        get = sprites.get
+        blits = []
+        for type_id, flash, r, d, sx, sy in zip(self.type_id[rows].tolist(), flashing.tolist(), radius.tolist(),
+                                                direction.tolist(), screen_x.tolist(), screen_y.tolist()):
+            sprite, origin = get(TYPE_NAMES[type_id], white if flash else colors[type_id], r, d)
+            blits.append((sprite, (sx - origin, sy - origin)))
+        screen.blits(blits, False)
+
+        health = self.health[rows]
+        max_health = self.max_health[rows]
+        for i in np.flatnonzero(health < max_health).tolist():
+            draw_health_bar(screen, x[i] - camera_x - lag_x[i], y[i] - camera_y - lag_y[i],
+                            int(self.radius[rows[i]]), health[i] / max_health[i])
+        if flashing.any():
+            # Exclamation mark floating upward while the hit flash lasts
+            mark = sprites.get_flash_mark()
+            half = mark.get_width() // 2
+            for i in np.flatnonzero(flashing).tolist():
+                screen.blit(mark, (int(screen_x[i]) - half,
+                                   int(y[i] - camera_y - lag_y[i] - radius[i] - 15 - hit_flash[i] * 2)))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["grid_index"] = None  # Derived data; rebuilt on demand
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            state[name] = state[name][:self.count].copy()
+        state["capacity"] = self.count
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.capacity == 0:
+            self.capacity = 1
+            for name in FLOAT_COLUMNS + INT_COLUMNS:
+                setattr(self, name, np.zeros(1, dtype=getattr(self, name).dtype))